@@ -6,13 +6,28 @@ from dotenv import load_dotenv
 # Load environment variables FIRST before any other imports
 load_dotenv()
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import os
+import time
+import logging
 
 # Import route modules (after loading env vars)
 from routes.generate_text import text_bp
 from routes.generate_voices import voices_bp
+from routes.jobs import jobs_bp
+from routes.pipeline import pipeline_bp
+from routes.realtime import realtime_bp
+from routes.export import export_bp
+from services.rate_limiter import get_limiter_stats
+from routes.generate_voices import speculator, tts_service
+from services.idempotency import get_idempotency_store
+from services.admission import get_admission_stats
+from utils.deadline import set_deadline, reset_deadline, current_deadline, parse_timeout
+from utils.disconnect import disconnect_watcher, request_socket
+from utils import metrics
+from utils.timing import start_timing, stop_timing, get_spans, record_span, format_server_timing
+from utils.profiling import RequestProfiler
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -26,9 +41,116 @@ CORS(app, origins=[
     "*"  # Allow all origins for now - restrict in production
 ])
 
+# Opt-in profiling of text and voice requests (must hook in before registration)
+RequestProfiler().install(text_bp, voices_bp)
+
 # Register blueprints
 app.register_blueprint(text_bp, url_prefix='/api')
 app.register_blueprint(voices_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
+app.register_blueprint(pipeline_bp, url_prefix='/api')
+app.register_blueprint(realtime_bp, url_prefix='/api')
+app.register_blueprint(export_bp, url_prefix='/api')
+
+# Time budget for a request, shared by every provider call it makes
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', 30))
+
+# Route budgets (override with REQUEST_DEADLINE_<ENDPOINT>, e.g. REQUEST_DEADLINE_TEXT_ANALYZE_PROJECT)
+DEFAULT_ROUTE_DEADLINES = {
+    'text.analyze_project': 20,
+    'text.analyze_with_preferences': 20,
+    'text.regenerate_script': 15,
+    'text.optimize_prompt': 20,
+    'voices.generate_audio_sample': 30,
+    # A WebSocket session: the longest a real-time TTS connection may stay open
+    'realtime.tts_stream': 600,
+    # Streaming exports stop here; clients continue with ?after=<last _id>
+    'export.export_records': 600
+}
+ROUTE_DEADLINE_SECONDS = {
+    endpoint: float(os.environ.get(f"REQUEST_DEADLINE_{endpoint.replace('.', '_').upper()}", seconds))
+    for endpoint, seconds in DEFAULT_ROUTE_DEADLINES.items()
+}
+
+# Clients may shorten (never extend) the budget with this header, in seconds
+DEADLINE_HEADER = 'X-Request-Timeout'
+
+# Stop provider work for requests whose client has disconnected
+CANCEL_ON_DISCONNECT = os.environ.get('CANCEL_ON_DISCONNECT', 'true').lower() != 'false'
+
+# Server-Timing header on every response, optionally logged as well
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() != 'false'
+SERVER_TIMING_LOG = os.environ.get('SERVER_TIMING_LOG', 'false').lower() == 'true'
+
+@app.before_request
+def start_request_deadline():
+    g.request_started = time.monotonic()
+    seconds = ROUTE_DEADLINE_SECONDS.get(request.endpoint, REQUEST_DEADLINE_SECONDS)
+    requested = parse_timeout(request.headers.get(DEADLINE_HEADER))
+    if requested is not None:
+        seconds = min(seconds, requested)
+    g.deadline_token = set_deadline(seconds)
+    g.timing_token = start_timing()
+
+    if CANCEL_ON_DISCONNECT and request.method == 'POST':
+        sock = request_socket(request.environ)
+        if sock is not None:
+            # Read the body first so only a closed connection makes the socket readable
+            request.get_data(cache=True)
+            g.disconnect_token = disconnect_watcher.watch(sock, _cancel_on_disconnect(current_deadline()))
+
+def _cancel_on_disconnect(deadline):
+    def cancel():
+        logging.info("Client disconnected, cancelling request")
+        deadline.cancel('client disconnected')
+    return cancel
+
+@app.after_request
+def add_server_timing(response):
+    started = g.get('request_started')
+    if started is None or not SERVER_TIMING_ENABLED:
+        return response
+
+    record_span('total', (time.monotonic() - started) * 1000)
+    header = format_server_timing(get_spans())
+    response.headers['Server-Timing'] = header
+    # Let cross-origin pages read the timings in devtools / Resource Timing
+    response.headers['Timing-Allow-Origin'] = '*'
+
+    if SERVER_TIMING_LOG:
+        logging.info(f"{request.method} {request.path} {response.status_code} timing: {header}")
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    endpoint = request.endpoint or 'unmatched'
+    if started is not None and endpoint != 'prometheus_metrics':
+        # Streamed responses are measured until their headers are sent
+        metrics.REQUEST_LATENCY.labels(
+            endpoint=endpoint,
+            method=request.method,
+            status=str(response.status_code)
+        ).observe(time.monotonic() - started)
+    if response.status_code >= 500:
+        metrics.ERRORS.labels(component='route', type=endpoint).inc()
+    return response
+
+@app.teardown_request
+def clear_request_deadline(error=None):
+    disconnect_token = g.pop('disconnect_token', None)
+    if disconnect_token is not None:
+        disconnect_watcher.unwatch(disconnect_token)
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired():
+        reason = 'disconnect' if deadline.cancel_reason else 'deadline'
+        metrics.REQUESTS_CANCELLED.labels(endpoint=request.endpoint or 'unmatched', reason=reason).inc()
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        reset_deadline(token)
+    timing_token = g.pop('timing_token', None)
+    if timing_token is not None:
+        stop_timing(timing_token)
 
 @app.route('/')
 def home():
@@ -49,9 +171,22 @@ def health():
             "tts": "connected", 
             "database": "disabled"
         },
+        "rate_limits": get_limiter_stats(),
+        "admission": get_admission_stats(),
+        "speculative_synthesis": speculator.stats(),
+        "voice_catalog": tts_service.catalog.status(),
+        "voice_stats": tts_service.voice_stats.stats(),
+        "fragment_cache": tts_service.fragment_cache.stats(),
+        "idempotency": get_idempotency_store().stats(),
         "timestamp": "2024-01-01T00:00:00Z"
     })
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render_metrics()
+    return Response(body, mimetype=None, content_type=content_type)
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
@@ -64,7 +199,7 @@ def internal_error(error):
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
-    
+
     app.run(
         host='0.0.0.0',
         port=port,
@@ -0,0 +1,116 @@
+"""
+Benchmark cases for prompt generation, voice catalog lookups, response
+serialization and the audio response path
+"""
+import random
+from contextlib import contextmanager
+from unittest import mock
+
+from benchmarks.registry import benchmark
+from utils.meta_prompt import generate_meta_prompt
+
+# Realistic inputs
+SHORT_DESCRIPTION = "A medical appointment scheduling assistant that helps patients book appointments"
+
+# ~4 KB description with no domain keywords until the end: the worst case for keyword scans
+LONG_DESCRIPTION = (
+    "Our assistant greets callers, answers questions about opening hours, explains "
+    "pricing tiers, collects contact details and hands the conversation over to a "
+    "human when the caller asks for one. "
+) * 20 + "It is used by a hospital."
+
+AUDIO_SIZE_BYTES = 5 * 1024 * 1024
+LARGE_CATALOG_SIZE = 2000
+
+# Prompt generation
+
+@benchmark('meta_prompt.short', budget_us=100)
+def bench_meta_prompt_short():
+    generate_meta_prompt(SHORT_DESCRIPTION)
+
+@benchmark('meta_prompt.long', budget_us=500)
+def bench_meta_prompt_long():
+    generate_meta_prompt(LONG_DESCRIPTION)
+
+@benchmark('meta_prompt.preferences', budget_us=100)
+def bench_meta_prompt_preferences():
+    generate_meta_prompt(SHORT_DESCRIPTION, user_tone='Calm', use_case='Customer Service')
+
+# Voice catalog
+
+def _tts_service():
+    from services.tts_service import TTSService
+    return TTSService()
+
+def _large_catalog_service():
+    service = _tts_service()
+    base = service.catalog.voices('elevenlabs')
+    voices = []
+    for index in range(LARGE_CATALOG_SIZE):
+        voice = dict(base[index % len(base)])
+        voice['id'] = f"{voice['id']}_{index}"
+        voices.append(voice)
+    service.catalog._set_catalog({"version": 1, "providers": {"elevenlabs": {"voices": voices}}})
+    return service, voices[-1]['id']
+
+@benchmark('catalog.get_voice_details', setup=_tts_service, budget_us=20)
+def bench_voice_details(service):
+    service.get_voice_details('elevenlabs_antoni')
+
+@benchmark('catalog.get_voice_details_miss', setup=_tts_service, budget_us=20)
+def bench_voice_details_miss(service):
+    service.get_voice_details('unknown_voice')
+
+@benchmark('catalog.get_voice_details_large', setup=_large_catalog_service, budget_us=1000)
+def bench_voice_details_large(context):
+    service, last_id = context
+    service.get_voice_details(last_id)
+
+@benchmark('catalog.get_recommended_voices', setup=_tts_service, budget_us=20)
+def bench_recommended_voices(service):
+    service.get_recommended_voices('calm', 'healthcare', 'conversational')
+
+# Response serialization
+# (allocation bound: runs in separate processes differ by up to ~1.7x on shared hosts)
+
+def _json_payloads():
+    from app import app
+    service = _tts_service()
+    voices = service.catalog.voices('elevenlabs', featured_only=True) * 50
+    analyze = {
+        "success": True,
+        "generated_script": LONG_DESCRIPTION,
+        "analysis": {"tone": "calm", "target_audience": "healthcare", "style": "conversational"},
+        "meta_prompt": generate_meta_prompt(SHORT_DESCRIPTION)
+    }
+    return app, {"success": True, "voices": voices, "total_count": len(voices)}, analyze
+
+@benchmark('json.voices_response', setup=_json_payloads, budget_us=2000, tolerance=2.0)
+def bench_json_voices(context):
+    app, voices, _ = context
+    app.json.dumps(voices)
+
+@benchmark('json.analyze_response', setup=_json_payloads, budget_us=200, tolerance=2.0)
+def bench_json_analyze(context):
+    app, _, analyze = context
+    app.json.dumps(analyze)
+
+# Audio response path
+
+@contextmanager
+def _audio_route():
+    from app import app
+    from routes import generate_voices
+
+    audio = bytes(random.getrandbits(8) for _ in range(1024)) * (AUDIO_SIZE_BYTES // 1024)
+    # Serve pre-rendered audio so only the in-process path is measured (restored afterwards)
+    with mock.patch.object(generate_voices.tts_service, 'generate_audio',
+                           lambda voice_id, text, settings=None: audio):
+        yield app.test_client(), audio
+
+@benchmark('audio.generate_audio_route_5mb', setup=_audio_route, budget_us=20000, tolerance=1.5)
+def bench_generate_audio_route(context):
+    client, _ = context
+    response = client.post('/api/generate-audio', json={"voice_id": "elevenlabs_rachel", "text": SHORT_DESCRIPTION})
+    response.get_data()
+    response.close()
@@ -0,0 +1,35 @@
+"""
+Benchmark registration for run_benchmarks.py
+"""
+from typing import Callable, Dict, Optional
+
+class Benchmark:
+    def __init__(self, name: str, fn: Callable, setup: Optional[Callable] = None,
+                 budget_us: Optional[float] = None, tolerance: Optional[float] = None):
+        """
+        Args:
+            name: Unique benchmark name
+            fn: Code under test; receives setup()'s return value when setup is given
+            setup: Builds inputs once, outside the timed loop. May return a context
+                manager, which is entered for the run and exited afterwards
+            budget_us: Per-call time budget in microseconds, enforced by --compare
+            tolerance: Allowed slowdown ratio vs baseline, instead of --threshold
+                (for benchmarks dominated by allocation or I/O jitter)
+        """
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.budget_us = budget_us
+        self.tolerance = tolerance
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+def benchmark(name: str, setup: Optional[Callable] = None, budget_us: Optional[float] = None,
+              tolerance: Optional[float] = None):
+    """Decorator registering a benchmark function"""
+    def register(fn: Callable) -> Callable:
+        if name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        BENCHMARKS[name] = Benchmark(name, fn, setup, budget_us, tolerance)
+        return fn
+    return register
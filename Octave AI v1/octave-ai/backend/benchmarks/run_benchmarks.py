@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the backend's in-process hot paths
+
+Usage (from backend/):
+    python benchmarks/run_benchmarks.py                          # run and print
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --filter meta_prompt
+
+--compare exits with status 1 when a benchmark's fastest repeat is slower than
+the baseline's by more than --threshold (default 1.25x, or the benchmark's own
+tolerance) and by more than --noise-floor microseconds, or when it exceeds its
+per-call budget. The fastest repeat is the one least disturbed by the machine,
+so it is compared rather than the median.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import statistics
+
+# Run against the backend package without provider keys or network access
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('ELEVENLABS_API_KEY', 'benchmark-key')
+os.environ.setdefault('SERVER_TIMING_ENABLED', 'true')
+os.environ.setdefault('VOICE_CATALOG_SYNC', 'false')
+
+import benchmarks.cases  # noqa: E402,F401  (registers benchmarks)
+from benchmarks.registry import BENCHMARKS  # noqa: E402
+
+def measure(bench, min_time: float, repeats: int):
+    """
+    Time a benchmark, auto-scaling the inner loop so each repeat runs ~min_time
+
+    Returns:
+        Dict of per-call timings in microseconds
+    """
+    with contextlib.ExitStack() as stack:
+        context = bench.setup() if bench.setup else None
+        # Setups that patch shared state are context managers and undo it afterwards
+        if isinstance(context, contextlib.AbstractContextManager):
+            context = stack.enter_context(context)
+        fn = (lambda: bench.fn(context)) if bench.setup else bench.fn
+
+        # Warm up and calibrate the number of calls per repeat
+        loops = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time / 10 or loops >= 1_000_000:
+                break
+            loops *= 10
+        loops = max(1, int(loops * (min_time / max(elapsed, 1e-9))))
+
+        samples = []
+        # Collections triggered by earlier benchmarks' garbage are not the code under test
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(repeats):
+                started = time.perf_counter()
+                for _ in range(loops):
+                    fn()
+                samples.append((time.perf_counter() - started) / loops * 1e6)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return {
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "stdev_us": round(statistics.pstdev(samples), 3),
+        "loops": loops,
+        "repeats": repeats
+    }
+
+def compare(results, baseline, threshold: float, noise_floor_us: float):
+    """
+    Compare the fastest repeats against a baseline
+
+    A benchmark regresses when it is slower than the baseline by more than its
+    tolerance (threshold unless it sets its own) and by more than noise_floor_us,
+    so jitter of a fraction of a microsecond in tiny benchmarks is not flagged.
+
+    Returns:
+        List of (name, status, detail) rows and whether any regression was found
+    """
+    rows = []
+    failed = False
+    baseline_results = baseline.get('results', {})
+
+    for name, result in results.items():
+        bench = BENCHMARKS[name]
+        detail = ''
+        status = 'ok'
+
+        base = baseline_results.get(name)
+        if base:
+            tolerance = bench.tolerance or threshold
+            ratio = result['min_us'] / base['min_us'] if base['min_us'] else 1.0
+            detail = f"{ratio:.2f}x baseline ({base['min_us']:.1f}us)"
+            if ratio > tolerance and result['min_us'] - base['min_us'] > noise_floor_us:
+                status = 'REGRESSION'
+            elif ratio < 1 / tolerance and base['min_us'] - result['min_us'] > noise_floor_us:
+                status = 'faster'
+        else:
+            detail = 'no baseline'
+
+        if bench.budget_us is not None and result['median_us'] > bench.budget_us:
+            status = 'OVER BUDGET'
+            detail += f", budget {bench.budget_us:.0f}us"
+
+        failed = failed or status in ('REGRESSION', 'OVER BUDGET')
+        rows.append((name, status, detail))
+
+    return rows, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Run backend micro-benchmarks")
+    parser.add_argument('--filter', default='', help="Only run benchmarks whose name contains this")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds per repeat")
+    parser.add_argument('--repeats', type=int, default=9)
+    parser.add_argument('--save', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Allowed slowdown ratio vs baseline")
+    parser.add_argument('--noise-floor', type=float, default=2.0,
+                        help="Slowdowns smaller than this many microseconds are never regressions")
+    args = parser.parse_args()
+
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(bench, args.min_time, args.repeats)
+        print(f"{name:<40} median {results[name]['median_us']:>12.2f}us  min {results[name]['min_us']:>12.2f}us")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                "results": results
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, failed = compare(results, baseline, args.threshold, args.noise_floor)
+
+        print(f"\nComparison against {args.compare} (threshold {args.threshold}x, "
+              f"noise floor {args.noise_floor}us):")
+        for name, status, detail in rows:
+            print(f"  {status:<12} {name:<40} {detail}")
+
+        if failed:
+            print("\nPerformance regressions detected")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the provider APIs used by TTSService and LLMService
+
+One HTTP server answers:
+- POST /v1/text-to-speech/<voice_id>        ElevenLabs (MP3, streamed in chunks)
+- POST /v1/audio/speech                     OpenAI TTS (MP3)
+- POST /openai/v1/audio/speech              Groq TTS (WAV)
+- POST /openai/v1/chat/completions          Groq chat completions
+- GET  /v1/voices                           ElevenLabs voice list (ETag / 304)
+
+Point the backend at it with:
+    ELEVENLABS_BASE_URL=http://127.0.0.1:<port>
+    OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+    GROQ_BASE_URL=http://127.0.0.1:<port>
+
+Latency, error and 429 rates and streaming chunk timing are configurable per
+provider (see DEFAULT_PROFILES and --profile).
+"""
+import sys
+import json
+import time
+import math
+import random
+import re
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+# Per-provider behaviour: lognormal latency (median seconds, sigma), failure rates,
+# Retry-After for 429s, and how the body is streamed
+DEFAULT_PROFILES = {
+    'elevenlabs': {'median_latency': 0.35, 'sigma': 0.4, 'error_rate': 0.01, 'throttle_rate': 0.02,
+                   'retry_after': 1, 'chunks': 8, 'chunk_interval': 0.03, 'bytes_per_char': 160},
+    'openai': {'median_latency': 0.45, 'sigma': 0.35, 'error_rate': 0.01, 'throttle_rate': 0.01,
+               'retry_after': 1, 'chunks': 1, 'chunk_interval': 0.0, 'bytes_per_char': 160},
+    'groq_tts': {'median_latency': 0.30, 'sigma': 0.3, 'error_rate': 0.01, 'throttle_rate': 0.02,
+                 'retry_after': 2, 'chunks': 1, 'chunk_interval': 0.0, 'bytes_per_char': 2000},
+    'groq_chat': {'median_latency': 0.25, 'sigma': 0.5, 'error_rate': 0.01, 'throttle_rate': 0.03,
+                  'retry_after': 2, 'chunks': 1, 'chunk_interval': 0.0, 'bytes_per_char': 0,
+                  'token_interval': 0.01}
+}
+
+FAKE_SCRIPT = (
+    "Hi, thanks for calling. I can help you book, move or cancel an appointment. "
+    "What day works best for you?"
+)
+
+# ElevenLabs voice list served by GET /v1/voices
+FAKE_VOICES = [
+    {"voice_id": "pNInz6obpgDQGcFmaJgB", "name": "Adam", "category": "premade",
+     "labels": {"gender": "male", "accent": "american", "description": "deep"}},
+    {"voice_id": "TxGEqnHWrfWFTfGW9XjX", "name": "Josh", "category": "premade",
+     "labels": {"gender": "male", "accent": "american", "description": "deep"}},
+    {"voice_id": "EXAVITQu4vr4xnSDxMaL", "name": "Bella", "category": "premade",
+     "labels": {"gender": "female", "accent": "american", "description": "soft"}},
+    {"voice_id": "ErXwobaYiN019PkySvjV", "name": "Antoni", "category": "premade",
+     "labels": {"gender": "male", "accent": "american", "description": "well-rounded"}},
+    {"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel", "category": "premade",
+     "labels": {"gender": "female", "accent": "american", "description": "calm"}}
+]
+FAKE_VOICES_ETAG = '"fake-voices-v1"'
+
+def _mp3_frames(size: int) -> bytes:
+    """Bytes shaped like an MPEG-1 Layer III stream (valid frame headers, silent payload)"""
+    frame_header = b'\xff\xfb\x90\x64'  # 128 kbps, 44.1 kHz, mono
+    frame_size = 417
+    frame = frame_header + b'\x00' * (frame_size - len(frame_header))
+    return frame * max(1, size // frame_size)
+
+def _wav(size: int) -> bytes:
+    """A 16-bit mono 24 kHz WAV file of roughly size bytes"""
+    pcm = b'\x00\x00' * max(1, size // 2)
+    fmt = struct.pack('<HHIIHH', 1, 1, 24000, 48000, 2, 16)
+    return (b'RIFF' + struct.pack('<I', 36 + len(pcm)) + b'WAVE' +
+            b'fmt ' + struct.pack('<I', 16) + fmt + b'data' + struct.pack('<I', len(pcm)) + pcm)
+
+class ProviderStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, provider: str, outcome: str):
+        with self.lock:
+            key = f"{provider}:{outcome}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    profiles: Dict[str, Dict[str, Any]] = DEFAULT_PROFILES
+    stats: ProviderStats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != '/v1/voices':
+            return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        if self.headers.get('If-None-Match') == FAKE_VOICES_ETAG:
+            self.stats.add('elevenlabs_voices', '304')
+            self.send_response(304)
+            self.send_header('ETag', FAKE_VOICES_ETAG)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.stats.add('elevenlabs_voices', '200')
+        self._send_json(200, {"voices": FAKE_VOICES}, {'ETag': FAKE_VOICES_ETAG})
+
+    def do_POST(self):
+        body = self._read_json()
+
+        if self.path.startswith('/v1/text-to-speech/'):
+            self._serve_audio('elevenlabs', body.get('text', ''), 'audio/mpeg', _mp3_frames)
+        elif self.path == '/v1/audio/speech':
+            self._serve_audio('openai', body.get('input', ''), 'audio/mpeg', _mp3_frames)
+        elif self.path == '/openai/v1/audio/speech':
+            self._serve_audio('groq_tts', body.get('input', ''), 'audio/wav', _wav)
+        elif self.path == '/openai/v1/chat/completions':
+            self._serve_chat(body)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            return json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return {}
+
+    def _simulate(self, provider: str) -> Optional[int]:
+        """Sleep for a sampled latency; return an error status to send, if any"""
+        profile = self.profiles[provider]
+        time.sleep(random.lognormvariate(math.log(profile['median_latency']), profile['sigma']))
+
+        roll = random.random()
+        if roll < profile['throttle_rate']:
+            return 429
+        if roll < profile['throttle_rate'] + profile['error_rate']:
+            return 503
+        return None
+
+    def _fail(self, provider: str, status: int):
+        self.stats.add(provider, str(status))
+        headers = {'Retry-After': str(self.profiles[provider]['retry_after'])} if status == 429 else {}
+        self._send_json(status, {"error": {"message": "simulated failure", "type": "fake_provider"}}, headers)
+
+    def _serve_audio(self, provider: str, text: str, content_type: str, render):
+        status = self._simulate(provider)
+        if status:
+            return self._fail(provider, status)
+
+        profile = self.profiles[provider]
+        audio = render(max(1, len(text)) * profile['bytes_per_char'])
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(audio)))
+        self.end_headers()
+
+        # Stream the body in chunks to mimic provider time-to-first-byte vs total time
+        chunks = max(1, profile['chunks'])
+        step = math.ceil(len(audio) / chunks)
+        for offset in range(0, len(audio), step):
+            self.wfile.write(audio[offset:offset + step])
+            self.wfile.flush()
+            if profile['chunk_interval']:
+                time.sleep(profile['chunk_interval'])
+        self.stats.add(provider, '200')
+
+    def _serve_chat(self, body: Dict[str, Any]):
+        status = self._simulate('groq_chat')
+        if status:
+            return self._fail('groq_chat', status)
+
+        prompt = ' '.join(m.get('content', '') for m in body.get('messages', []))
+        analysis = {"tone": "calm", "target_audience": "healthcare", "style": "conversational"}
+        if 'valid JSON array' in prompt:
+            # Batched analysis: one object per enumerated "Project <n>:" line
+            content = json.dumps([analysis] * len(re.findall(r'^\s*Project \d+:', prompt, re.MULTILINE)))
+        elif re.search(r'JSON array of \d+ scripts', prompt):
+            count = int(re.search(r'JSON array of (\d+) scripts', prompt).group(1))
+            content = json.dumps([f"{FAKE_SCRIPT} (variation {index})" for index in range(1, count + 1)])
+        elif 'valid JSON' in prompt:
+            content = json.dumps(analysis)
+        else:
+            content = FAKE_SCRIPT
+
+        self.stats.add('groq_chat', '200')
+        if body.get('stream'):
+            return self._stream_chat(body, content)
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', 'fake'),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4}
+        })
+
+    def _stream_chat(self, body: Dict[str, Any], content: str):
+        """Server-sent events in the chat.completion.chunk format, one word per event"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        completion_id = f"chatcmpl-fake-{random.getrandbits(32):08x}"
+        words = content.split(' ')
+        for index, word in enumerate(words):
+            delta = {"role": "assistant", "content": word if index == 0 else f" {word}"}
+            event = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": body.get('model', 'fake'),
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            time.sleep(self.profiles['groq_chat']['token_interval'])
+
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        """Write one HTTP/1.1 chunked-encoding chunk (empty data ends the body)"""
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+def start_fake_providers(host: str = '127.0.0.1', port: int = 0,
+                         profiles: Optional[Dict[str, Dict[str, Any]]] = None):
+    """
+    Start the fake provider server in a background thread
+
+    Returns:
+        Tuple of (server, stats); server.server_address gives the bound port
+    """
+    merged = {name: dict(profile) for name, profile in DEFAULT_PROFILES.items()}
+    for name, overrides in (profiles or {}).items():
+        merged.setdefault(name, {}).update(overrides)
+
+    handler = type('ConfiguredFakeProviderHandler', (FakeProviderHandler,), {
+        'profiles': merged,
+        'stats': ProviderStats()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-providers', daemon=True).start()
+    return server, handler.stats
+
+def load_profiles(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Read provider profile overrides from a JSON file"""
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run fake ElevenLabs/OpenAI/Groq endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--profile', help="JSON file with per-provider overrides")
+    args = parser.parse_args()
+
+    server, _ = start_fake_providers(args.host, args.port, load_profiles(args.profile))
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Fake providers listening on {base}")
+    print(f"  ELEVENLABS_BASE_URL={base}\n  OPENAI_BASE_URL={base}/v1\n  GROQ_BASE_URL={base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end load test for the Flask app
+
+Starts the fake providers, starts the app in-process pointed at them (or uses
+--app-url for an already running instance configured the same way), drives each
+scenario at its target rate (open loop: latency is measured from the scheduled
+send time, so a slow server cannot hide queueing), then reports p50/p95/p99,
+throughput and error rate per endpoint.
+
+Usage (from backend/):
+    python loadtest/run_load.py --duration 30 --rps analyze=5 --rps generate_audio=10
+    python loadtest/run_load.py --profile loadtest/slow_elevenlabs.json --json report.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from loadtest.fake_providers import start_fake_providers, load_profiles  # noqa: E402
+
+LONG_SCRIPT = (
+    "Thanks for calling Riverside Clinic. I can help you schedule a new appointment, "
+    "reschedule an existing one, or answer questions about our opening hours. "
+) * 10
+
+# Endpoint scenarios: method, path, JSON body
+SCENARIOS = {
+    'analyze': ('POST', '/api/analyze', {
+        "description": "A medical appointment scheduling assistant that helps patients book visits"
+    }),
+    'generate_audio': ('POST', '/api/generate-audio', {
+        "voice_id": "elevenlabs_rachel",
+        "text": "Hello, thanks for calling. How can I help you today?"
+    }),
+    'generate_audio_long': ('POST', '/api/generate-audio', {
+        "voice_id": "elevenlabs_rachel",
+        "text": LONG_SCRIPT,
+        "long_form": True
+    }),
+    'voices': ('POST', '/api/voices', {
+        "tone": "calm", "target_audience": "healthcare", "style": "conversational"
+    })
+}
+
+def configure_environment(provider_base_url: str):
+    """Point the backend at the fake providers with dummy keys"""
+    os.environ['ELEVENLABS_BASE_URL'] = provider_base_url
+    os.environ['OPENAI_BASE_URL'] = f"{provider_base_url}/v1"
+    os.environ['GROQ_BASE_URL'] = provider_base_url
+    for key in ('ELEVENLABS_API_KEY', 'OPENAI_API_KEY', 'GROQ_API_KEY'):
+        os.environ[key] = 'loadtest-key'
+
+def start_app() -> str:
+    """Serve the Flask app on a free local port; returns its base URL"""
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='app-server', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, scenario: str, latency: float, status: int, error: str = None):
+        with self.lock:
+            self.samples.setdefault(scenario, []).append((latency, status, error))
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def run_scenario(session, base_url, name, rps, duration, executor, recorder):
+    """Schedule requests for one scenario at a fixed rate"""
+    method, path, body = SCENARIOS[name]
+    interval = 1.0 / rps
+    started = time.monotonic()
+    sent = 0
+
+    def send(scheduled_at):
+        try:
+            response = session.request(method, base_url + path, json=body, timeout=120)
+            response.content  # Read the full (possibly streamed) body
+            recorder.add(name, time.monotonic() - scheduled_at, response.status_code)
+        except Exception as e:
+            recorder.add(name, time.monotonic() - scheduled_at, 0, type(e).__name__)
+
+    while True:
+        scheduled_at = started + sent * interval
+        if scheduled_at - started >= duration:
+            break
+        delay = scheduled_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        executor.submit(send, scheduled_at)
+        sent += 1
+
+def build_report(recorder: Recorder, duration: float):
+    report = {}
+    for name, samples in recorder.samples.items():
+        latencies = sorted(latency for latency, _, _ in samples)
+        errors = [s for s in samples if s[1] == 0 or s[1] >= 400]
+        statuses = {}
+        for _, status, error in samples:
+            key = error or str(status)
+            statuses[key] = statuses.get(key, 0) + 1
+
+        report[name] = {
+            "requests": len(samples),
+            "throughput_rps": round(len(samples) / duration, 2),
+            "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            "statuses": statuses
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against fake providers")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds to send traffic")
+    parser.add_argument('--rps', action='append', default=[],
+                        help="scenario=rate, repeatable (scenarios: " + ', '.join(SCENARIOS) + ")")
+    parser.add_argument('--profile', help="JSON file overriding fake provider behaviour")
+    parser.add_argument('--app-url', help="Drive an already running app instead of starting one")
+    parser.add_argument('--max-in-flight', type=int, default=200, help="Client-side concurrency cap")
+    parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args()
+
+    rates = dict(item.split('=', 1) for item in (args.rps or ['analyze=2', 'generate_audio=5']))
+    unknown = set(rates) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    provider_server, provider_stats = start_fake_providers(profiles=load_profiles(args.profile))
+    provider_url = f"http://127.0.0.1:{provider_server.server_address[1]}"
+
+    if args.app_url:
+        base_url = args.app_url.rstrip('/')
+    else:
+        configure_environment(provider_url)
+        base_url = start_app()
+
+    print(f"Fake providers: {provider_url}\nApp: {base_url}")
+    print(f"Driving {', '.join(f'{k}={v}rps' for k, v in rates.items())} for {args.duration:.0f}s")
+
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=args.max_in_flight)
+    session.mount('http://', adapter)
+
+    recorder = Recorder()
+    with ThreadPoolExecutor(max_workers=args.max_in_flight) as executor:
+        drivers = [
+            threading.Thread(target=run_scenario, args=(session, base_url, name, float(rate),
+                                                        args.duration, executor, recorder))
+            for name, rate in rates.items()
+        ]
+        for driver in drivers:
+            driver.start()
+        for driver in drivers:
+            driver.join()
+
+    report = {
+        "duration_s": args.duration,
+        "endpoints": build_report(recorder, args.duration),
+        "provider_responses": provider_stats.snapshot()
+    }
+
+    print(f"\n{'scenario':<22}{'reqs':>7}{'rps':>8}{'err%':>8}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}")
+    for name, row in report['endpoints'].items():
+        print(f"{name:<22}{row['requests']:>7}{row['throughput_rps']:>8}{row['error_rate'] * 100:>8.1f}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+    print(f"\nProvider responses: {report['provider_responses']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Streaming NDJSON export of a user's projects, voice generations and analytics
+
+Exports are only served with EXPORT_SECRET set, to requests carrying a signed header:
+  X-Octave-Export: <unix timestamp>:<hex HMAC-SHA256 of "<timestamp>:<path>:<user_id>" with EXPORT_SECRET>
+"""
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from services.mongodb_service import get_mongodb_service, EXPORT_COLLECTIONS
+from utils.deadline import deadline_passed
+from datetime import datetime
+from typing import Optional
+import hashlib
+import logging
+import hmac
+import json
+import time
+import os
+
+# Create blueprint
+export_bp = Blueprint('export', __name__)
+
+# Documents fetched from MongoDB per round trip
+DEFAULT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 500))
+MAX_BATCH_SIZE = 5000
+# Response bytes gathered before they are written to the client
+FLUSH_BYTES = 64 * 1024
+
+EXPORT_HEADER = 'X-Octave-Export'
+# Without a secret the route is disabled
+EXPORT_SECRET = os.getenv('EXPORT_SECRET', '')
+# Signed export requests are accepted for this long after their timestamp
+SIGNATURE_MAX_AGE_SECONDS = 300
+
+def _encode(value):
+    """JSON for the BSON types json does not know (ObjectId, datetime)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _export_signature(secret: str, timestamp: str, path: str, user_id: str) -> str:
+    return hmac.new(secret.encode(), f"{timestamp}:{path}:{user_id}".encode(), hashlib.sha256).hexdigest()
+
+def sign_export_request(secret: str, path: str, user_id: str, timestamp: Optional[int] = None) -> str:
+    """Build an X-Octave-Export header value for one user's export path"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return f"{timestamp}:{_export_signature(secret, str(timestamp), path, user_id)}"
+
+def _verify_signature(header: str, user_id: str) -> bool:
+    """Check a '<timestamp>:<signature>' header against EXPORT_SECRET"""
+    try:
+        timestamp, signature = header.split(':', 1)
+        if abs(time.time() - int(timestamp)) > SIGNATURE_MAX_AGE_SECONDS:
+            return False
+    except ValueError:
+        return False
+
+    expected = _export_signature(EXPORT_SECRET, timestamp, request.path, user_id)
+    return hmac.compare_digest(expected, signature)
+
+def _positive_int(name: str, default=None, maximum=None):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise ValueError(f"{name} must be a positive integer")
+    return min(number, maximum) if maximum else number
+
+@export_bp.route('/export/<collection>', methods=['GET'])
+def export_records(collection):
+    """
+    Stream a user's documents as NDJSON, oldest first
+
+    Needs an X-Octave-Export header signed for the path and user_id (see sign_export_request).
+
+    Query parameters:
+        user_id: Owner of the documents (required)
+        fields: Comma-separated fields to include (default: all)
+        after: _id of the last line already received, to continue an export
+        limit: Most documents to return (default: all)
+        batch_size: Documents fetched per MongoDB round trip
+    """
+    if not EXPORT_SECRET:
+        return jsonify({"error": "Export is disabled"}), 404
+
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+    if not _verify_signature(request.headers.get(EXPORT_HEADER, ''), user_id):
+        return jsonify({"error": f"Missing or invalid {EXPORT_HEADER} signature"}), 403
+    if collection not in EXPORT_COLLECTIONS:
+        return jsonify({"error": f"Unknown collection, expected one of: {', '.join(EXPORT_COLLECTIONS)}"}), 400
+
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    try:
+        limit = _positive_int('limit')
+        batch_size = _positive_int('batch_size', DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE)
+        db = get_mongodb_service()
+        cursor = db.export_documents(
+            collection, user_id, fields=fields or None, after=request.args.get('after'),
+            batch_size=batch_size, limit=limit
+        ) if db is not None else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error in export_records: {str(e)}")
+        return jsonify({"error": "Failed to start export"}), 500
+
+    if cursor is None:
+        return jsonify({"error": "Export requires a MongoDB connection"}), 503
+
+    def stream_lines():
+        lines = []
+        size = 0
+        exported = 0
+        # Closing the cursor frees it on the server when the client goes away early
+        with cursor:
+            try:
+                for document in cursor:
+                    line = json.dumps(document, default=_encode, ensure_ascii=False) + '\n'
+                    lines.append(line)
+                    size += len(line)
+                    exported += 1
+                    if size >= FLUSH_BYTES:
+                        yield ''.join(lines)
+                        lines, size = [], 0
+                        if deadline_passed():
+                            logging.warning(f"Export of {collection} for {user_id} stopped after "
+                                            f"{exported} documents: out of time")
+                            return
+                if lines:
+                    yield ''.join(lines)
+            except Exception as e:
+                # Headers are already sent; the client continues with ?after=<last _id>
+                logging.error(f"Export of {collection} for {user_id} failed after {exported} documents: {str(e)}")
+
+    return Response(stream_with_context(stream_lines()), mimetype='application/x-ndjson')
@@ -3,7 +3,12 @@ Endpoint for LLM text generation (Gemini or GPT)
 """
 from flask import Blueprint, request, jsonify
 from services.llm_service import LLMService
+from services.script_pool import ScriptVariationPool
+from routes.generate_voices import speculator
+from services.idempotency import idempotent
+from services.admission import admitted, INTERACTIVE
 from utils.meta_prompt import generate_meta_prompt
+from utils.timing import span
 import logging
 import os
 
@@ -12,6 +17,7 @@ text_bp = Blueprint('text', __name__)
 
 # Initialize services lazily
 llm_service = None
+script_pool = None
 
 def get_llm_service():
     global llm_service
@@ -19,7 +25,15 @@ def get_llm_service():
         llm_service = LLMService()
     return llm_service
 
+def get_script_pool():
+    global script_pool
+    if script_pool is None:
+        script_pool = ScriptVariationPool(get_llm_service())
+    return script_pool
+
 @text_bp.route('/analyze', methods=['POST'])
+@idempotent('analyze')
+@admitted('analyze', lambda data: ('llm', INTERACTIVE))
 def analyze_project():
     """
     Analyze project description and generate script
@@ -36,7 +50,8 @@ def analyze_project():
             return jsonify({"error": "Description too short"}), 400
         
         # Generate meta prompt for the project
-        meta_prompt = generate_meta_prompt(description)
+        with span('meta_prompt'):
+            meta_prompt = generate_meta_prompt(description)
         
         # Generate script using LLM
         llm = get_llm_service()
@@ -45,6 +60,10 @@ def analyze_project():
         # Analyze project characteristics
         analysis_result = llm.analyze_project_tone(description)
         
+        # Start rendering previews for the top recommended voices (opt-in)
+        if speculator.should_speculate(data.get('speculate')):
+            speculator.speculate(script_result["script"], analysis_result)
+        
         # Store in database for future reference (disabled for simplicity)
         # project_data = {
         #     "description": description,
@@ -67,6 +86,8 @@ def analyze_project():
         return jsonify({"error": "Failed to analyze project"}), 500
 
 @text_bp.route('/analyze-with-preferences', methods=['POST'])
+@idempotent('analyze_with_preferences')
+@admitted('analyze', lambda data: ('llm', INTERACTIVE))
 def analyze_with_preferences():
     """
     Analyze project with user-selected tone and use case preferences
@@ -85,7 +106,8 @@ def analyze_with_preferences():
             return jsonify({"error": "Description too short"}), 400
         
         # Generate meta prompt with user preferences
-        meta_prompt = generate_meta_prompt(description, user_tone=user_tone, use_case=use_case)
+        with span('meta_prompt'):
+            meta_prompt = generate_meta_prompt(description, user_tone=user_tone, use_case=use_case)
         
         # Generate script using LLM
         llm = get_llm_service()
@@ -100,6 +122,10 @@ def analyze_with_preferences():
         if use_case:
             analysis_result['use_case'] = use_case
         
+        # Start rendering previews for the top recommended voices (opt-in)
+        if speculator.should_speculate(data.get('speculate')):
+            speculator.speculate(script_result["script"], analysis_result)
+        
         # Store in database (disabled for simplicity)
         # project_data = {
         #     "description": description,
@@ -139,12 +165,23 @@ def regenerate_script():
         
         description = data['description'].strip()
         
-        # Generate new meta prompt variation
-        meta_prompt = generate_meta_prompt(description, variation=True)
-        
-        # Generate new script
+        # Serve a pooled variation, or one from a fresh batch whose spares are pooled
+        pooled = get_script_pool().take(description)
+        if pooled is not None:
+            return jsonify({
+                "success": True,
+                "generated_script": pooled["script"],
+                "meta_prompt": pooled["meta_prompt"],
+                "model_used": pooled.get("model_used", "unknown")
+            })
+        
+        # Pool disabled or batch generation failed: generate a single script
+        with span('meta_prompt'):
+            meta_prompt = generate_meta_prompt(description, variation=True)
+        
+        # Generate new script (never a cached one, the user asked for a different script)
         llm = get_llm_service()
-        script_result = llm.generate_script(description, meta_prompt)
+        script_result = llm.generate_script(description, meta_prompt, use_cache=False)
         
         return jsonify({
             "success": True,
@@ -170,7 +207,8 @@ def debug_llm():
             "groq_client_initialized": bool(llm.groq_client) if hasattr(llm, 'groq_client') else False,
             "gemini_model_initialized": bool(llm.gemini_model) if hasattr(llm, 'gemini_model') else False,
             "primary_llm": getattr(llm, 'primary_llm', 'groq'),
-            "groq_key_length": len(os.getenv('GROQ_API_KEY', '')) if os.getenv('GROQ_API_KEY') else 0
+            "groq_key_length": len(os.getenv('GROQ_API_KEY', '')) if os.getenv('GROQ_API_KEY') else 0,
+            "llm_cache": llm.cache.stats()
         }
         return jsonify(debug_info)
     except Exception as e:
@@ -1,8 +1,14 @@
 """
 Endpoint for voice generation and recommendations
 """
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context, g
 from services.tts_service import TTSService
+from services.speculative_synthesis import SpeculativeSynthesizer
+from services.provider_router import ProviderRouter
+from services.idempotency import idempotent
+from services.admission import admitted, admission, AdmissionRejected, INTERACTIVE, BATCH, MAX_WAIT_SECONDS as ADMISSION_MAX_WAIT_SECONDS
+from utils.timing import span
+from utils.deadline import current_deadline, deadline_passed, remaining_time
 import logging
 import io
 import os
@@ -13,6 +19,16 @@ voices_bp = Blueprint('voices', __name__)
 # Initialize services
 tts_service = TTSService()
 
+# Text limits for preview samples and long-form renders
+SAMPLE_MAX_CHARS = 200
+LONG_FORM_MAX_CHARS = int(os.getenv('TTS_LONG_FORM_MAX_CHARS', 5000))
+
+# Background previews started after analysis (opt-in)
+speculator = SpeculativeSynthesizer(tts_service, sample_chars=SAMPLE_MAX_CHARS)
+
+# Chooses among equivalent voices on different providers (TTS_ROUTING_POLICY)
+router = ProviderRouter(tts_service)
+
 @voices_bp.route('/voices', methods=['POST'])
 def get_voice_recommendations():
     """
@@ -46,7 +62,38 @@ def get_voice_recommendations():
         logging.error(f"Error in get_voice_recommendations: {str(e)}")
         return jsonify({"error": "Failed to get voice recommendations"}), 500
 
+def _synthesis_plan(data):
+    """
+    Decide once per request how a synthesis request is served, so admission gates
+    the provider that will actually be called
+
+    Returns:
+        (voice_id to render, speculatively rendered audio or None)
+    """
+    if 'synthesis_plan' not in g:
+        voice_id = str(data.get('voice_id', ''))
+        audio_data = None
+        if voice_id and isinstance(data.get('text'), str):
+            # Previews may already have been rendered speculatively after analysis
+            if not data.get('long_form'):
+                with span('speculative'):
+                    audio_data = speculator.take(voice_id, data['text'][:SAMPLE_MAX_CHARS], data.get('settings', {}))
+            # Otherwise an equivalent voice on a faster or cheaper provider may serve the request
+            if audio_data is None:
+                voice_id = router.route(voice_id, data.get('routing'))
+        g.synthesis_plan = (voice_id, audio_data)
+    return g.synthesis_plan
+
+def _admission_class(data):
+    """Provider gate and priority of a synthesis request: previews are interactive, long-form is batch"""
+    voice_id, audio_data = _synthesis_plan(data)
+    # Speculative audio is already rendered and needs no provider
+    provider = tts_service.get_provider(voice_id) if voice_id and audio_data is None else None
+    return provider, BATCH if data.get('long_form') else INTERACTIVE
+
 @voices_bp.route('/generate-audio', methods=['POST'])
+@idempotent('generate_audio')
+@admitted('generate_audio', _admission_class)
 def generate_audio_sample():
     """
     Generate audio sample for a specific voice
@@ -57,11 +104,16 @@ def generate_audio_sample():
         if not data or 'voice_id' not in data or 'text' not in data:
             return jsonify({"error": "voice_id and text are required"}), 400
         
-        voice_id = data['voice_id']
-        text = data['text'][:200]  # Limit text length for samples
+        requested_voice_id = data['voice_id']
+        long_form = bool(data.get('long_form', False))
+        # Previews are limited to a short sample; long-form renders the full script
+        text = data['text'][:LONG_FORM_MAX_CHARS if long_form else SAMPLE_MAX_CHARS]
         settings = data.get('settings', {})
         
-        logging.info(f"Generating audio for voice_id: {voice_id}, text: {text[:50]}...")
+        logging.info(f"Generating audio for voice_id: {requested_voice_id}, text: {text[:50]}...")
+        
+        # Speculative audio, or the voice chosen by the router (decided before admission)
+        voice_id, audio_data = _synthesis_plan(data)
         
         # Check if this is an ElevenLabs voice
         if voice_id.startswith('elevenlabs_'):
@@ -77,40 +129,81 @@ def generate_audio_sample():
                 logging.error("Groq API key not found!")
                 return jsonify({"error": "Groq API key not configured"}), 500
         
+        # Determine the correct mimetype based on the voice provider
+        mimetype, file_ext = tts_service.get_audio_format(voice_id)
+        
+        # Long MP3 scripts are streamed chunk by chunk as soon as each is ready
+        if long_form and file_ext == 'mp3':
+            logging.info(f"Streaming long-form audio for {voice_id}, {len(text)} chars")
+            headers = {"Content-Disposition": f"inline; filename=long_{voice_id}.{file_ext}"}
+            if voice_id != requested_voice_id:
+                headers["X-Routed-From"] = requested_voice_id
+            # Predicted from the voice's measured rates, so players can size progress bars
+            estimate = tts_service.estimate_long_audio(voice_id, text)
+            if estimate is not None:
+                headers["X-Estimated-Duration"] = str(estimate['duration_seconds'])
+                headers["X-Estimated-Render-Seconds"] = str(estimate['render_seconds'])
+            return Response(
+                stream_with_context(tts_service.iter_long_audio(voice_id, text, settings)),
+                mimetype=mimetype,
+                headers=headers
+            )
+        
         # Generate audio using TTS service
-        audio_data = tts_service.generate_audio(
-            voice_id=voice_id,
-            text=text,
-            settings=settings
-        )
+        with span('tts'):
+            if long_form:
+                audio_data = tts_service.generate_long_audio(
+                    voice_id=voice_id,
+                    text=text,
+                    settings=settings
+                )
+            elif audio_data is None:
+                audio_data = tts_service.generate_audio(
+                    voice_id=voice_id,
+                    text=text,
+                    settings=settings
+                )
+                # A routed voice that fails falls back to the one that was asked for
+                if audio_data is None and voice_id != requested_voice_id:
+                    logging.warning(f"Routed voice {voice_id} failed, falling back to {requested_voice_id}")
+                    voice_id = requested_voice_id
+                    mimetype, file_ext = tts_service.get_audio_format(voice_id)
+                    # Admission only covered the routed voice's provider
+                    try:
+                        with admission([tts_service.get_provider(voice_id)],
+                                       wait=remaining_time(ADMISSION_MAX_WAIT_SECONDS)):
+                            audio_data = tts_service.generate_audio(
+                                voice_id=voice_id,
+                                text=text,
+                                settings=settings
+                            )
+                    except AdmissionRejected as e:
+                        logging.warning(f"Fallback to {voice_id} rejected: {str(e)}")
         
         if audio_data:
-            # Determine the correct mimetype based on the voice provider
-            if voice_id == 'Fritz-PlayAI' or voice_id.startswith('groq_'):
-                mimetype = 'audio/wav'   # Groq returns WAV
-                file_ext = 'wav'
-            elif voice_id.startswith('openai'):
-                mimetype = 'audio/mpeg'  # OpenAI returns MP3
-                file_ext = 'mp3'
-            elif voice_id.startswith('elevenlabs'):
-                mimetype = 'audio/mpeg'  # ElevenLabs returns MP3
-                file_ext = 'mp3'
-            else:
-                mimetype = 'audio/mpeg'  # Default to MP3
-                file_ext = 'mp3'
-            
             # Return audio file
-            audio_buffer = io.BytesIO(audio_data)
-            audio_buffer.seek(0)
-            
-            logging.info(f"Successfully generated audio for {voice_id}, size: {len(audio_data)} bytes, format: {mimetype}")
-            
-            return send_file(
-                audio_buffer,
-                mimetype=mimetype,
-                as_attachment=False,  # Allow inline playback
-                download_name=f'sample_{voice_id}.{file_ext}'
-            )
+            with span('send_file'):
+                audio_buffer = io.BytesIO(audio_data)
+                audio_buffer.seek(0)
+                
+                logging.info(f"Successfully generated audio for {voice_id}, size: {len(audio_data)} bytes, format: {mimetype}")
+                
+                response = send_file(
+                    audio_buffer,
+                    mimetype=mimetype,
+                    as_attachment=False,  # Allow inline playback
+                    download_name=f'sample_{voice_id}.{file_ext}'
+                )
+                if voice_id != requested_voice_id:
+                    response.headers['X-Routed-From'] = requested_voice_id
+                return response
+        elif deadline_passed():
+            # Provider work was abandoned; 499 (client closed request) is only seen in logs
+            if current_deadline().cancel_reason:
+                logging.info(f"Abandoned audio for {voice_id}: {current_deadline().cancel_reason}")
+                return jsonify({"error": "Request cancelled"}), 499
+            logging.error(f"Audio for {voice_id} not ready before the request deadline")
+            return jsonify({"error": "Audio generation timed out"}), 504
         else:
             logging.error(f"No audio data generated for {voice_id}")
             return jsonify({"error": "Failed to generate audio - no audio data returned"}), 500
@@ -0,0 +1,109 @@
+"""
+Endpoints for asynchronous synthesis and bulk analysis jobs
+"""
+from flask import Blueprint, request, jsonify, send_file
+from services.job_service import JobService, serialize_job, SUCCEEDED
+from routes.generate_text import get_llm_service
+from routes.generate_voices import tts_service
+import logging
+import io
+import os
+
+# Create blueprint
+jobs_bp = Blueprint('jobs', __name__)
+
+# Longest a status request may block when long-polling (keep under platform timeouts)
+MAX_WAIT_SECONDS = float(os.getenv('JOBS_MAX_WAIT_SECONDS', 25))
+
+# Initialize services lazily
+job_service = None
+
+def get_job_service():
+    global job_service
+    if job_service is None:
+        job_service = JobService(tts_service=tts_service, llm_factory=get_llm_service)
+    return job_service
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Create a synthesis or bulk-analysis job and return immediately
+    """
+    try:
+        data = request.get_json()
+
+        if not isinstance(data, dict) or 'type' not in data:
+            return jsonify({"error": "Job type is required"}), 400
+
+        job = get_job_service().submit(data['type'], data.get('payload') or {})
+
+        return jsonify({
+            "success": True,
+            "job": serialize_job(job),
+            "status_url": f"/api/jobs/{job['_id']}"
+        }), 202
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error in create_job: {str(e)}")
+        return jsonify({"error": "Failed to create job"}), 500
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Get job status; pass ?wait=<seconds> to long-poll until the job finishes
+    """
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_WAIT_SECONDS)
+
+        jobs = get_job_service()
+        if wait > 0:
+            job = jobs.wait(job_id, wait)
+        else:
+            job = jobs.get(job_id)
+
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        response = serialize_job(job)
+        if job['type'] == 'synthesis' and job['status'] == SUCCEEDED:
+            response['audio_url'] = f"/api/jobs/{job_id}/audio"
+
+        return jsonify({"success": True, "job": response})
+
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    except Exception as e:
+        logging.error(f"Error in get_job_status: {str(e)}")
+        return jsonify({"error": "Failed to get job status"}), 500
+
+@jobs_bp.route('/jobs/<job_id>/audio', methods=['GET'])
+def get_job_audio(job_id):
+    """
+    Download the audio produced by a finished synthesis job
+    """
+    try:
+        job = get_job_service().get(job_id)
+
+        if not job or job['type'] != 'synthesis':
+            return jsonify({"error": "Synthesis job not found"}), 404
+
+        if job['status'] != SUCCEEDED:
+            return jsonify({"error": f"Job is {job['status']}"}), 409
+
+        audio = get_job_service().get_audio(job_id)
+        if audio is None:
+            return jsonify({"error": "Job audio not found or expired"}), 404
+
+        result = job['result']
+        return send_file(
+            io.BytesIO(audio),
+            mimetype=result['mimetype'],
+            as_attachment=False,
+            download_name=f"job_{job_id}.{result['file_ext']}"
+        )
+
+    except Exception as e:
+        logging.error(f"Error in get_job_audio: {str(e)}")
+        return jsonify({"error": "Failed to get job audio"}), 500
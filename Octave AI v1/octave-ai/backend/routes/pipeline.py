@@ -0,0 +1,170 @@
+"""
+Pipelined script generation and synthesis: LLM tokens -> sentences -> TTS
+"""
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
+from routes.generate_text import get_llm_service
+from routes.generate_voices import tts_service
+from services.tts_service import SynthesisIncomplete
+from services.idempotency import idempotent
+from services.admission import admitted, BATCH
+from utils.meta_prompt import generate_meta_prompt
+from utils.text_chunker import iter_sentences
+from utils.audio_concat import concat_audio, strip_mp3_tags
+from utils.timing import span
+from collections import OrderedDict
+import threading
+import logging
+import uuid
+import io
+
+# Create blueprint
+pipeline_bp = Blueprint('pipeline', __name__)
+
+# Scripts of recent pipelined requests, so clients can show the text that was spoken
+MAX_RECENT_PIPELINES = 500
+_recent_pipelines = OrderedDict()
+_recent_lock = threading.Lock()
+
+def _remember(pipeline_id: str, record):
+    with _recent_lock:
+        _recent_pipelines[pipeline_id] = record
+        _recent_pipelines.move_to_end(pipeline_id)
+        while len(_recent_pipelines) > MAX_RECENT_PIPELINES:
+            _recent_pipelines.popitem(last=False)
+
+def _admission_class(data):
+    """A pipelined request calls the LLM and the voice's TTS provider, as batch work like long-form renders"""
+    voice_id = data.get('voice_id') if isinstance(data, dict) else None
+    providers = ['llm', tts_service.get_provider(voice_id)] if isinstance(voice_id, str) and voice_id else ['llm']
+    return providers, BATCH
+
+@pipeline_bp.route('/analyze-and-synthesize', methods=['POST'])
+@idempotent('analyze_and_synthesize')
+@admitted('pipeline', _admission_class)
+def analyze_and_synthesize():
+    """
+    Generate a script and stream its audio while the script is still being written.
+
+    Sentences are cut from the streaming LLM response and synthesized as soon as
+    they are complete; audio is returned in script order. MP3 voices stream;
+    WAV voices are returned as one file once all sentences are rendered.
+    Voices whose provider is not configured are spoken by the free fallback once
+    the whole script is written; a sentence that falls back for a configured
+    provider fails the request rather than mixing voices.
+    The script is available afterwards from /api/analyze-and-synthesize/<pipeline_id>.
+    """
+    try:
+        data = request.get_json()
+
+        if not isinstance(data, dict) or 'description' not in data or 'voice_id' not in data:
+            return jsonify({"error": "description and voice_id are required"}), 400
+
+        description = data['description'].strip()
+        voice_id = data['voice_id']
+        settings = data.get('settings', {})
+
+        if len(description) < 10:
+            return jsonify({"error": "Description too short"}), 400
+
+        with span('meta_prompt'):
+            meta_prompt = generate_meta_prompt(
+                description,
+                user_tone=data.get('tone', ''),
+                use_case=data.get('use_case', '')
+            )
+
+        pipeline_id = uuid.uuid4().hex
+        record = {"status": "running", "script": "", "meta_prompt": meta_prompt, "voice_id": voice_id}
+        _remember(pipeline_id, record)
+
+        llm = get_llm_service()
+        script_parts = []
+
+        def script_tokens():
+            for token in llm.stream_script(description, meta_prompt):
+                script_parts.append(token)
+                yield token
+            record["script"] = ''.join(script_parts).strip()
+
+        mimetype, file_ext = tts_service.get_audio_format(voice_id)
+        headers = {"X-Pipeline-Id": pipeline_id}
+
+        if not tts_service.is_provider_configured(tts_service.get_provider(voice_id)):
+            # Every sentence would come from the free fallback; speak the finished script with it in one piece
+            with span('llm'):
+                for _ in script_tokens():
+                    pass
+            with span('tts'):
+                audio_data = tts_service.generate_audio(voice_id, record["script"], settings) if record["script"] else None
+            if not audio_data:
+                record["status"] = "failed"
+                return jsonify({"error": "Failed to generate audio", "pipeline_id": pipeline_id}), 500
+            record["status"] = "completed"
+            response = send_file(
+                io.BytesIO(audio_data),
+                mimetype=mimetype,
+                as_attachment=False,
+                download_name=f'script_{voice_id}.{file_ext}'
+            )
+            response.headers.update(headers)
+            return response
+
+        sentences = iter_sentences(script_tokens(), max_chars=tts_service.long_form_chunk_chars)
+        clips = tts_service.render_chunks(voice_id, sentences, settings)
+
+        if file_ext != 'mp3':
+            # WAV needs the total length in its header, so render everything first
+            with span('tts'):
+                rendered = list(clips)
+            record["script"] = ''.join(script_parts).strip()
+            # Fallback audio is another voice and format; it is never spliced into the voice's clips
+            if not rendered or any(clip is None or fallback for clip, fallback in rendered):
+                record["status"] = "failed"
+                return jsonify({"error": "Failed to generate audio", "pipeline_id": pipeline_id}), 500
+            record["status"] = "completed"
+            response = send_file(
+                io.BytesIO(concat_audio([clip for clip, _ in rendered], file_ext)),
+                mimetype=mimetype,
+                as_attachment=False,
+                download_name=f'script_{voice_id}.{file_ext}'
+            )
+            response.headers.update(headers)
+            return response
+
+        def stream_audio():
+            # A failed sentence aborts the response, so it is not mistaken for (or stored as) a complete one
+            for index, (clip, fallback) in enumerate(clips):
+                if clip is None or fallback:
+                    record["status"] = "failed"
+                    problem = "returned no audio" if clip is None else "fell back to free TTS"
+                    raise SynthesisIncomplete(f"pipeline {pipeline_id}: sentence {index} {problem}")
+                yield clip if index == 0 else strip_mp3_tags(clip)
+            record["status"] = "completed"
+
+        logging.info(f"Streaming pipelined script audio {pipeline_id} for {voice_id}")
+        headers["Content-Disposition"] = f"inline; filename=script_{voice_id}.{file_ext}"
+        return Response(stream_with_context(stream_audio()), mimetype=mimetype, headers=headers)
+
+    except Exception as e:
+        logging.error(f"Error in analyze_and_synthesize: {str(e)}")
+        return jsonify({"error": "Failed to generate and synthesize script"}), 500
+
+@pipeline_bp.route('/analyze-and-synthesize/<pipeline_id>', methods=['GET'])
+def get_pipeline_script(pipeline_id):
+    """
+    Get the script produced by a pipelined request
+    """
+    with _recent_lock:
+        record = _recent_pipelines.get(pipeline_id)
+
+    if record is None:
+        return jsonify({"error": "Pipeline not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "pipeline_id": pipeline_id,
+        "status": record["status"],
+        "generated_script": record["script"],
+        "meta_prompt": record["meta_prompt"],
+        "voice_id": record["voice_id"]
+    })
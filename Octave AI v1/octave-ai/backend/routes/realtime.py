@@ -0,0 +1,115 @@
+"""
+WebSocket endpoint for real-time TTS (voice agents)
+
+Needs flask-sock; without it the endpoint is not registered.
+"""
+from flask import Blueprint
+from routes.generate_voices import tts_service
+from services.realtime_tts import RealtimeTTSSession
+from utils.deadline import remaining_time
+import threading
+import logging
+import json
+import os
+
+# Import flask-sock if available
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+    logging.warning("flask-sock not installed, /api/tts-stream is disabled")
+
+# Create blueprint
+realtime_bp = Blueprint('realtime', __name__)
+
+# Seconds without a client message before the session is ended
+IDLE_TIMEOUT_SECONDS = float(os.getenv('REALTIME_TTS_IDLE_TIMEOUT_SECONDS', 30))
+# Longest text accepted in one message
+MAX_MESSAGE_CHARS = int(os.getenv('REALTIME_TTS_MAX_MESSAGE_CHARS', 2000))
+
+def _event(kind: str, **fields) -> str:
+    return json.dumps({"type": kind, **fields})
+
+def _parse(message) -> dict:
+    """A client message as a dict, or {} if it is not a JSON object"""
+    if not isinstance(message, str):
+        return {}
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def tts_stream(ws):
+    """
+    Real-time TTS over a WebSocket: push text incrementally, receive audio continuously
+
+    Client messages (JSON text frames):
+        {"type": "start", "voice_id": "...", "settings": {...}}   first message
+        {"type": "text", "text": "..."}                           any number of pieces
+        {"type": "flush"}                                         synthesize the unfinished sentence now
+        {"type": "end"}                                           no more text
+    Server messages:
+        {"type": "ready", "voice_id", "format", "mimetype"}
+        {"type": "audio", "index", "text"}, binary audio frames, {"type": "audio_end", "index", "bytes", "duration_seconds"}
+        {"type": "error", "error", "index"?}
+        {"type": "done", "stats": {...}}                          after "end", then the socket closes
+    Each sentence's audio is a complete clip in the voice's format.
+    """
+    send_lock = threading.Lock()
+
+    def send(message):
+        # Audio is sent from the session's thread, errors from this one
+        with send_lock:
+            ws.send(message)
+
+    start = _parse(ws.receive(timeout=IDLE_TIMEOUT_SECONDS))
+    if start.get('type') != 'start' or not start.get('voice_id'):
+        send(_event('error', error='First message must be {"type": "start", "voice_id": ...}'))
+        return
+
+    voice_id = start['voice_id']
+    mimetype, file_ext = tts_service.get_audio_format(voice_id)
+    session = RealtimeTTSSession(tts_service, voice_id, start.get('settings') or {}, send)
+    send(_event('ready', voice_id=voice_id, format=file_ext, mimetype=mimetype))
+    session.start()
+    logging.info(f"Real-time TTS session started for {voice_id}")
+
+    finished = False
+    try:
+        while True:
+            message = ws.receive(timeout=remaining_time(IDLE_TIMEOUT_SECONDS))
+            if message is None:
+                # Idle for too long or out of session time: finish what was sent
+                send(_event('error', error='Session idle or out of time, ending'))
+                break
+
+            data = _parse(message)
+            kind = data.get('type')
+            if kind == 'text':
+                text = data.get('text')
+                if not isinstance(text, str):
+                    send(_event('error', error='text must be a string'))
+                elif len(text) > MAX_MESSAGE_CHARS:
+                    send(_event('error', error=f'Text messages are limited to {MAX_MESSAGE_CHARS} characters'))
+                elif not session.push(text):
+                    # Sending audio failed; the client is gone
+                    return
+            elif kind == 'flush':
+                session.flush()
+            elif kind == 'end':
+                break
+            else:
+                send(_event('error', error=f'Unknown message type: {kind}'))
+
+        stats = session.finish()
+        finished = True
+        logging.info(f"Real-time TTS session for {voice_id} done: {stats}")
+        send(_event('done', stats=stats))
+    finally:
+        if not finished:
+            session.cancel('client disconnected')
+
+if Sock is not None:
+    sock = Sock()
+    sock.route('/tts-stream', bp=realtime_bp)(tts_stream)
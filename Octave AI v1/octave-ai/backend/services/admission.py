@@ -0,0 +1,283 @@
+"""
+Admission control (load shedding) for synthesis and analysis routes
+
+Each route and each provider has a gate that lets a bounded number of requests
+run at once (ADMISSION_MAX_IN_FLIGHT_<GATE>). Requests beyond that wait in a
+short queue (ADMISSION_MAX_QUEUE_<GATE>, ADMISSION_MAX_WAIT_SECONDS); when the
+queue is full or the wait runs out they are rejected right away with 503 and
+Retry-After, so admitted requests keep their latency instead of everyone
+timing out together.
+
+Interactive requests (previews, analysis) are admitted before batch work
+(long-form renders, background jobs), and batch work may only hold
+ADMISSION_BATCH_SHARE of a gate's slots; waiting batch work neither counts
+against the queue of interactive requests nor holds them back from a free slot.
+Background jobs wait for a slot instead of being rejected.
+"""
+import os
+import math
+import time
+import heapq
+import logging
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional
+
+from flask import request, jsonify, make_response
+from werkzeug.wsgi import ClosingIterator
+
+from utils.deadline import remaining_time
+from utils import metrics
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BATCH: 'batch'}
+
+# Requests running at once per gate: routes, then the providers they call ('llm' for text generation)
+DEFAULT_MAX_IN_FLIGHT = {
+    'generate_audio': 16,
+    'analyze': 8,
+    'pipeline': 8,
+    'elevenlabs': 8,
+    'openai': 8,
+    'groq': 4,
+    'azure': 8,
+    'free': 4,
+    'llm': 8
+}
+
+ENABLED = os.getenv('ADMISSION_CONTROL', 'true').lower() != 'false'
+
+# Longest time a request waits in a gate's queue (also capped by its deadline)
+MAX_WAIT_SECONDS = float(os.getenv('ADMISSION_MAX_WAIT_SECONDS', 2))
+
+# Bounds for the Retry-After hint, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 30
+
+class AdmissionRejected(Exception):
+    """Raised when a gate is full; the request should be answered with 503"""
+
+    def __init__(self, gate: str, retry_after: int):
+        super().__init__(f"{gate}: at capacity")
+        self.gate = gate
+        self.retry_after = retry_after
+
+class AdmissionGate:
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, batch_share: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.batch_limit = max(1, int(max_in_flight * batch_share))
+
+        self.in_flight = 0
+        self.batch_in_flight = 0
+        self.rejected = 0
+        # Smoothed time a request holds a slot, for Retry-After
+        self.service_seconds: Optional[float] = None
+
+        self._waiting = []  # heap of (priority, arrival)
+        # Waiters counted against max_queue, per priority
+        self._queued = {INTERACTIVE: 0, BATCH: 0}
+        self._arrivals = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: int, wait: Optional[float]) -> bool:
+        """
+        Take a slot, waiting behind earlier and higher-priority requests
+
+        Args:
+            priority: INTERACTIVE or BATCH
+            wait: Seconds to wait in the queue, or None to wait as long as needed
+                (background work, not counted against max_queue)
+
+        Returns:
+            False if the queue was full or no slot freed up in time
+        """
+        with self._condition:
+            # Lower-priority waiters (batch work held back by its share) do not keep a free slot from us
+            if self._has_slot(priority) and not (self._waiting and self._waiting[0][0] <= priority):
+                self._admit(priority)
+                return True
+            if wait is not None and (wait <= 0 or self._waiting_ahead(priority) >= self.max_queue):
+                self.rejected += 1
+                return False
+
+            entry = (priority, next(self._arrivals))
+            heapq.heappush(self._waiting, entry)
+            if wait is not None:
+                self._queued[priority] += 1
+            give_up_at = None if wait is None else time.monotonic() + wait
+            try:
+                while not (self._waiting[0] == entry and self._has_slot(priority)):
+                    remaining = None if give_up_at is None else give_up_at - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._condition.wait(remaining)
+                heapq.heappop(self._waiting)
+                self._admit(priority)
+                return True
+            finally:
+                if wait is not None:
+                    self._queued[priority] -= 1
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                # The next waiter may be able to run now
+                self._condition.notify_all()
+
+    def _waiting_ahead(self, priority: int) -> int:
+        """Queued requests that would be admitted before one of this priority"""
+        return sum(count for waiting_priority, count in self._queued.items() if waiting_priority <= priority)
+
+    def _has_slot(self, priority: int) -> bool:
+        if self.in_flight >= self.max_in_flight:
+            return False
+        return priority == INTERACTIVE or self.batch_in_flight < self.batch_limit
+
+    def _admit(self, priority: int):
+        self.in_flight += 1
+        if priority == BATCH:
+            self.batch_in_flight += 1
+
+    def release(self, priority: int, held_seconds: Optional[float]):
+        """Free a slot; held_seconds is None for a slot that did no work (left out of Retry-After)"""
+        with self._condition:
+            self.in_flight -= 1
+            if priority == BATCH:
+                self.batch_in_flight -= 1
+            if held_seconds is not None:
+                self.service_seconds = held_seconds if self.service_seconds is None \
+                    else 0.8 * self.service_seconds + 0.2 * held_seconds
+            self._condition.notify_all()
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead would likely have drained"""
+        with self._condition:
+            seconds = (self.service_seconds or 1.0) * (sum(self._queued.values()) + 1) / self.max_in_flight
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(seconds)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "batch_in_flight": self.batch_in_flight,
+                "queued": len(self._waiting),
+                "rejected": self.rejected,
+                "service_seconds": round(self.service_seconds, 3) if self.service_seconds is not None else None
+            }
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+def get_gate(name: str) -> AdmissionGate:
+    """Get (creating on first use) the shared gate for a route or provider"""
+    with _gates_lock:
+        gate = _gates.get(name)
+        if gate is None:
+            prefix = name.upper()
+            max_in_flight = int(os.getenv(f'ADMISSION_MAX_IN_FLIGHT_{prefix}', DEFAULT_MAX_IN_FLIGHT.get(name, 8)))
+            gate = AdmissionGate(
+                name=name,
+                max_in_flight=max_in_flight,
+                max_queue=int(os.getenv(f'ADMISSION_MAX_QUEUE_{prefix}', max(1, max_in_flight // 2))),
+                batch_share=float(os.getenv('ADMISSION_BATCH_SHARE', 0.5))
+            )
+            _gates[name] = gate
+        return gate
+
+def get_admission_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every gate created so far"""
+    with _gates_lock:
+        return {name: gate.stats() for name, gate in _gates.items()}
+
+@contextmanager
+def admission(gate_names: List[str], priority: int = INTERACTIVE, wait: Optional[float] = None):
+    """
+    Hold a slot in each named gate for the duration of the block
+
+    Usage:
+        with admission(['analyze', 'llm'], wait=remaining_time(MAX_WAIT_SECONDS)):
+            ...
+
+    Raises:
+        AdmissionRejected: If a gate is full (never when wait is None)
+    """
+    if not ENABLED:
+        yield
+        return
+
+    release = _acquire_all(gate_names, priority, wait)
+    try:
+        yield
+    finally:
+        release()
+
+def _acquire_all(gate_names: List[str], priority: int, wait: Optional[float]) -> Callable[[], None]:
+    """Acquire the gates in order, returning a function that releases them all"""
+    started = time.monotonic()
+    held = []
+    for name in gate_names:
+        gate = get_gate(name)
+        budget = None if wait is None else max(0.0, wait - (time.monotonic() - started))
+        if not gate.acquire(priority, budget):
+            for admitted in held:
+                admitted.release(priority, None)
+            metrics.ADMISSIONS.labels(gate=name, priority=PRIORITY_NAMES[priority], outcome='rejected').inc()
+            raise AdmissionRejected(name, gate.retry_after())
+        held.append(gate)
+
+    waited = time.monotonic() - started
+    for gate in held:
+        metrics.ADMISSIONS.labels(gate=gate.name, priority=PRIORITY_NAMES[priority], outcome='admitted').inc()
+    metrics.ADMISSION_WAIT.labels(priority=PRIORITY_NAMES[priority]).observe(waited)
+
+    def release():
+        held_seconds = time.monotonic() - started - waited
+        for gate in held:
+            gate.release(priority, held_seconds)
+    return release
+
+def admitted(gate: str, classify: Callable[[Dict[str, Any]], tuple]):
+    """
+    Route decorator applying admission control
+
+    Args:
+        gate: Route gate name
+        classify: Maps the JSON body to (provider gate name, list of them or None, INTERACTIVE or BATCH)
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return view(*args, **kwargs)
+
+            providers, priority = classify(request.get_json(silent=True) or {})
+            gate_names = [gate] + ([providers] if isinstance(providers, str) else list(providers or []))
+            try:
+                release = _acquire_all(gate_names, priority, remaining_time(MAX_WAIT_SECONDS))
+            except AdmissionRejected as e:
+                logging.warning(f"Rejected {request.path}: {str(e)}, retry after {e.retry_after}s")
+                response = jsonify({"error": "Server is busy, please retry", "retry_after": e.retry_after})
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 503
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                release()
+                raise
+            # Streamed bodies (long-form audio, files) keep their slots until the server closes
+            # the body, which it does whether it was sent, abandoned or never started. Not
+            # call_on_close: send_file bodies are passed through without the response's close
+            if response.is_streamed:
+                response.response = ClosingIterator(response.response, release)
+            else:
+                release()
+            return response
+        return wrapper
+    return decorator
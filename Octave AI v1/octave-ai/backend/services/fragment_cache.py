@@ -0,0 +1,78 @@
+"""
+Cache of synthesized sentences, so clips can be assembled from reused sentences
+
+Generated scripts share many sentences ("How can I help you today?") even when
+the scripts as a whole differ. With TTS_FRAGMENT_CACHE=true, TTSService renders
+text sentence by sentence under keys of voice, settings and normalized
+sentence, and only sends sentences it has not rendered before to the provider.
+Fragments are kept in an in-process LRU bounded by bytes, in front of the
+shared MongoDB cache collection when MONGODB_URI is set.
+"""
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from utils.metrics import record_cache_lookup
+
+class AudioFragmentCache:
+    def __init__(self, db=None):
+        """
+        Args:
+            db: Connected MongoDBService for the shared level, or None for memory only
+        """
+        self.db = db if db is not None and db.connected else None
+        self.enabled = os.getenv('TTS_FRAGMENT_CACHE', 'false').lower() == 'true'
+        self.ttl = float(os.getenv('TTS_FRAGMENT_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+        self.max_bytes = int(os.getenv('TTS_FRAGMENT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def key(self, voice_id: str, settings: Dict[str, Any], sentence: str) -> str:
+        """Cache key of one sentence; whitespace differences do not matter, case does"""
+        return "tts_fragment:" + json.dumps(
+            {"voice_id": voice_id, "settings": settings or {}, "text": re.sub(r'\s+', ' ', sentence).strip()},
+            sort_keys=True, ensure_ascii=False
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup('tts_fragment', audio is not None)
+        if audio is not None or self.db is None:
+            return audio
+
+        audio = self.db.cache_get(key)
+        record_cache_lookup('tts_fragment_shared', audio is not None)
+        if audio is not None:
+            self._store_local(key, audio)
+        return audio
+
+    def set(self, key: str, audio: bytes):
+        self._store_local(key, audio)
+        if self.db is not None:
+            self.db.cache_set(key, audio, self.ttl)
+
+    def _store_local(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = audio
+            self._bytes += len(audio)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "fragments": len(self._entries),
+                    "bytes": self._bytes, "shared": self.db is not None}
@@ -0,0 +1,255 @@
+"""
+Idempotency-Key support for paid routes (synthesis and analysis)
+
+The first request with a key runs and its response (status, headers, body) is
+kept for IDEMPOTENCY_TTL_SECONDS. Retries with the same key wait for the
+in-flight request or replay the stored response instead of calling a provider
+again. Keys are shared across instances through the MongoDB `idempotency`
+collection when it is configured; in-process memory is used otherwise and as
+a first level in front of MongoDB.
+"""
+import os
+import time
+import hashlib
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from flask import request, jsonify, make_response, Response
+from werkzeug.wsgi import ClosingIterator
+
+from services.mongodb_service import MongoDBService, get_mongodb_service
+from utils.deadline import remaining_time, deadline_passed
+from utils import metrics
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Recomputed for every response, never replayed
+SKIPPED_HEADERS = ('Content-Length', 'Server-Timing', 'Timing-Allow-Origin')
+
+# Seconds between checks of a key held by another instance
+POLL_INTERVAL_SECONDS = 0.25
+
+class IdempotencyStore:
+    def __init__(self, db: Optional[MongoDBService] = None):
+        """
+        Args:
+            db: Connected MongoDBService to share keys across instances, or None for memory only
+        """
+        self.db = db if db is not None and db.connected else None
+        self.ttl = float(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+        self.lock_seconds = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 120))
+        self.wait_seconds = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 30))
+        self.max_body_bytes = int(os.getenv('IDEMPOTENCY_MAX_BODY_BYTES', 8 * 1024 * 1024))
+        self.max_memory_bytes = int(os.getenv('IDEMPOTENCY_MAX_MEMORY_BYTES', 64 * 1024 * 1024))
+
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._done: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (expires_at, fingerprint, response)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Decide what to do with a request carrying an idempotency key
+
+        Returns:
+            ('run', None) when this request should execute and then call complete/release,
+            ('replay', response) for a finished duplicate, ('mismatch', None) when the key
+            was used with a different body, or ('in_progress', None) when the first
+            request is still running after the wait
+        """
+        give_up_at = time.monotonic() + remaining_time(self.wait_seconds)
+        while True:
+            with self._lock:
+                done = self._get_done(key)
+                event = self._in_flight.get(key) if done is None else None
+                if done is None and event is None:
+                    # Local duplicates wait on this event while the shared store is consulted
+                    self._in_flight[key] = threading.Event()
+            if done is not None:
+                return ('replay', done[1]) if done[0] == fingerprint else ('mismatch', None)
+            if event is None:
+                break
+            if not event.wait(max(0.0, give_up_at - time.monotonic())):
+                return 'in_progress', None
+
+        if self.db is None:
+            return 'run', None
+
+        outcome = ('in_progress', None)
+        try:
+            outcome = self._begin_shared(key, fingerprint, give_up_at)
+            return outcome
+        finally:
+            # Unless this request runs, wake local waiters to re-check
+            if outcome[0] != 'run':
+                self._finish_local(key)
+
+    def _begin_shared(self, key: str, fingerprint: str, give_up_at: float) -> Tuple[str, Optional[Dict[str, Any]]]:
+        while True:
+            record = self.db.idempotency_claim(key, fingerprint, self.lock_seconds)
+            if record is None:
+                return 'run', None
+            if record.get('fingerprint') != fingerprint:
+                return 'mismatch', None
+            if record.get('state') == 'done':
+                self._store_done(key, fingerprint, record['response'])
+                return 'replay', record['response']
+            if time.monotonic() + POLL_INTERVAL_SECONDS > give_up_at:
+                return 'in_progress', None
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+    def complete(self, key: str, fingerprint: str, response: Dict[str, Any]):
+        """Keep the response of a request that ran, for replay to duplicates"""
+        if len(response['body']) > self.max_body_bytes:
+            logging.warning(f"Idempotent response of {len(response['body'])} bytes exceeds "
+                            f"IDEMPOTENCY_MAX_BODY_BYTES, duplicates will run again")
+            self.release(key)
+            return
+        self._store_done(key, fingerprint, response)
+        if self.db is not None:
+            self.db.idempotency_complete(key, response, self.ttl)
+        self._finish_local(key)
+
+    def release(self, key: str):
+        """Forget a request that failed, so a retry runs it again"""
+        if self.db is not None:
+            self.db.idempotency_release(key)
+        self._finish_local(key)
+
+    def _finish_local(self, key: str):
+        with self._lock:
+            event = self._in_flight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def _get_done(self, key: str) -> Optional[tuple]:
+        """(fingerprint, response) for a finished key (lock held)"""
+        entry = self._done.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._evict(key)
+            return None
+        return entry[1], entry[2]
+
+    def _store_done(self, key: str, fingerprint: str, response: Dict[str, Any]):
+        with self._lock:
+            if key in self._done:
+                self._evict(key)
+            self._done[key] = (time.monotonic() + self.ttl, fingerprint, response)
+            self._memory_bytes += len(response['body'])
+            while self._memory_bytes > self.max_memory_bytes and len(self._done) > 1:
+                self._evict(next(iter(self._done)))
+
+    def _evict(self, key: str):
+        _, _, response = self._done.pop(key)
+        self._memory_bytes -= len(response['body'])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._in_flight), "stored": len(self._done),
+                    "stored_bytes": self._memory_bytes, "shared": self.db is not None}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IdempotencyStore(get_mongodb_service())
+        return _store
+
+def _replay(response: Dict[str, Any]) -> Response:
+    replayed = Response(response['body'], status=response['status'], headers=response['headers'])
+    replayed.headers['Idempotent-Replayed'] = 'true'
+    return replayed
+
+def _snapshot(response: Response, body: bytes) -> Dict[str, Any]:
+    headers = [[name, value] for name, value in response.headers.items() if name not in SKIPPED_HEADERS]
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+def idempotent(scope: str):
+    """
+    Route decorator honoring the Idempotency-Key header
+
+    Args:
+        scope: Name separating keys of different routes
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            client_key = request.headers.get(HEADER)
+            if not client_key:
+                return view(*args, **kwargs)
+            if len(client_key) > MAX_KEY_LENGTH:
+                return jsonify({"error": f"{HEADER} longer than {MAX_KEY_LENGTH} characters"}), 400
+
+            store = get_idempotency_store()
+            key = hashlib.sha256(f"{scope}:{client_key}".encode('utf-8')).hexdigest()
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+            outcome, stored = store.begin(key, fingerprint)
+            metrics.IDEMPOTENT_REQUESTS.labels(scope=scope, outcome=outcome).inc()
+            if outcome == 'replay':
+                return _replay(stored)
+            if outcome == 'mismatch':
+                return jsonify({"error": f"{HEADER} was already used with a different request body"}), 422
+            if outcome == 'in_progress':
+                response = jsonify({"error": "A request with this Idempotency-Key is still in progress"})
+                response.headers['Retry-After'] = '1'
+                return response, 409
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                store.release(key)
+                raise
+
+            # Server errors and abandoned requests are not replayed; the client's retry should run again
+            if response.status_code >= 500 or deadline_passed():
+                store.release(key)
+                return response
+
+            if response.is_streamed and not response.direct_passthrough:
+                response.response = _recording(store, key, fingerprint, response, response.response)
+            else:
+                # Files from send_file are buffered so they can be stored
+                response.direct_passthrough = False
+                store.complete(key, fingerprint, _snapshot(response, response.get_data()))
+            return response
+        return wrapper
+    return decorator
+
+def _recording(store: IdempotencyStore, key: str, fingerprint: str, response: Response, body_chunks) -> ClosingIterator:
+    """
+    Pass a streamed body through and store it once it was sent completely.
+    Closing it closes the wrapped body (and whatever it holds, such as admission
+    slots) and frees the key if the body did not finish, even if it never started.
+    """
+    chunks = []
+    settled = []
+
+    def record():
+        try:
+            for chunk in body_chunks:
+                chunks.append(chunk)
+                yield chunk
+        except Exception:
+            release_unfinished()
+            raise
+        body = b''.join(chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks)
+        settled.append(True)
+        store.complete(key, fingerprint, _snapshot(response, body))
+
+    def release_unfinished():
+        if not settled:
+            settled.append(True)
+            store.release(key)
+
+    close = getattr(body_chunks, 'close', None)
+    return ClosingIterator(record(), [close, release_unfinished] if close is not None else release_unfinished)
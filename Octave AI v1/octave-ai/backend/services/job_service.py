@@ -0,0 +1,249 @@
+"""
+Background job processing for long synthesis and bulk analysis requests
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+from services.mongodb_service import MongoDBService, get_mongodb_service
+from services.admission import admission, BATCH
+from utils.meta_prompt import generate_meta_prompt
+from utils.audio_duration import audio_duration
+
+JOB_TYPES = ('synthesis', 'analysis')
+
+# Job lifecycle states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+# Interval used to re-read job state when the job runs on another instance
+POLL_INTERVAL_SECONDS = 0.5
+
+class JobService:
+    def __init__(self, tts_service, llm_factory: Callable, db: Optional[MongoDBService] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            tts_service: TTSService used for synthesis jobs
+            llm_factory: Callable returning the LLMService used for analysis jobs
+            db: Job store; defaults to MongoDB, or memory when MongoDB is unavailable
+            max_workers: Size of the worker pool (JOBS_MAX_WORKERS, default 4)
+        """
+        self.tts_service = tts_service
+        self.llm_factory = llm_factory
+
+        if db is None:
+            db = get_mongodb_service()
+            if db is None or not db.connected:
+                logging.warning("MongoDB unavailable, keeping job state in memory")
+                db = MongoDBService(in_memory=True)
+        self.db = db
+
+        self.max_batch = int(os.getenv('JOBS_MAX_BATCH', 100))
+        self.max_text_chars = int(os.getenv('JOBS_MAX_TEXT_CHARS', 20000))
+        # Jobs and their audio are removed this long after they were queued or finished
+        self.ttl = float(os.getenv('JOBS_TTL_SECONDS', 24 * 3600))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv('JOBS_MAX_WORKERS', 4)),
+            thread_name_prefix='job-worker'
+        )
+
+        # Completion events for jobs running in this process (used for long-polling)
+        self._events = {}
+        self._events_lock = threading.Lock()
+
+    def submit(self, job_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate and enqueue a job
+
+        Returns:
+            The stored job document (without result)
+
+        Raises:
+            ValueError: If the job type or payload is invalid
+            RuntimeError: If the job could not be stored
+        """
+        self._validate(job_type, payload)
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "_id": job_id,
+            "type": job_type,
+            "status": QUEUED,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "progress": {"completed": 0, "total": self._count_items(job_type, payload)},
+            "expires_at": self._expires_at()
+        }
+        if job_type == 'synthesis':
+            # Expected render time and audio length from the voice's measured rates (None until measured)
+            job["estimate"] = self.tts_service.estimate_long_audio(payload['voice_id'], payload['text'])
+
+        if not self.db.create_job(job):
+            raise RuntimeError("Failed to store job")
+
+        with self._events_lock:
+            self._events[job_id] = threading.Event()
+
+        self._executor.submit(self._run, job_id, job_type, payload)
+        logging.info(f"Queued {job_type} job {job_id}")
+
+        return self.db.get_job(job_id, include_result=False)
+
+    def _expires_at(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    def get_audio(self, job_id: str) -> Optional[bytes]:
+        """Audio of a finished synthesis job (stored apart from the job document)"""
+        return self.db.get_job_audio(job_id)
+
+    def get(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """Get the current state of a job"""
+        return self.db.get_job(job_id, include_result=include_result)
+
+    def wait(self, job_id: str, timeout: float, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Long-poll: block until the job finishes or timeout seconds pass,
+        then return its current state
+        """
+        with self._events_lock:
+            event = self._events.get(job_id)
+
+        if event is not None:
+            event.wait(timeout)
+            return self.get(job_id, include_result)
+
+        # Job belongs to another instance (or an earlier process); poll the store
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id, include_result=False)
+            if job is None or job['status'] in FINISHED_STATES or time.monotonic() >= deadline:
+                break
+            time.sleep(min(POLL_INTERVAL_SECONDS, max(0.0, deadline - time.monotonic())))
+
+        return self.get(job_id, include_result) if include_result and job else job
+
+    def _validate(self, job_type: str, payload: Dict[str, Any]):
+        """Reject unknown job types and malformed payloads"""
+        if not isinstance(job_type, str) or job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type '{job_type}', expected one of {', '.join(JOB_TYPES)}")
+        if not isinstance(payload, dict):
+            raise ValueError("payload must be an object")
+
+        if job_type == 'synthesis':
+            if not isinstance(payload.get('voice_id'), str) or not isinstance(payload.get('text'), str):
+                raise ValueError("voice_id and text are required strings")
+            if not payload['voice_id'] or not payload['text'].strip():
+                raise ValueError("voice_id and text are required")
+            if not isinstance(payload.get('settings', {}), dict):
+                raise ValueError("settings must be an object")
+            if len(payload['text']) > self.max_text_chars:
+                raise ValueError(f"Text longer than {self.max_text_chars} characters")
+        else:
+            descriptions = payload.get('descriptions')
+            if not isinstance(descriptions, list) or not descriptions:
+                raise ValueError("descriptions must be a non-empty list")
+            if len(descriptions) > self.max_batch:
+                raise ValueError(f"At most {self.max_batch} descriptions per job")
+            if any(not isinstance(d, str) or len(d.strip()) < 10 for d in descriptions):
+                raise ValueError("Every description must be at least 10 characters")
+
+    def _count_items(self, job_type: str, payload: Dict[str, Any]) -> int:
+        if job_type == 'analysis':
+            return len(payload['descriptions'])
+        return 1
+
+    def _run(self, job_id: str, job_type: str, payload: Dict[str, Any]):
+        """Worker entry point: execute a job and record its outcome"""
+        # Jobs wait (still queued) for a provider slot behind interactive requests
+        provider = self.tts_service.get_provider(payload['voice_id']) if job_type == 'synthesis' else 'llm'
+        try:
+            with admission([provider], BATCH):
+                if not self.db.update_job(job_id, {"status": RUNNING}):
+                    raise RuntimeError("Failed to update job state")
+                if job_type == 'synthesis':
+                    result = self._run_synthesis(job_id, payload)
+                else:
+                    result = self._run_analysis(job_id, payload)
+            if not self.db.update_job(job_id, {"status": SUCCEEDED, "result": result,
+                                               "progress.completed": self._count_items(job_type, payload),
+                                               "expires_at": self._expires_at()}):
+                raise RuntimeError("Failed to store job result")
+            logging.info(f"Job {job_id} succeeded")
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            if not self.db.update_job(job_id, {"status": FAILED, "error": str(e), "result": None,
+                                               "expires_at": self._expires_at()}):
+                logging.error(f"Could not mark job {job_id} as failed")
+        finally:
+            with self._events_lock:
+                event = self._events.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    def _run_synthesis(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        voice_id = payload['voice_id']
+        audio_data = self.tts_service.generate_long_audio(
+            voice_id=voice_id,
+            text=payload['text'],
+            settings=payload.get('settings', {})
+        )
+        if not audio_data:
+            raise RuntimeError("No audio data returned")
+        # Kept outside the job document; long renders exceed its size limit
+        if not self.db.store_job_audio(job_id, audio_data, self._expires_at()):
+            raise RuntimeError("Failed to store job audio")
+
+        mimetype, file_ext = self.tts_service.get_audio_format(voice_id)
+        return {
+            "mimetype": mimetype,
+            "file_ext": file_ext,
+            "size": len(audio_data),
+            "duration_seconds": round(audio_duration(audio_data) or 0, 2) or None
+        }
+
+    def _run_analysis(self, job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        llm = self.llm_factory()
+        items = []
+
+        for index, description in enumerate(payload['descriptions']):
+            description = description.strip()
+            meta_prompt = generate_meta_prompt(description)
+            script_result = llm.generate_script(description, meta_prompt)
+            items.append({
+                "description": description,
+                "generated_script": script_result["script"],
+                "analysis": llm.analyze_project_tone(description),
+                "meta_prompt": meta_prompt
+            })
+            self.db.update_job(job_id, {"progress.completed": index + 1})
+
+        return {"items": items}
+
+def serialize_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored job into its public JSON form"""
+    data = {
+        "job_id": job['_id'],
+        "type": job['type'],
+        "status": job['status'],
+        "progress": job.get('progress'),
+        "estimate": job.get('estimate'),
+        "error": job.get('error'),
+        "created_at": job['created_at'].isoformat() + 'Z' if job.get('created_at') else None,
+        "updated_at": job['updated_at'].isoformat() + 'Z' if job.get('updated_at') else None
+    }
+
+    if job.get('result') is not None:
+        # Synthesis results only describe the audio, which is fetched separately
+        data['result'] = job['result']
+
+    return data
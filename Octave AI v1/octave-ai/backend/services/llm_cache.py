@@ -0,0 +1,75 @@
+"""
+Two-level cache for LLM results: in-process LRU (L1) in front of the shared
+MongoDB cache collection (L2), so hits are shared by every instance and
+survive redeploys
+"""
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from utils.metrics import record_cache_lookup
+
+class LLMCache:
+    def __init__(self, db=None):
+        """
+        Args:
+            db: Connected MongoDBService for the shared level, or None for L1 only
+        """
+        self.db = db if db is not None and db.connected else None
+        self.enabled = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl = float(os.getenv('LLM_CACHE_TTL_SECONDS', 24 * 3600))
+        self.l1_size = int(os.getenv('LLM_CACHE_L1_SIZE', 1000))
+        self.l1_ttl = min(self.ttl, float(os.getenv('LLM_CACHE_L1_TTL_SECONDS', 600)))
+
+        self._l1: 'OrderedDict[str, tuple]' = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def key(self, kind: str, **fields) -> str:
+        """Stable cache key for a kind of call and its inputs"""
+        return f"llm:{kind}:" + json.dumps(fields, sort_keys=True, ensure_ascii=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._l1.move_to_end(key)
+                record_cache_lookup('llm_l1', True)
+                return json.loads(entry[1])
+        record_cache_lookup('llm_l1', False)
+
+        if self.db is None:
+            return None
+
+        raw = self.db.cache_get(key)
+        record_cache_lookup('llm_shared', raw is not None)
+        if raw is None:
+            return None
+
+        self._store_l1(key, raw.decode('utf-8'))
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        if not self.enabled:
+            return
+
+        encoded = json.dumps(value, ensure_ascii=False)
+        self._store_l1(key, encoded)
+        if self.db is not None:
+            self.db.cache_set(key, encoded.encode('utf-8'), self.ttl)
+
+    def _store_l1(self, key: str, encoded: str):
+        with self._lock:
+            self._l1[key] = (time.monotonic() + self.l1_ttl, encoded)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "l1_entries": len(self._l1), "shared": self.db is not None}
@@ -3,19 +3,57 @@ Simplified LLM Service - Groq Only
 """
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import json
 
+from services.retry_policy import call_provider
+from services.micro_batcher import MicroBatcher
+from services.tone_classifier import LocalToneAnalyzer
+from services.llm_cache import LLMCache
+from services.mongodb_service import get_mongodb_service
+from utils.deadline import remaining_time, deadline_passed
+from utils import metrics
+from utils.metrics import record_llm_usage
+from utils.timing import span
+
 # Import Groq client only
 try:
     from groq import Groq
 except ImportError:
     Groq = None
 
+SCRIPT_SYSTEM_PROMPT = "You are an expert at creating realistic AI voice agent dialogue samples. Generate natural, authentic conversation snippets that sound exactly like what an AI agent would say during real interactions."
+
+ANALYSIS_SYSTEM_PROMPT = "You are an expert in voice and communication analysis. Always respond with valid JSON only."
+
+ANALYSIS_SCHEMA = """{
+                "tone": "professional|friendly|calm|energetic|authoritative",
+                "target_audience": "general|business|healthcare|education|technology",
+                "style": "conversational|formal|casual|technical"
+            }"""
+
 class LLMService:
     def __init__(self):
         """Initialize Groq client only"""
         self.groq_client = None
+        
+        # Confident local predictions skip the LLM round-trip
+        self.tone_classifier = LocalToneAnalyzer()
+        
+        # Results shared across instances through MongoDB when MONGODB_URI is set
+        self.cache = LLMCache(get_mongodb_service())
+        
+        # Optional: concurrent tone analyses share one completion (LLM_BATCH_ANALYSIS=true)
+        self.analysis_batcher = None
+        if os.getenv('LLM_BATCH_ANALYSIS', 'false').lower() == 'true':
+            self.analysis_batcher = MicroBatcher(
+                self._analyze_batch,
+                max_items=int(os.getenv('LLM_BATCH_MAX_ITEMS', 8)),
+                window=float(os.getenv('LLM_BATCH_WINDOW_MS', 20)) / 1000,
+                name='analysis'
+            )
+        
         groq_key = os.getenv('GROQ_API_KEY')
         
         if not groq_key:
@@ -28,7 +66,8 @@ class LLMService:
         
         try:
             # Simple, clean initialization without extra parameters
-            self.groq_client = Groq(api_key=groq_key)
+            # Retries and timeouts are handled per call by call_provider
+            self.groq_client = Groq(api_key=groq_key, base_url=os.getenv('GROQ_BASE_URL') or None, max_retries=0)
             logging.info("✅ Groq client initialized successfully")
             
         except Exception as e:
@@ -36,38 +75,37 @@ class LLMService:
             logging.error(f"Error details: {str(e)}")
             self.groq_client = None
 
-    def generate_script(self, description: str, meta_prompt: str) -> Dict[str, Any]:
-        """Generate script using Groq only"""
+    def generate_script(self, description: str, meta_prompt: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Generate script using Groq only; use_cache=False always asks for a fresh script"""
+        with span('llm_script'):
+            if not use_cache:
+                return self._generate_script(description, meta_prompt)
+            
+            cache_key = self.cache.key('script', description=description, meta_prompt=meta_prompt)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            result = self._generate_script(description, meta_prompt)
+            if result.get("model_used") != "fallback":
+                self.cache.set(cache_key, result)
+            return result
+
+    def _generate_script(self, description: str, meta_prompt: str) -> Dict[str, Any]:
         if not self.groq_client:
             logging.warning("❌ Groq client not available, using fallback")
             return self._generate_fallback_script(description)
         
         try:
-            prompt = f"""
-            AI Voice Agent Description: {description}
-            Voice Requirements: {meta_prompt}
-
-            Generate a realistic conversation sample that this AI voice agent would say during a typical interaction. The script should:
-            1. Be 2-4 sentences long (perfect for voice evaluation)
-            2. Sound like actual dialogue the AI agent would speak to users
-            3. Match the tone and style indicated in the voice requirements
-            4. Include natural conversational elements (greetings, transitions, or responses)
-            5. Be representative of how the agent would actually communicate in its role
-            6. Be suitable for text-to-speech conversion
-
-            Return only the conversation sample text that the AI agent would speak, nothing else.
-            """
-            
-            response = self.groq_client.chat.completions.create(
+            response = call_provider('groq', lambda timeouts: self.groq_client.chat.completions.create(
                 model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are an expert at creating realistic AI voice agent dialogue samples. Generate natural, authentic conversation snippets that sound exactly like what an AI agent would say during real interactions."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._script_messages(description, meta_prompt),
                 max_tokens=200,
-                temperature=0.7
-            )
+                temperature=0.7,
+                timeout=timeouts.read
+            ))
             
+            record_llm_usage('generate_script', response)
             script = response.choices[0].message.content.strip()
             logging.info("✅ Script generated using Groq")
             
@@ -81,42 +119,189 @@ class LLMService:
             logging.error(f"❌ Groq script generation failed: {e}")
             return self._generate_fallback_script(description)
 
+    def stream_script(self, description: str, meta_prompt: str) -> Iterator[str]:
+        """
+        Generate a script with Groq, yielding text as tokens arrive.
+        Falls back to the fallback script if the stream cannot be started.
+        """
+        if not self.groq_client:
+            logging.warning("❌ Groq client not available, using fallback")
+            yield self._generate_fallback_script(description)["script"]
+            return
+        
+        emitted = False
+        try:
+            # Retries can only happen before the first token; the stream itself is not retried
+            stream = call_provider('groq', lambda timeouts: self.groq_client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=self._script_messages(description, meta_prompt),
+                max_tokens=200,
+                temperature=0.7,
+                stream=True,
+                timeout=timeouts.read
+            ))
+            
+            for chunk in stream:
+                # Stop reading tokens nobody will receive
+                if deadline_passed():
+                    logging.info("Script stream stopped: request cancelled or out of time")
+                    stream.close()
+                    return
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    emitted = True
+                    yield delta
+            
+            if emitted:
+                logging.info("✅ Script streamed using Groq")
+            else:
+                logging.warning("❌ Groq stream returned no content, using fallback")
+                yield self._generate_fallback_script(description)["script"]
+            
+        except Exception as e:
+            logging.error(f"❌ Groq script streaming failed: {e}")
+            if not emitted:
+                yield self._generate_fallback_script(description)["script"]
+
+    def generate_script_variations(self, description: str, meta_prompts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Generate one script per meta prompt in a single Groq call
+        
+        Returns:
+            List of {"script", "meta_prompt", "model_used"} dicts, in meta prompt order;
+            empty if Groq is unavailable or the response cannot be parsed
+        """
+        if not self.groq_client or not meta_prompts:
+            return []
+        
+        requirements = "\n".join(f"Script {index}: {meta_prompt}" for index, meta_prompt in enumerate(meta_prompts, 1))
+        prompt = f"""
+            AI Voice Agent Description: {description}
+            Voice Requirements per script:
+            {requirements}
+
+            Generate {len(meta_prompts)} different realistic conversation samples that this AI voice agent would say during a typical interaction, one per set of voice requirements. Each script should:
+            1. Be 2-4 sentences long (perfect for voice evaluation)
+            2. Sound like actual dialogue the AI agent would speak to users
+            3. Match the tone and style of its voice requirements
+            4. Be suitable for text-to-speech conversion
+
+            Return only a JSON array of {len(meta_prompts)} scripts (strings), in order, no other text.
+            """
+        
+        try:
+            response = call_provider('groq', lambda timeouts: self.groq_client.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[
+                    {"role": "system", "content": SCRIPT_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=200 * len(meta_prompts),
+                temperature=0.9,
+                timeout=timeouts.read
+            ))
+            
+            record_llm_usage('generate_script_variations', response)
+            scripts = json.loads(response.choices[0].message.content.strip())
+        except json.JSONDecodeError:
+            logging.warning("❌ Failed to parse Groq script variations")
+            return []
+        except Exception as e:
+            logging.error(f"❌ Groq script variation generation failed: {e}")
+            return []
+        
+        if not isinstance(scripts, list):
+            logging.warning("❌ Groq script variations were not a JSON array")
+            return []
+        
+        return [
+            {"script": script.strip(), "meta_prompt": meta_prompt, "model_used": "groq"}
+            for script, meta_prompt in zip(scripts, meta_prompts)
+            if isinstance(script, str) and script.strip()
+        ]
+
+    def _script_messages(self, description: str, meta_prompt: str) -> List[Dict[str, str]]:
+        """Chat messages asking for a voice agent script"""
+        prompt = f"""
+            AI Voice Agent Description: {description}
+            Voice Requirements: {meta_prompt}
+
+            Generate a realistic conversation sample that this AI voice agent would say during a typical interaction. The script should:
+            1. Be 2-4 sentences long (perfect for voice evaluation)
+            2. Sound like actual dialogue the AI agent would speak to users
+            3. Match the tone and style indicated in the voice requirements
+            4. Include natural conversational elements (greetings, transitions, or responses)
+            5. Be representative of how the agent would actually communicate in its role
+            6. Be suitable for text-to-speech conversion
+
+            Return only the conversation sample text that the AI agent would speak, nothing else.
+            """
+        return [
+            {"role": "system", "content": SCRIPT_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
     def analyze_project_tone(self, description: str) -> Dict[str, Any]:
         """Analyze project tone using Groq only"""
+        with span('llm_analysis'):
+            return self._analyze_project_tone(description)
+
+    def _analyze_project_tone(self, description: str) -> Dict[str, Any]:
+        local_analysis = self.tone_classifier.classify(description)
+        if local_analysis is not None:
+            metrics.TONE_ANALYSES.labels(source='local').inc()
+            return local_analysis
+        metrics.TONE_ANALYSES.labels(source='llm').inc()
+        
+        cached = self.cache.get(self.cache.key('analysis', description=description))
+        if cached is not None:
+            return cached
+        
         if not self.groq_client:
             logging.warning("❌ Groq client not available, using fallback analysis")
             return self._get_fallback_analysis()
         
+        if self.analysis_batcher:
+            try:
+                analysis = self.analysis_batcher.submit(description).result(timeout=remaining_time(30))
+            except FutureTimeoutError:
+                analysis = None
+            if analysis is not None:
+                return analysis
+            # Not resolved by the batch, ask on its own
+        
+        return self._analyze_single(description)
+
+    def _analyze_single(self, description: str) -> Dict[str, Any]:
         try:
             prompt = f"""
             Analyze this project description and return a JSON object with the following structure:
-            {{
-                "tone": "professional|friendly|calm|energetic|authoritative",
-                "target_audience": "general|business|healthcare|education|technology",
-                "style": "conversational|formal|casual|technical"
-            }}
+            {ANALYSIS_SCHEMA}
             
             Project: {description}
             
             Return only valid JSON, no other text.
             """
             
-            response = self.groq_client.chat.completions.create(
+            response = call_provider('groq', lambda timeouts: self.groq_client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=[
-                    {"role": "system", "content": "You are an expert in voice and communication analysis. Always respond with valid JSON only."},
+                    {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=150,
-                temperature=0.3
-            )
+                temperature=0.3,
+                timeout=timeouts.read
+            ))
             
+            record_llm_usage('analyze_project_tone', response)
             result_text = response.choices[0].message.content.strip()
             
             # Try to parse JSON
             try:
                 analysis = json.loads(result_text)
                 logging.info("✅ Project analysis completed using Groq")
+                self._remember_analysis(description, analysis)
                 return analysis
             except json.JSONDecodeError:
                 logging.warning("❌ Failed to parse Groq JSON response, using fallback")
@@ -126,6 +311,63 @@ class LLMService:
             logging.error(f"❌ Groq analysis failed: {e}")
             return self._get_fallback_analysis()
 
+    def _analyze_batch(self, descriptions: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Analyze several project descriptions with one enumerated prompt
+        
+        Returns:
+            One analysis per description, or None for every item if the
+            response cannot be parsed (callers then analyze individually)
+        """
+        if len(descriptions) == 1:
+            return [None]
+        
+        projects = "\n".join(f"Project {index}: {description}" for index, description in enumerate(descriptions, 1))
+        prompt = f"""
+            Analyze each of the {len(descriptions)} project descriptions below. Return a JSON array with exactly
+            {len(descriptions)} objects, in project order, each with the following structure:
+            {ANALYSIS_SCHEMA}
+            
+            {projects}
+            
+            Return only a valid JSON array, no other text.
+            """
+        
+        response = call_provider('groq', lambda timeouts: self.groq_client.chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=60 + 90 * len(descriptions),
+            temperature=0.3,
+            timeout=timeouts.read
+        ))
+        
+        record_llm_usage('analyze_project_tone_batch', response)
+        result_text = response.choices[0].message.content.strip()
+        
+        try:
+            analyses = json.loads(result_text)
+        except json.JSONDecodeError:
+            logging.warning(f"❌ Failed to parse batched Groq JSON response for {len(descriptions)} projects")
+            return [None] * len(descriptions)
+        
+        if not isinstance(analyses, list) or len(analyses) != len(descriptions) or \
+                not all(isinstance(analysis, dict) for analysis in analyses):
+            logging.warning(f"❌ Batched Groq response did not contain {len(descriptions)} analyses")
+            return [None] * len(descriptions)
+        
+        logging.info(f"✅ Project analysis completed for {len(descriptions)} projects in one Groq call")
+        for description, analysis in zip(descriptions, analyses):
+            self._remember_analysis(description, analysis)
+        return analyses
+
+    def _remember_analysis(self, description: str, analysis: Dict[str, Any]):
+        """Cache an LLM analysis and log it as a training label for the local classifier"""
+        self.cache.set(self.cache.key('analysis', description=description), analysis)
+        self.tone_classifier.log_label(description, analysis)
+
     def _generate_fallback_script(self, description: str) -> Dict[str, Any]:
         """Fallback script generation"""
         script = f"{description}\n\nThis script has been optimized for professional tone and general use case. The delivery should be natural and engaging, with appropriate pacing and emphasis to match your project's requirements."
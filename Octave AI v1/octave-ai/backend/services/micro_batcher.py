@@ -0,0 +1,72 @@
+"""
+Micro-batching of concurrent calls into one batched call
+
+Items submitted within a short window (or until max_items are waiting) are handed
+to process_batch together. process_batch returns one result per item, in order;
+None means "not resolved", and the caller then handles that item on its own.
+"""
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+class MicroBatcher:
+    def __init__(self, process_batch: Callable[[List[Any]], List[Optional[Any]]],
+                 max_items: int = 8, window: float = 0.02, max_concurrent_batches: int = 4,
+                 name: str = 'batch'):
+        """
+        Args:
+            process_batch: Called with a list of items, returns a list of results
+            max_items: Flush as soon as this many items are waiting
+            window: Seconds to wait for more items after the first one arrives
+            max_concurrent_batches: Batches processed at the same time
+            name: Used for thread names and logs
+        """
+        self.process_batch = process_batch
+        self.max_items = max(1, max_items)
+        self.window = window
+        self.name = name
+
+        self._pending = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches,
+                                            thread_name_prefix=f'{name}-batch')
+        threading.Thread(target=self._collect, name=f'{name}-batcher', daemon=True).start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item; the future resolves to its result (or None if unresolved)"""
+        future = Future()
+        self._pending.put((item, future))
+        return future
+
+    def _collect(self):
+        """Group queued items into batches and dispatch them"""
+        while True:
+            batch = [self._pending.get()]
+            flush_at = time.monotonic() + self.window
+
+            while len(batch) < self.max_items:
+                remaining = flush_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                logging.warning(f"{self.name} batch returned {len(results)} results for {len(items)} items")
+                results = [None] * len(items)
+        except Exception as e:
+            logging.error(f"{self.name} batch of {len(items)} failed: {str(e)}")
+            results = [None] * len(items)
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -3,19 +3,51 @@ MongoDB Atlas connection and data management
 """
 import os
 import logging
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError, DuplicateKeyError
+from typing import Dict, List, Any, Optional, Iterable
+from datetime import datetime, timedelta
+import hashlib
+import copy
+import threading
+import zlib
+
+# Shared cache collection limits
+CACHE_MAX_VALUE_BYTES = int(os.getenv('CACHE_MAX_VALUE_BYTES', 256 * 1024))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 50000))
+CACHE_TRIM_EVERY = 200  # Writes between size-cap checks
+
+# Collections that can be exported per user, with the field they are ordered by
+EXPORT_COLLECTIONS = {
+    'projects': 'created_at',
+    'voice_generations': 'created_at',
+    'analytics': 'timestamp'
+}
 
 class MongoDBService:
-    def __init__(self):
+    def __init__(self, in_memory: bool = False):
+        """
+        Args:
+            in_memory: Keep job state in process memory instead of MongoDB
+                (used for tests and when no MONGODB_URI is configured)
+        """
         self.client = None
         self.db = None
         self.connected = False
+        self.in_memory = in_memory
+        self._memory_jobs = {}
+        self._memory_job_audio = {}
+        self._memory_lock = threading.Lock()
+        self._cache_ready = False
+        self._cache_writes = 0
+        self._idempotency_ready = False
+        self._export_ready = set()
+        self._jobs_ready = False
+        self._job_audio = None
         
         # Initialize connection
-        self._connect()
+        if not in_memory:
+            self._connect()
     
     def _connect(self):
         """Connect to MongoDB Atlas"""
@@ -121,18 +153,14 @@ class MongoDBService:
             if not self.connected:
                 return []
             
-            projects = list(
-                self.db.projects
-                .find({"user_id": user_id})
-                .sort("created_at", -1)
-                .limit(limit)
-            )
-            
-            # Convert ObjectId to string
-            for project in projects:
-                project['_id'] = str(project['_id'])
-            
-            return projects
+            self._ensure_export_indexes('projects')
+            # _id is converted by the server; only `limit` documents are fetched
+            return list(self.db.projects.aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": limit},
+                {"$addFields": {"_id": {"$toString": "$_id"}}}
+            ], batchSize=limit))
             
         except Exception as e:
             logging.error(f"Error retrieving user projects: {str(e)}")
@@ -193,6 +221,412 @@ class MongoDBService:
             logging.error(f"Error getting usage stats: {str(e)}")
             return {}
     
+    def export_documents(self, collection: str, user_id: str, fields: Optional[List[str]] = None,
+                         after: Optional[str] = None, batch_size: int = 500,
+                         limit: Optional[int] = None) -> Optional[Iterable[Dict[str, Any]]]:
+        """
+        Cursor over a user's documents, oldest first, for streaming export
+        
+        Documents are ordered by (order field, _id) and pages continue from the
+        last _id seen (keyset pagination), so no page scans the ones before it.
+        Only one batch is held in memory at a time.
+        
+        Args:
+            collection: One of EXPORT_COLLECTIONS
+            user_id: Owner of the documents
+            fields: Fields to return, or None for whole documents; _id and the
+                order field are always included
+            after: _id of the last document already exported
+            batch_size: Documents fetched per round trip
+            limit: Most documents to return, or None for all
+            
+        Returns:
+            A pymongo cursor (close it when abandoned), or None when not connected
+            
+        Raises:
+            ValueError: For an unknown collection or field, or an `after` that is not one of the user's documents
+        """
+        order_field = EXPORT_COLLECTIONS.get(collection)
+        if order_field is None:
+            raise ValueError(f"Unknown export collection: {collection}")
+        if fields and any(not field or field.startswith('$') for field in fields):
+            raise ValueError("Invalid field name")
+        
+        if not self.connected:
+            return None
+        
+        from bson import ObjectId
+        from bson.errors import InvalidId
+        
+        self._ensure_export_indexes(collection)
+        query = {"user_id": user_id}
+        if after:
+            try:
+                last_id = ObjectId(after)
+            except (InvalidId, TypeError):
+                raise ValueError(f"Invalid export cursor: {after}")
+            last = self.db[collection].find_one({"_id": last_id, "user_id": user_id}, {order_field: 1})
+            if last is None:
+                raise ValueError(f"Unknown export cursor: {after}")
+            last_value = last.get(order_field)
+            query["$or"] = [
+                {order_field: {"$gt": last_value}},
+                {order_field: last_value, "_id": {"$gt": last_id}}
+            ]
+        
+        projection = None
+        if fields:
+            projection = {field: 1 for field in fields}
+            projection[order_field] = 1
+        
+        cursor = (
+            self.db[collection]
+            .find(query, projection)
+            .sort([(order_field, ASCENDING), ("_id", ASCENDING)])
+            .batch_size(batch_size)
+        )
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
+    
+    def _ensure_export_indexes(self, collection: str):
+        """Serves per-user history in order and keyset continuation without a sort in memory"""
+        if collection in self._export_ready:
+            return
+        self.db[collection].create_index(
+            [("user_id", ASCENDING), (EXPORT_COLLECTIONS[collection], ASCENDING), ("_id", ASCENDING)]
+        )
+        self._export_ready.add(collection)
+    
+    def create_job(self, job_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Store a new background job; job_data must carry its own string '_id'
+        and may carry an 'expires_at' after which the job is removed
+        """
+        try:
+            job_data['created_at'] = datetime.utcnow()
+            job_data['updated_at'] = job_data['created_at']
+            
+            if self.in_memory:
+                with self._memory_lock:
+                    self._evict_expired_memory_jobs()
+                    self._memory_jobs[job_data['_id']] = copy.deepcopy(job_data)
+                return job_data['_id']
+            
+            if not self.connected:
+                logging.warning("MongoDB not connected, cannot store job")
+                return None
+            
+            self._ensure_job_indexes()
+            self.db.jobs.insert_one(job_data)
+            return job_data['_id']
+            
+        except Exception as e:
+            logging.error(f"Error storing job: {str(e)}")
+            return None
+    
+    def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Apply field updates to a job
+        """
+        try:
+            updates['updated_at'] = datetime.utcnow()
+            
+            if self.in_memory:
+                with self._memory_lock:
+                    job = self._memory_jobs.get(job_id)
+                    if job is None:
+                        return False
+                    # Mirror MongoDB $set semantics, including dotted paths
+                    for key, value in copy.deepcopy(updates).items():
+                        target = job
+                        *parents, field = key.split('.')
+                        for parent in parents:
+                            target = target.setdefault(parent, {})
+                        target[field] = value
+                return True
+            
+            if not self.connected:
+                return False
+            
+            result = self.db.jobs.update_one({"_id": job_id}, {"$set": updates})
+            return result.matched_count == 1
+            
+        except Exception as e:
+            logging.error(f"Error updating job {job_id}: {str(e)}")
+            return False
+    
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a job by ID; include_result=False skips the (possibly large) result
+        """
+        try:
+            if self.in_memory:
+                with self._memory_lock:
+                    job = copy.deepcopy(self._memory_jobs.get(job_id))
+                if job is not None and not include_result:
+                    job.pop('result', None)
+                return job
+            
+            if not self.connected:
+                return None
+            
+            projection = None if include_result else {"result": 0}
+            return self.db.jobs.find_one({"_id": job_id}, projection)
+            
+        except Exception as e:
+            logging.error(f"Error retrieving job {job_id}: {str(e)}")
+            return None
+    
+    def store_job_audio(self, job_id: str, audio: bytes, expires_at: datetime) -> bool:
+        """
+        Store a job's audio outside the job document (GridFS), as it can exceed
+        the 16 MB document limit
+        """
+        try:
+            if self.in_memory:
+                with self._memory_lock:
+                    self._memory_job_audio[job_id] = audio
+                return True
+            
+            if not self.connected:
+                return False
+            
+            bucket = self._job_audio_bucket()
+            self._purge_expired_job_audio(bucket)
+            bucket.upload_from_stream_with_id(job_id, f"{job_id}.audio", audio,
+                                              metadata={"expires_at": expires_at})
+            return True
+            
+        except Exception as e:
+            logging.error(f"Error storing audio of job {job_id}: {str(e)}")
+            return False
+    
+    def get_job_audio(self, job_id: str) -> Optional[bytes]:
+        """Audio stored by store_job_audio, or None when missing or expired"""
+        try:
+            if self.in_memory:
+                with self._memory_lock:
+                    return self._memory_job_audio.get(job_id)
+            
+            if not self.connected:
+                return None
+            
+            from gridfs.errors import NoFile
+            try:
+                return self._job_audio_bucket().open_download_stream(job_id).read()
+            except NoFile:
+                return None
+            
+        except Exception as e:
+            logging.error(f"Error reading audio of job {job_id}: {str(e)}")
+            return None
+    
+    def _job_audio_bucket(self):
+        if self._job_audio is None:
+            from gridfs import GridFSBucket
+            self._job_audio = GridFSBucket(self.db, bucket_name='job_audio')
+        return self._job_audio
+    
+    def _purge_expired_job_audio(self, bucket):
+        """GridFS files are split over two collections, so they are expired here rather than by a TTL index"""
+        for expired in self.db.job_audio.files.find({"metadata.expires_at": {"$lte": datetime.utcnow()}}, {"_id": 1}):
+            bucket.delete(expired['_id'])
+    
+    def _ensure_job_indexes(self):
+        """TTL index removes jobs past their expires_at; jobs without one are kept"""
+        if self._jobs_ready:
+            return
+        self.db.jobs.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        self.db.job_audio.files.create_index([("metadata.expires_at", ASCENDING)])
+        self._jobs_ready = True
+    
+    def _evict_expired_memory_jobs(self):
+        """Drop in-memory jobs (and their audio) past their expires_at (lock held)"""
+        now = datetime.utcnow()
+        expired = [job_id for job_id, job in self._memory_jobs.items()
+                   if job.get('expires_at') is not None and job['expires_at'] <= now]
+        for job_id in expired:
+            del self._memory_jobs[job_id]
+            self._memory_job_audio.pop(job_id, None)
+    
+    def get_voice_catalog(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest synced voice catalog snapshot
+        """
+        try:
+            if not self.connected:
+                return None
+            
+            return self.db.voice_catalog.find_one({"_id": "current"}, {"_id": 0})
+            
+        except Exception as e:
+            logging.error(f"Error retrieving voice catalog: {str(e)}")
+            return None
+    
+    def store_voice_catalog(self, catalog: Dict[str, Any]) -> bool:
+        """
+        Store a voice catalog snapshot unless a newer version is already stored
+        """
+        try:
+            if not self.connected:
+                return False
+            
+            document = dict(catalog, updated_at=datetime.utcnow())
+            self.db.voice_catalog.replace_one(
+                {"_id": "current", "version": {"$lt": catalog['version']}},
+                document,
+                upsert=True
+            )
+            return True
+            
+        except DuplicateKeyError:
+            # Another instance already stored this or a newer version
+            return False
+        except Exception as e:
+            logging.error(f"Error storing voice catalog: {str(e)}")
+            return False
+    
+    def cache_get(self, key: str) -> Optional[bytes]:
+        """
+        Read a value from the shared cache collection
+        
+        Returns:
+            The stored bytes, or None when missing, expired or not connected
+        """
+        try:
+            if not self.connected:
+                return None
+            
+            entry = self.db.cache.find_one(
+                {"_id": self._cache_id(key), "expires_at": {"$gt": datetime.utcnow()}},
+                {"value": 1}
+            )
+            return zlib.decompress(entry['value']) if entry else None
+            
+        except Exception as e:
+            logging.error(f"Error reading cache entry: {str(e)}")
+            return None
+    
+    def cache_set(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        """
+        Store a value in the shared cache collection (zlib-compressed, expires via TTL index)
+        """
+        try:
+            if not self.connected:
+                return False
+            
+            compressed = zlib.compress(value)
+            if len(compressed) > CACHE_MAX_VALUE_BYTES:
+                logging.warning(f"Cache value of {len(compressed)} bytes exceeds CACHE_MAX_VALUE_BYTES, not stored")
+                return False
+            
+            self._ensure_cache_indexes()
+            now = datetime.utcnow()
+            self.db.cache.replace_one(
+                {"_id": self._cache_id(key)},
+                {"value": compressed, "created_at": now, "expires_at": now + timedelta(seconds=ttl_seconds)},
+                upsert=True
+            )
+            
+            self._cache_writes += 1
+            if self._cache_writes % CACHE_TRIM_EVERY == 0:
+                self._trim_cache()
+            return True
+            
+        except Exception as e:
+            logging.error(f"Error writing cache entry: {str(e)}")
+            return False
+    
+    def _cache_id(self, key: str) -> str:
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def _ensure_cache_indexes(self):
+        """TTL index removes expired entries; it also serves oldest-first trimming"""
+        if self._cache_ready:
+            return
+        self.db.cache.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        self._cache_ready = True
+    
+    def _trim_cache(self):
+        """Delete the entries closest to expiry once the collection exceeds CACHE_MAX_ENTRIES"""
+        excess = self.db.cache.estimated_document_count() - CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+        oldest = [entry['_id'] for entry in
+                  self.db.cache.find({}, {"_id": 1}).sort("expires_at", ASCENDING).limit(excess)]
+        self.db.cache.delete_many({"_id": {"$in": oldest}})
+        logging.info(f"Trimmed {len(oldest)} entries from the shared cache")
+    
+    def idempotency_claim(self, key_id: str, fingerprint: str, lock_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Claim an idempotency key for a request about to run
+        
+        Returns:
+            None if the claim succeeded, otherwise the existing record
+            (in flight elsewhere, or completed with its response)
+        """
+        if not self.connected:
+            return None
+        
+        now = datetime.utcnow()
+        claim = {"state": "in_flight", "fingerprint": fingerprint, "created_at": now,
+                 "expires_at": now + timedelta(seconds=lock_seconds)}
+        try:
+            self._ensure_idempotency_indexes()
+            try:
+                self.db.idempotency.insert_one(dict(claim, _id=key_id))
+                return None
+            except DuplicateKeyError:
+                pass
+            
+            # An in-flight claim whose holder died (lock expired) may be taken over
+            taken = self.db.idempotency.find_one_and_update(
+                {"_id": key_id, "state": "in_flight", "expires_at": {"$lte": now}},
+                {"$set": claim}
+            )
+            if taken is not None:
+                return None
+            return self.db.idempotency.find_one({"_id": key_id}) or {"state": "in_flight", "fingerprint": fingerprint}
+            
+        except Exception as e:
+            # Fail open: without the shared store the request simply runs
+            logging.error(f"Error claiming idempotency key: {str(e)}")
+            return None
+    
+    def idempotency_complete(self, key_id: str, response: Dict[str, Any], ttl_seconds: float) -> bool:
+        """Store the response of a claimed request for replay"""
+        try:
+            if not self.connected:
+                return False
+            self.db.idempotency.update_one(
+                {"_id": key_id},
+                {"$set": {"state": "done", "response": response,
+                          "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)}}
+            )
+            return True
+        except Exception as e:
+            logging.error(f"Error storing idempotent response: {str(e)}")
+            return False
+    
+    def idempotency_release(self, key_id: str) -> bool:
+        """Drop an in-flight claim so a retry can run the request again"""
+        try:
+            if not self.connected:
+                return False
+            self.db.idempotency.delete_one({"_id": key_id, "state": "in_flight"})
+            return True
+        except Exception as e:
+            logging.error(f"Error releasing idempotency key: {str(e)}")
+            return False
+    
+    def _ensure_idempotency_indexes(self):
+        """TTL index removes expired responses and abandoned claims"""
+        if self._idempotency_ready:
+            return
+        self.db.idempotency.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        self._idempotency_ready = True
+    
     def health_check(self) -> Dict[str, Any]:
         """
         Check database health and connection status
@@ -228,4 +662,20 @@ class MongoDBService:
         if self.client:
             self.client.close()
             self.connected = False
-            logging.info("MongoDB connection closed")
\ No newline at end of file
+            logging.info("MongoDB connection closed")
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+def get_mongodb_service() -> Optional[MongoDBService]:
+    """
+    The process-wide MongoDBService (one client and connection pool), created on
+    first use; None when MONGODB_URI is not set
+    """
+    global _shared_service
+    if not os.getenv('MONGODB_URI'):
+        return None
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = MongoDBService()
+        return _shared_service
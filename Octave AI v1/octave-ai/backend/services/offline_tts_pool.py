@@ -0,0 +1,273 @@
+"""
+Pool of worker processes holding initialized offline TTS engines
+
+Used by the free fallback path when providers are unavailable. Each worker
+initializes pyttsx3 (or the espeak/espeak-ng binary when pyttsx3 is missing or
+cannot initialize, e.g. without an audio driver) once,
+resolves its voices once, and then renders jobs from a shared queue.
+Audio comes back as WAV bytes over the result queue. pyttsx3 can only write
+files, so each worker reuses one scratch file on tmpfs (/dev/shm) when available.
+"""
+import os
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+import itertools
+import subprocess
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional
+
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+
+SPEECH_RATE = 150
+
+# Delay before a worker whose engine failed to initialize is started again (doubles per failure)
+MIN_RESPAWN_SECONDS = 1
+MAX_RESPAWN_SECONDS = 60
+
+def _espeak_binary() -> Optional[str]:
+    return shutil.which('espeak-ng') or shutil.which('espeak')
+
+def engine_available() -> bool:
+    """True if an offline engine exists on this machine"""
+    return pyttsx3 is not None or _espeak_binary() is not None
+
+def voice_gender(voice_id: str) -> str:
+    """Map a catalog voice to the offline engine's female/male voice"""
+    return 'female' if any(hint in voice_id for hint in ('female', 'nova', 'rachel')) else 'male'
+
+class _Pyttsx3Renderer:
+    def __init__(self, slot: int):
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', SPEECH_RATE)
+
+        # Resolve the voices once instead of on every request
+        self.voices = {}
+        for voice in self.engine.getProperty('voices') or []:
+            name = voice.name.lower()
+            if 'female' in name or 'zira' in name:
+                self.voices.setdefault('female', voice.id)
+            elif 'male' in name or 'david' in name:
+                self.voices.setdefault('male', voice.id)
+
+        scratch_dir = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        self.scratch_path = os.path.join(scratch_dir, f'octave-offline-tts-{os.getpid()}-{slot}.wav')
+
+    def render(self, text: str, gender: str) -> bytes:
+        if gender in self.voices:
+            self.engine.setProperty('voice', self.voices[gender])
+        self.engine.save_to_file(text, self.scratch_path)
+        self.engine.runAndWait()
+        with open(self.scratch_path, 'rb') as f:
+            return f.read()
+
+class _EspeakRenderer:
+    def __init__(self, slot: int):
+        self.binary = _espeak_binary()
+
+    def render(self, text: str, gender: str) -> bytes:
+        voice = 'en+f3' if gender == 'female' else 'en+m3'
+        result = subprocess.run(
+            [self.binary, '--stdout', '-v', voice, '-s', str(SPEECH_RATE), text],
+            capture_output=True, check=True
+        )
+        return result.stdout
+
+def _make_renderer(slot: int):
+    """pyttsx3 if it initializes, otherwise espeak"""
+    if pyttsx3 is not None:
+        try:
+            return _Pyttsx3Renderer(slot)
+        except Exception as e:
+            if _espeak_binary() is None:
+                raise
+            logging.warning(f"pyttsx3 init failed, using espeak: {e}")
+    if _espeak_binary() is None:
+        raise RuntimeError("no offline TTS engine available")
+    return _EspeakRenderer(slot)
+
+def _worker_main(slot: int, jobs, results):
+    """Worker process: initialize the engine once, then render jobs until told to stop"""
+    try:
+        renderer = _make_renderer(slot)
+    except Exception as e:
+        results.put(('failed', None, slot, f"engine init failed: {e}"))
+        return
+    results.put(('ready', None, slot, None))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job_id, text, gender = job
+        results.put(('started', job_id, slot, None))
+        try:
+            results.put(('done', job_id, renderer.render(text, gender), None))
+        except Exception as e:
+            results.put(('done', job_id, None, str(e)))
+
+class OfflineTTSPool:
+    def __init__(self, workers: int = None, timeout: float = None, max_pending: int = None):
+        """
+        Args:
+            workers: Engine processes (OFFLINE_TTS_WORKERS, default 2)
+            timeout: Seconds a render may take (OFFLINE_TTS_TIMEOUT_SECONDS, default 15)
+            max_pending: Jobs allowed in flight before new ones are refused (OFFLINE_TTS_MAX_PENDING, default 64)
+        """
+        self.workers = workers or int(os.getenv('OFFLINE_TTS_WORKERS', 2))
+        self.timeout = timeout or float(os.getenv('OFFLINE_TTS_TIMEOUT_SECONDS', 15))
+        self.max_pending = max_pending or int(os.getenv('OFFLINE_TTS_MAX_PENDING', 64))
+
+        # Spawn rather than fork: the parent runs threads (Flask, executors)
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = None
+        self._results = None
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._futures: Dict[int, Future] = {}
+        self._running: Dict[int, int] = {}  # job_id -> worker slot
+        self._down: Dict[int, int] = {}     # slot -> consecutive engine init failures
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """
+        Start the workers ahead of the first fallback, so it does not pay for
+        process startup; does nothing without an engine or inside a worker
+        """
+        if not engine_available() or multiprocessing.parent_process() is not None:
+            return
+        with self._lock:
+            if not self._started:
+                self._start()
+
+    def _start(self):
+        """Start workers and the result dispatcher (lock held)"""
+        self._jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        for slot in range(self.workers):
+            self._spawn(slot)
+        threading.Thread(target=self._dispatch, name='offline-tts-results', daemon=True).start()
+        self._started = True
+        logging.info(f"Started {self.workers} offline TTS worker processes")
+
+    def _spawn(self, slot: int):
+        process = self._context.Process(target=_worker_main, args=(slot, self._jobs, self._results),
+                                        name=f'offline-tts-{slot}', daemon=True)
+        process.start()
+        self._processes[slot] = process
+
+    def _dispatch(self):
+        """Route worker messages to the waiting futures"""
+        while True:
+            try:
+                kind, job_id, payload, error = self._results.get()
+            except (EOFError, OSError):
+                return
+
+            with self._lock:
+                if kind == 'failed':
+                    logging.error(f"Offline TTS worker {payload}: {error}")
+                    self._worker_failed(payload)
+                    continue
+                if kind == 'ready':
+                    self._down.pop(payload, None)
+                    continue
+                if kind == 'started':
+                    self._running[job_id] = payload
+                    continue
+                self._running.pop(job_id, None)
+                future = self._futures.pop(job_id, None)
+
+            if error:
+                logging.error(f"Offline TTS job failed: {error}")
+            if future is not None and not future.done():
+                future.set_result(payload)
+
+    def _worker_failed(self, slot: int):
+        """Restart a worker whose engine failed to initialize, with backoff (lock held)"""
+        failures = self._down.get(slot, 0) + 1
+        self._down[slot] = failures
+        delay = min(MAX_RESPAWN_SECONDS, MIN_RESPAWN_SECONDS * 2 ** (failures - 1))
+        timer = threading.Timer(delay, self._respawn, args=(slot,))
+        timer.daemon = True
+        timer.start()
+
+        if len(self._down) < self.workers:
+            return
+        # No worker can render: fail waiting jobs now instead of at their timeout
+        while True:
+            try:
+                self._jobs.get_nowait()
+            except queue.Empty:
+                break
+        for future in self._futures.values():
+            if not future.done():
+                future.set_result(None)
+        self._futures.clear()
+
+    def _respawn(self, slot: int):
+        with self._lock:
+            if self._started and slot in self._down:
+                self._spawn(slot)
+
+    def synthesize(self, text: str, voice_id: str, timeout: float = None) -> Optional[bytes]:
+        """
+        Render text with the offline engine
+
+        Returns:
+            WAV bytes, or None on timeout, failure or when the pool is saturated
+        """
+        if not engine_available():
+            return None
+
+        with self._lock:
+            if not self._started:
+                self._start()
+            if len(self._down) >= self.workers:
+                logging.warning("No offline TTS worker could initialize an engine, refusing job")
+                return None
+            if len(self._futures) >= self.max_pending:
+                logging.warning("Offline TTS pool saturated, refusing job")
+                return None
+            job_id = next(self._job_ids)
+            future = Future()
+            self._futures[job_id] = future
+
+        self._jobs.put((job_id, text, voice_gender(voice_id)))
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logging.error(f"Offline TTS job timed out after {timeout:.1f}s")
+            self._abandon(job_id)
+            return None
+
+    def _abandon(self, job_id: int):
+        """Drop a timed-out job; a worker stuck on it is replaced"""
+        with self._lock:
+            self._futures.pop(job_id, None)
+            slot = self._running.pop(job_id, None)
+            if slot is None:
+                return
+            process = self._processes.get(slot)
+            if process is not None and process.is_alive():
+                process.terminate()
+            self._spawn(slot)
+
+    def shutdown(self):
+        with self._lock:
+            if not self._started:
+                return
+            for _ in self._processes:
+                self._jobs.put(None)
+            for process in self._processes.values():
+                process.join(timeout=2)
+            self._started = False
@@ -0,0 +1,43 @@
+"""
+Rolling latency and error-rate windows per provider, fed by call_provider
+and read by the TTS provider router
+"""
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any
+
+class ProviderHealth:
+    def __init__(self):
+        self.window = float(os.getenv('PROVIDER_HEALTH_WINDOW_SECONDS', 300))
+        self.max_samples = int(os.getenv('PROVIDER_HEALTH_MAX_SAMPLES', 500))
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, latency: float, ok: bool):
+        """Add one attempt's outcome"""
+        with self._lock:
+            samples = self._samples.setdefault(provider, deque(maxlen=self.max_samples))
+            samples.append((time.monotonic(), latency, ok))
+
+    def snapshot(self, provider: str) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict with p95_ms (None without successful samples), error_rate and samples
+        """
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            recent = [sample for sample in self._samples.get(provider, ()) if sample[0] >= cutoff]
+
+        latencies = sorted(latency for _, latency, ok in recent if ok)
+        p95_ms = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000 if latencies else None
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            "p95_ms": round(p95_ms, 1) if p95_ms is not None else None,
+            "error_rate": errors / len(recent) if recent else 0.0,
+            "samples": len(recent)
+        }
+
+# Shared by every call_provider caller
+provider_health = ProviderHealth()
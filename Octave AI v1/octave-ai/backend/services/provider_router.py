@@ -0,0 +1,130 @@
+"""
+Routing of TTS requests across equivalent voices on different providers
+
+Voices with the same catalog "family" are interchangeable. Depending on the
+policy, a request may be served by another member of the family, chosen by
+live p95 latency and error rate (services/provider_health.py), concurrency
+headroom in the provider limiter, and cost per character.
+
+Policies (TTS_ROUTING_POLICY, or "routing" per request):
+- pinned: always the requested voice (default)
+- fastest: lowest error-adjusted p95 latency among providers with headroom
+- cheapest_within_slo: cheapest provider within the latency/error SLO,
+  falling back to fastest when none qualifies
+
+Providers without recent samples are assumed to sit at the SLO; a small share
+of routed requests (TTS_ROUTING_EXPLORE_RATE) goes to a random candidate with
+headroom so every provider keeps being measured.
+"""
+import os
+import random
+import logging
+from typing import Dict, Any, List, Optional
+
+from services.provider_health import provider_health
+from services.rate_limiter import get_limiter
+from utils import metrics
+
+POLICIES = ('pinned', 'fastest', 'cheapest_within_slo')
+
+# USD per 1k characters (override with TTS_COST_PER_1K_<PROVIDER>)
+DEFAULT_COST_PER_1K_CHARS = {
+    'elevenlabs': 0.030,
+    'openai': 0.015,
+    'groq': 0.0
+}
+
+# Limiter/health names used by call_provider for each TTS provider
+PROVIDER_CALL_NAMES = {'groq': 'groq_tts'}
+
+class ProviderRouter:
+    def __init__(self, tts_service):
+        """
+        Args:
+            tts_service: TTSService whose catalog and provider keys define the candidates
+        """
+        self.tts_service = tts_service
+        self.policy = os.getenv('TTS_ROUTING_POLICY', 'pinned')
+        if self.policy not in POLICIES:
+            logging.warning(f"Unknown TTS_ROUTING_POLICY '{self.policy}', using pinned")
+            self.policy = 'pinned'
+        self.slo_p95_ms = float(os.getenv('TTS_ROUTING_SLO_P95_MS', 3000))
+        self.max_error_rate = float(os.getenv('TTS_ROUTING_MAX_ERROR_RATE', 0.1))
+        self.explore_rate = float(os.getenv('TTS_ROUTING_EXPLORE_RATE', 0.05))
+        self.costs = {
+            provider: float(os.getenv(f'TTS_COST_PER_1K_{provider.upper()}', cost))
+            for provider, cost in DEFAULT_COST_PER_1K_CHARS.items()
+        }
+
+    def route(self, voice_id: str, policy: Optional[str] = None) -> str:
+        """
+        Pick the voice that should serve a request for voice_id
+
+        Returns:
+            voice_id itself, or an equivalent voice on another provider
+        """
+        policy = policy if policy in POLICIES else self.policy
+        if policy == 'pinned':
+            return voice_id
+
+        candidates = self.candidates(voice_id)
+        if len(candidates) < 2:
+            return voice_id
+
+        with_headroom = [candidate for candidate in candidates if candidate['headroom'] >= 1]
+        if with_headroom and random.random() < self.explore_rate:
+            chosen = random.choice(with_headroom)
+        elif policy == 'cheapest_within_slo':
+            within_slo = [candidate for candidate in candidates if candidate['within_slo']]
+            if within_slo:
+                chosen = min(within_slo, key=lambda c: (c['cost_per_1k'], c['effective_ms'], c['voice_id'] != voice_id))
+            else:
+                chosen = self._fastest(candidates, voice_id)
+        else:
+            chosen = self._fastest(candidates, voice_id)
+
+        requested_provider = self.tts_service.get_provider(voice_id)
+        metrics.TTS_ROUTING.labels(requested=requested_provider, served=chosen['provider']).inc()
+        if chosen['voice_id'] != voice_id:
+            logging.info(f"Routing {voice_id} to {chosen['voice_id']} ({policy}: p95 {chosen['p95_ms']}ms, "
+                         f"errors {chosen['error_rate']:.0%}, ${chosen['cost_per_1k']}/1k chars)")
+        return chosen['voice_id']
+
+    def _fastest(self, candidates: List[Dict[str, Any]], voice_id: str) -> Dict[str, Any]:
+        return min(candidates, key=lambda c: (c['headroom'] < 1, c['effective_ms'], c['voice_id'] != voice_id))
+
+    def candidates(self, voice_id: str) -> List[Dict[str, Any]]:
+        """Servable voices equivalent to voice_id, with the stats used to choose between them"""
+        voice = self.tts_service.catalog.find(voice_id)
+        family = voice.get('family') if voice else None
+        voice_ids = self.tts_service.catalog.family(family) if family else [voice_id]
+
+        candidates = []
+        for candidate_id in voice_ids:
+            provider = self.tts_service.get_provider(candidate_id)
+            if provider not in self.costs or not self.tts_service.is_provider_configured(provider):
+                continue
+            candidates.append(self._describe(candidate_id, provider))
+        return candidates
+
+    def _describe(self, voice_id: str, provider: str) -> Dict[str, Any]:
+        call_name = PROVIDER_CALL_NAMES.get(provider, provider)
+        health = provider_health.snapshot(call_name)
+        limiter = get_limiter(call_name).stats()
+        headroom = limiter['concurrency_limit'] - limiter['in_flight']
+
+        # Without samples assume the SLO; errors inflate latency (expected time to a good response)
+        p95_ms = health['p95_ms']
+        effective_ms = (p95_ms if p95_ms is not None else self.slo_p95_ms) / max(0.05, 1 - health['error_rate'])
+
+        return {
+            "voice_id": voice_id,
+            "provider": provider,
+            "p95_ms": p95_ms,
+            "error_rate": health['error_rate'],
+            "headroom": headroom,
+            "cost_per_1k": self.costs[provider],
+            "effective_ms": effective_ms,
+            "within_slo": (p95_ms is None or p95_ms <= self.slo_p95_ms)
+                          and health['error_rate'] <= self.max_error_rate and headroom >= 1
+        }
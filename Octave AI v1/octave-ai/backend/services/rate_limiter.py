@@ -0,0 +1,224 @@
+"""
+Client-side rate limiting and adaptive concurrency for provider APIs
+
+Each provider gets a token bucket sized from its configured quota
+(<PROVIDER>_RPM, <PROVIDER>_BURST) and an AIMD concurrency limit
+(<PROVIDER>_MAX_CONCURRENCY) that shrinks on 429s and latency spikes and
+grows back slowly while calls succeed. Callers queue for up to
+RATE_LIMIT_MAX_WAIT_SECONDS instead of hitting the provider and failing.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Requests per minute and concurrency ceilings per provider, overridable via env
+DEFAULT_LIMITS = {
+    'groq': {'rpm': 30, 'max_concurrency': 4},        # chat completions
+    'groq_tts': {'rpm': 10, 'max_concurrency': 2},    # playai-tts
+    'elevenlabs': {'rpm': 120, 'max_concurrency': 4},
+    'openai': {'rpm': 50, 'max_concurrency': 8},
+    'azure': {'rpm': 200, 'max_concurrency': 8}
+}
+
+# Latency above baseline * tolerance counts as congestion
+LATENCY_TOLERANCE = 2.0
+
+class RateLimitExceeded(Exception):
+    """Raised when a call could not get a provider slot within the wait budget"""
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout: float) -> bool:
+        """
+        Take one token, waiting up to timeout seconds for one to become available
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while (e.g. after a 429 with Retry-After)"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.baseline_latency = None
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for in-flight calls to drop below the limit"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self, latency: float):
+        """Additive increase, or a gentle decrease when latency shows queueing upstream"""
+        with self._condition:
+            if self.baseline_latency is None:
+                self.baseline_latency = latency
+            else:
+                # Track the floor of observed latency, drifting up slowly
+                self.baseline_latency = min(latency, self.baseline_latency * 1.01)
+
+            if latency > self.baseline_latency * LATENCY_TOLERANCE:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttled(self):
+        """Multiplicative decrease after the provider rejected a call with 429"""
+        with self._condition:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+class ProviderCall:
+    """Handle yielded by ProviderLimiter.slot() for reporting the call outcome"""
+
+    def __init__(self):
+        self.status_code = None
+        self.retry_after = None
+
+    def record(self, status_code: int, retry_after: Optional[float] = None):
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class ProviderLimiter:
+    def __init__(self, name: str, rpm: float, burst: float, max_concurrency: int, max_wait: float):
+        self.name = name
+        self.rpm = rpm
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.concurrency = AdaptiveConcurrencyLimiter(max_concurrency)
+        self.throttled_count = 0
+        self.rejected_count = 0
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """
+        Reserve a rate-limit token and a concurrency slot for one provider call.
+
+        Usage:
+            with get_limiter('elevenlabs').slot() as call:
+                response = requests.post(...)
+                call.record(response.status_code)
+
+        Raises:
+            RateLimitExceeded: If no slot frees up within the wait budget
+        """
+        wait = self.max_wait if timeout is None else timeout
+        started = time.monotonic()
+
+        if not self.concurrency.acquire(wait):
+            self.rejected_count += 1
+            raise RateLimitExceeded(f"{self.name}: no concurrency slot within {wait:.1f}s")
+
+        try:
+            if not self.bucket.acquire(max(0.0, wait - (time.monotonic() - started))):
+                self.rejected_count += 1
+                raise RateLimitExceeded(f"{self.name}: rate limit reached, no token within {wait:.1f}s")
+
+            call = ProviderCall()
+            call_started = time.monotonic()
+            try:
+                yield call
+            except Exception as e:
+                if getattr(e, 'status_code', None) == 429:
+                    call.record(429, _retry_after_from_exception(e))
+                raise
+            finally:
+                self._observe(call, time.monotonic() - call_started)
+        finally:
+            self.concurrency.release()
+
+    def _observe(self, call: ProviderCall, latency: float):
+        if call.status_code == 429:
+            self.throttled_count += 1
+            self.concurrency.on_throttled()
+            self.bucket.pause(call.retry_after or 1.0)
+            logging.warning(f"{self.name} throttled (429); concurrency limit now {self.concurrency.limit:.1f}")
+        elif call.status_code is not None and call.status_code < 400:
+            self.concurrency.on_success(latency)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "throttled": self.throttled_count,
+            "rejected": self.rejected_count
+        }
+
+def _retry_after_from_exception(error: Exception) -> Optional[float]:
+    """Read Retry-After from an SDK exception carrying an HTTP response"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """Get (creating on first use) the shared limiter for a provider"""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            defaults = DEFAULT_LIMITS.get(provider, {'rpm': 60, 'max_concurrency': 4})
+            prefix = provider.upper()
+            rpm = float(os.getenv(f'{prefix}_RPM', defaults['rpm']))
+            limiter = ProviderLimiter(
+                name=provider,
+                rpm=rpm,
+                burst=float(os.getenv(f'{prefix}_BURST', max(1.0, rpm / 4))),
+                max_concurrency=int(os.getenv(f'{prefix}_MAX_CONCURRENCY', defaults['max_concurrency'])),
+                max_wait=float(os.getenv('RATE_LIMIT_MAX_WAIT_SECONDS', 10))
+            )
+            _limiters[provider] = limiter
+        return limiter
+
+def get_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every limiter created so far"""
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
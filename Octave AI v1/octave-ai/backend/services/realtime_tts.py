@@ -0,0 +1,234 @@
+"""
+Real-time TTS sessions for voice agents: text pushed in, audio streamed out
+
+Text arrives in small pieces (e.g. LLM tokens relayed by the agent). It is cut
+into sentences as soon as they are complete, or when the client flushes, and
+each sentence is synthesized right away, several at once within the provider's
+concurrency limit. Audio goes out in sentence order; the sentence at the head
+is forwarded while the provider is still delivering it (TTSService.stream_chunks).
+
+Pushing text blocks while REALTIME_TTS_MAX_PENDING_SENTENCES sentences wait for
+their audio to be sent, or REALTIME_TTS_MAX_BUFFERED_CHARS of text wait to be
+cut, so a client that writes faster than audio can be produced stops being
+read (backpressure) instead of queueing without bound. Text without sentence
+ends is cut once it is longer than the TTS service's long-form chunk size, so
+it neither piles up nor reaches the provider as one unbounded sentence.
+"""
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import contextlib
+import contextvars
+from collections import deque
+from typing import Callable, Dict, Any, Optional, Union
+
+from utils.text_chunker import iter_sentences
+from utils.audio_duration import audio_duration
+from utils.deadline import current_deadline
+from utils import metrics
+
+# Ends the current run of text early (client flush); None ends the input
+_FLUSH = object()
+
+class RealtimeTTSSession:
+    def __init__(self, tts_service, voice_id: str, settings: Dict[str, Any],
+                 send: Callable[[Union[str, bytes]], None]):
+        """
+        Args:
+            tts_service: TTSService rendering the sentences
+            voice_id: Voice used for the whole session
+            settings: Voice settings passed to every render
+            send: Sends one message to the client (str for JSON events, bytes for audio)
+        """
+        self.tts_service = tts_service
+        self.voice_id = voice_id
+        self.voice_label = tts_service.metric_voice_label(voice_id)
+        self.settings = settings or {}
+        self._send = send
+
+        self.max_pending = int(os.getenv('REALTIME_TTS_MAX_PENDING_SENTENCES', 4))
+        self.min_chars = int(os.getenv('REALTIME_TTS_MIN_SENTENCE_CHARS', 20))
+        self.max_chars = tts_service.long_form_chunk_chars
+        self.max_buffered_chars = int(os.getenv('REALTIME_TTS_MAX_BUFFERED_CHARS',
+                                                self.max_pending * self.max_chars))
+
+        # Cancelled when the client goes away, which stops renders still running
+        self._deadline = current_deadline()
+        self._text = queue.Queue()
+        self._cut = deque()  # (sentence, cut_at) in order, until its audio is sent
+        self._unsent = 0
+        self._buffered_chars = 0  # pushed, not yet taken by the sentence cutter
+        self._closed = False
+        self._condition = threading.Condition()
+        self._sender: Optional[threading.Thread] = None
+
+        self._first_text_at: Optional[float] = None
+        self._first_audio_at: Optional[float] = None
+        self._busy_until = 0.0
+        self._stats = {"sentences": 0, "failed_sentences": 0, "characters": 0, "audio_bytes": 0,
+                       "audio_seconds": 0.0, "synthesis_seconds": 0.0}
+        self._latencies = []
+
+    def start(self):
+        """Start rendering and sending audio in a background thread"""
+        self._sender = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run,),
+            name='realtime-tts-sender', daemon=True
+        )
+        self._sender.start()
+
+    def push(self, text: str) -> bool:
+        """
+        Add text; blocks while max_pending sentences are waiting to be sent or
+        max_buffered_chars of text are waiting to be cut into sentences
+
+        Returns:
+            False if the session already closed (e.g. sending to the client failed)
+        """
+        with self._condition:
+            while ((self._unsent >= self.max_pending or self._buffered_chars >= self.max_buffered_chars)
+                   and not self._closed):
+                self._condition.wait()
+            if self._closed:
+                return False
+            self._buffered_chars += len(text)
+        if self._first_text_at is None:
+            self._first_text_at = time.monotonic()
+        self._text.put(text)
+        return True
+
+    def flush(self):
+        """Synthesize the text received so far even though its sentence is not finished"""
+        self._text.put(_FLUSH)
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        End the input and wait until all audio was sent
+
+        Returns:
+            Session statistics (see stats)
+        """
+        self._text.put(None)
+        if self._sender is not None:
+            self._sender.join()
+        return self.stats()
+
+    def cancel(self, reason: str):
+        """Stop without sending the remaining audio (the client went away)"""
+        if self._deadline is not None:
+            self._deadline.cancel(reason)
+        self._close()
+
+    def _close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        # Ends the sentence feeder if it is still waiting for text
+        self._text.put(None)
+
+    def _sentences(self):
+        """Sentences cut from the pushed text, in order"""
+        ended = False
+
+        def run_of_text():
+            # Text up to the next flush; iter_sentences emits its remainder at the end
+            nonlocal ended
+            while True:
+                item = self._text.get()
+                if item is None:
+                    ended = True
+                    return
+                if item is _FLUSH:
+                    return
+                with self._condition:
+                    self._buffered_chars -= len(item)
+                    self._condition.notify_all()
+                yield item
+
+        while not ended:
+            for sentence in iter_sentences(run_of_text(), self.min_chars, self.max_chars):
+                with self._condition:
+                    self._unsent += 1
+                self._cut.append((sentence, time.monotonic()))
+                yield sentence
+
+    def _run(self):
+        try:
+            clips = self.tts_service.stream_chunks(self.voice_id, self._sentences(), self.settings)
+            with contextlib.closing(clips):
+                for index, pieces in enumerate(clips):
+                    if self._closed:
+                        return
+                    sentence, cut_at = self._cut.popleft()
+                    self._send_sentence(index, sentence, cut_at, pieces)
+                    with self._condition:
+                        self._unsent -= 1
+                        self._condition.notify_all()
+        except Exception as e:
+            logging.error(f"Real-time TTS session for {self.voice_id} stopped: {str(e)}")
+        finally:
+            self._close()
+            if self._stats['audio_seconds'] > 0:
+                metrics.REALTIME_TTS_RTF.labels(voice_id=self.voice_label).observe(
+                    self._stats['synthesis_seconds'] / self._stats['audio_seconds'])
+
+    def _send_sentence(self, index: int, sentence: str, cut_at: float, pieces):
+        """Send one sentence: its audio event, the binary audio pieces, then its audio_end event"""
+        self._send(json.dumps({"type": "audio", "index": index, "text": sentence}))
+        audio = []
+        for piece in pieces:
+            if not audio:
+                self._latencies.append(time.monotonic() - cut_at)
+                if self._first_audio_at is None:
+                    self._first_audio_at = time.monotonic()
+                    metrics.REALTIME_TTS_TTFA.labels(voice_id=self.voice_label).observe(
+                        self._first_audio_at - self._first_text_at)
+            self._send(piece)
+            audio.append(piece)
+        done_at = time.monotonic()
+
+        self._stats['sentences'] += 1
+        self._stats['characters'] += len(sentence)
+        if not audio:
+            self._stats['failed_sentences'] += 1
+            self._send(json.dumps({"type": "error", "index": index, "error": "Failed to generate audio"}))
+            return
+
+        # Time the pipeline was producing audio, not waiting for the client's text
+        self._stats['synthesis_seconds'] += done_at - max(cut_at, self._busy_until)
+        self._busy_until = done_at
+
+        data = b''.join(audio)
+        duration = audio_duration(data)
+        self._stats['audio_bytes'] += len(data)
+        self._stats['audio_seconds'] += duration or 0.0
+        self._send(json.dumps({"type": "audio_end", "index": index, "bytes": len(data),
+                               "duration_seconds": round(duration, 3) if duration else None}))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Counts plus time_to_first_audio_ms (first text to first audio byte),
+            sentence_latency_ms (sentence complete to its first audio byte) and
+            real_time_factor (synthesis seconds per second of audio; below 1
+            means audio is produced faster than it plays)
+        """
+        stats = dict(self._stats)
+        stats['audio_seconds'] = round(stats['audio_seconds'], 3)
+        stats['synthesis_seconds'] = round(stats['synthesis_seconds'], 3)
+        stats['time_to_first_audio_ms'] = (
+            round((self._first_audio_at - self._first_text_at) * 1000)
+            if self._first_audio_at is not None else None
+        )
+        stats['sentence_latency_ms'] = {
+            "mean": round(sum(self._latencies) / len(self._latencies) * 1000) if self._latencies else None,
+            "max": round(max(self._latencies) * 1000) if self._latencies else None
+        }
+        stats['real_time_factor'] = (
+            round(self._stats['synthesis_seconds'] / self._stats['audio_seconds'], 3)
+            if self._stats['audio_seconds'] > 0 else None
+        )
+        return stats
@@ -0,0 +1,251 @@
+"""
+Shared timeout and retry policy for provider API calls
+
+Every attempt runs under the provider's rate limiter with connect/read
+timeouts. Transient failures (connection errors, 429 and 5xx responses, and
+read timeouts for idempotent calls) are retried with full-jitter exponential
+backoff, honoring Retry-After, as long as the current request deadline leaves room.
+"""
+import os
+import time
+import random
+import logging
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from services.rate_limiter import get_limiter, RateLimitExceeded
+from services.provider_health import provider_health
+from utils.deadline import remaining_time, check_deadline, sleep, DeadlineExceeded
+from utils import metrics
+from utils.timing import record_span
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# SDK (httpx based) exceptions that signal a transport problem rather than a bad request
+RETRYABLE_EXCEPTION_NAMES = {'APIConnectionError', 'InternalServerError', 'RateLimitError'}
+# Timeouts that may hit after the provider accepted (and billed) the request
+TIMEOUT_EXCEPTION_NAMES = {'APITimeoutError'}
+
+# Do not start an attempt with less time than this left on the deadline
+MIN_ATTEMPT_SECONDS = 0.5
+
+Timeouts = namedtuple('Timeouts', ['connect', 'read'])
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 connect_timeout: float = 3.05, read_timeout: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    @classmethod
+    def from_env(cls, provider: str) -> 'RetryPolicy':
+        """
+        Build a policy from PROVIDER_* defaults with optional <PROVIDER>_* overrides
+        (e.g. ELEVENLABS_READ_TIMEOUT=60)
+        """
+        prefix = provider.upper()
+
+        def setting(name, default):
+            return float(os.getenv(f'{prefix}_{name}', os.getenv(f'PROVIDER_{name}', default)))
+
+        return cls(
+            max_attempts=int(setting('MAX_ATTEMPTS', 3)),
+            base_delay=setting('BACKOFF_BASE', 0.5),
+            max_delay=setting('BACKOFF_MAX', 8.0),
+            connect_timeout=setting('CONNECT_TIMEOUT', 3.05),
+            read_timeout=setting('READ_TIMEOUT', 30.0)
+        )
+
+    def attempt_timeouts(self) -> Timeouts:
+        """
+        Timeouts for the next attempt, shrunk to fit the request deadline
+
+        Raises:
+            DeadlineExceeded: If too little time is left to make an attempt
+        """
+        remaining = remaining_time()
+        if remaining is None:
+            return Timeouts(self.connect_timeout, self.read_timeout)
+        if remaining < MIN_ATTEMPT_SECONDS:
+            raise DeadlineExceeded(f"{remaining:.2f}s left, not starting provider call")
+        return Timeouts(min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential delay, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def can_wait(self, delay: float) -> bool:
+        """Whether sleeping delay seconds still leaves time for another attempt"""
+        remaining = remaining_time()
+        return remaining is None or remaining - delay >= MIN_ATTEMPT_SECONDS
+
+_policies = {}
+
+def get_retry_policy(provider: str) -> RetryPolicy:
+    """Get the cached retry policy for a provider"""
+    if provider not in _policies:
+        _policies[provider] = RetryPolicy.from_env(provider)
+    return _policies[provider]
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def _retry_after_from_headers(headers) -> Optional[float]:
+    if not headers:
+        return None
+    return parse_retry_after(headers.get('retry-after') or headers.get('Retry-After'))
+
+def is_retryable_error(error: Exception, idempotent: bool = True) -> bool:
+    """
+    Transient transport or server errors worth another attempt
+
+    Args:
+        idempotent: Whether repeating the call is harmless; read timeouts are
+            only retried then, since a synthesis or completion the provider
+            already accepted would be billed again
+    """
+    if isinstance(error, (RateLimitExceeded, DeadlineExceeded)):
+        return False
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS
+
+    # requests exceptions
+    try:
+        import requests
+        # ConnectTimeout is a ConnectionError: the request never reached the provider
+        if isinstance(error, requests.ConnectionError):
+            return True
+        if isinstance(error, requests.Timeout):
+            return idempotent
+    except ImportError:
+        pass
+
+    if type(error).__name__ in TIMEOUT_EXCEPTION_NAMES:
+        return idempotent
+    return type(error).__name__ in RETRYABLE_EXCEPTION_NAMES
+
+def _record_attempt(provider: str, result: Any, status_code: int, latency: float):
+    """Metrics for an attempt that produced a response"""
+    record_span(provider, latency * 1000, None if status_code < 400 else str(status_code))
+    outcome = 'ok' if status_code < 400 else f'http_{status_code}'
+    metrics.PROVIDER_LATENCY.labels(provider=provider, outcome=outcome).observe(latency)
+    provider_health.record(provider, latency, status_code < 400)
+    if status_code >= 400:
+        metrics.ERRORS.labels(component=f'provider:{provider}', type=outcome).inc()
+
+    # requests measures the time until response headers were parsed
+    elapsed = getattr(result, 'elapsed', None)
+    if elapsed is not None and hasattr(elapsed, 'total_seconds'):
+        metrics.PROVIDER_TTFB.labels(provider=provider).observe(elapsed.total_seconds())
+
+def _record_error(provider: str, error: Exception, latency: float):
+    """Metrics for an attempt that raised"""
+    status_code = getattr(error, 'status_code', None)
+    error_type = f'http_{status_code}' if status_code else type(error).__name__
+    record_span(provider, latency * 1000, error_type)
+    if not isinstance(error, RateLimitExceeded):
+        metrics.PROVIDER_LATENCY.labels(provider=provider, outcome=error_type).observe(latency)
+    provider_health.record(provider, latency, False)
+    metrics.ERRORS.labels(component=f'provider:{provider}', type=error_type).inc()
+
+def read_streamed(response, chunk_size: int = 4096) -> bytes:
+    """
+    Read the body of a requests response made with stream=True, stopping as soon
+    as the current request's deadline passes or it is cancelled
+
+    Raises:
+        DeadlineExceeded: If the request ran out of time mid-body (the connection is closed)
+    """
+    chunks = []
+    try:
+        for chunk in response.iter_content(chunk_size):
+            check_deadline()
+            chunks.append(chunk)
+    finally:
+        response.close()
+    return b''.join(chunks)
+
+def call_provider(provider: str, request_fn: Callable[[Timeouts], Any],
+                  policy: Optional[RetryPolicy] = None, idempotent: bool = False) -> Any:
+    """
+    Call a provider API with rate limiting, timeouts and retries
+
+    Args:
+        provider: Limiter/policy name (e.g. 'elevenlabs', 'groq', 'groq_tts')
+        request_fn: Performs one attempt given Timeouts(connect, read). It may
+            return a requests.Response (retried on retryable status codes) or
+            any SDK result (treated as success)
+        policy: Override the provider's configured policy
+        idempotent: Also retry read timeouts (reads such as voice listings);
+            billed calls (synthesis, completions) leave this False
+
+    Returns:
+        The last result of request_fn; a response with a retryable status is
+        returned as-is once attempts or time run out
+
+    Raises:
+        The last exception when attempts are exhausted or the error is not transient
+    """
+    policy = policy or get_retry_policy(provider)
+    limiter = get_limiter(provider)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        timeouts = policy.attempt_timeouts()
+        retry_after = None
+
+        queued = started = time.monotonic()
+
+        try:
+            with limiter.slot(timeout=remaining_time(limiter.max_wait)) as call:
+                # Latency excludes time spent queued in the limiter
+                started = time.monotonic()
+                record_span(f'{provider}_queue', (started - queued) * 1000)
+                result = request_fn(timeouts)
+                status_code = getattr(result, 'status_code', 200)
+                retry_after = _retry_after_from_headers(getattr(result, 'headers', None))
+                call.record(status_code, retry_after)
+            _record_attempt(provider, result, status_code, time.monotonic() - started)
+        except Exception as e:
+            _record_error(provider, e, time.monotonic() - started)
+            if attempt >= policy.max_attempts or not is_retryable_error(e, idempotent):
+                raise
+            retry_after = _retry_after_from_headers(getattr(getattr(e, 'response', None), 'headers', None))
+            delay = policy.backoff(attempt, retry_after)
+            if not policy.can_wait(delay):
+                raise
+            logging.warning(f"{provider} call failed ({type(e).__name__}: {e}), retry {attempt}/{policy.max_attempts - 1} in {delay:.2f}s")
+        else:
+            if status_code not in RETRYABLE_STATUS or attempt >= policy.max_attempts:
+                return result
+            delay = policy.backoff(attempt, retry_after)
+            if not policy.can_wait(delay):
+                return result
+            logging.warning(f"{provider} returned {status_code}, retry {attempt}/{policy.max_attempts - 1} in {delay:.2f}s")
+            # Release the connection of a streamed response that will not be read
+            if hasattr(result, 'close'):
+                result.close()
+
+        # Backoff ends early if the request is cancelled; the next attempt then raises
+        sleep(delay)
@@ -0,0 +1,110 @@
+"""
+Pool of pre-generated script variations for /api/regenerate-script
+
+Several candidate scripts are requested in one LLM call and kept per description
+for a while: the first click answers with one candidate and pools the rest, so
+repeated regenerate clicks are answered from memory while the pool is refilled
+in the background.
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from utils.meta_prompt import generate_meta_prompt
+from utils.metrics import record_cache_lookup
+
+class ScriptVariationPool:
+    def __init__(self, llm_service):
+        """
+        Args:
+            llm_service: LLMService used to generate script variations
+        """
+        self.llm_service = llm_service
+        self.enabled = os.getenv('SCRIPT_POOL_ENABLED', 'true').lower() == 'true'
+        self.batch_size = int(os.getenv('SCRIPT_POOL_SIZE', 3))
+        self.ttl = float(os.getenv('SCRIPT_POOL_TTL_SECONDS', 600))
+        self.max_descriptions = int(os.getenv('SCRIPT_POOL_MAX_DESCRIPTIONS', 1000))
+
+        # description -> deque of (expires_at, variation), least recently used first
+        self._pools: 'OrderedDict[str, deque]' = OrderedDict()
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('SCRIPT_POOL_WORKERS', 2)),
+            thread_name_prefix='script-pool'
+        )
+
+    def take(self, description: str) -> Optional[Dict[str, Any]]:
+        """
+        Pop a pooled variation for the description and top the pool back up.
+        On a miss one batch is generated right away: its first variation is
+        returned and the rest are pooled.
+
+        Returns:
+            {"script", "meta_prompt", "model_used"}, or None if the pool is
+            disabled or the batch could not be generated
+        """
+        if not self.enabled:
+            return None
+
+        variation = None
+        with self._lock:
+            pool = self._pools.get(description)
+            now = time.monotonic()
+            while pool:
+                expires_at, candidate = pool.popleft()
+                if expires_at > now:
+                    variation = candidate
+                    break
+            if pool is not None:
+                self._pools.move_to_end(description)
+
+        record_cache_lookup('script_pool', variation is not None)
+        if variation is not None:
+            self.refill(description)
+            return variation
+
+        variations = self._generate(description)
+        if not variations:
+            return None
+        self._store(description, variations[1:])
+        return variations[0]
+
+    def refill(self, description: str):
+        """Generate a batch of variations in the background unless enough are pooled"""
+        with self._lock:
+            pooled = len(self._pools.get(description, ()))
+            if pooled > 1 or description in self._refilling:
+                return
+            self._refilling.add(description)
+        self._executor.submit(self._refill, description)
+
+    def _generate(self, description: str) -> List[Dict[str, Any]]:
+        """One LLM call for batch_size variations"""
+        meta_prompts = [generate_meta_prompt(description, variation=True) for _ in range(self.batch_size)]
+        return self.llm_service.generate_script_variations(description, meta_prompts)
+
+    def _store(self, description: str, variations: List[Dict[str, Any]]):
+        if not variations:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            pool = self._pools.setdefault(description, deque())
+            pool.extend((expires_at, variation) for variation in variations)
+            self._pools.move_to_end(description)
+            while len(self._pools) > self.max_descriptions:
+                self._pools.popitem(last=False)
+        logging.info(f"Pooled {len(variations)} script variations")
+
+    def _refill(self, description: str):
+        try:
+            self._store(description, self._generate(description))
+        except Exception as e:
+            logging.error(f"Script variation refill failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refilling.discard(description)
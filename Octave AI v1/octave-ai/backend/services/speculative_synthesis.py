@@ -0,0 +1,150 @@
+"""
+Speculative synthesis of the top recommended voices after project analysis
+
+After /api/analyze the frontend usually previews the first few recommended
+voices with the generated script. When enabled, the script is synthesized for
+the top-k voices in the background so those previews are served without a
+provider call. Spend is capped by a characters-per-hour budget, and hit rate is
+exported through the octave_speculative_synthesis_total metric.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Tuple
+
+from utils import metrics
+from utils.deadline import remaining_time
+
+CACHE_NAME = 'speculative_audio'
+
+class SpeculativeSynthesizer:
+    def __init__(self, tts_service, sample_chars: int):
+        """
+        Args:
+            tts_service: TTSService used to render speculative previews
+            sample_chars: Length previews are truncated to by /api/generate-audio
+        """
+        self.tts_service = tts_service
+        self.sample_chars = sample_chars
+
+        self.enabled = os.getenv('SPECULATIVE_SYNTHESIS', 'false').lower() == 'true'
+        self.top_k = int(os.getenv('SPECULATIVE_TOP_K', 3))
+        self.ttl = float(os.getenv('SPECULATIVE_TTL_SECONDS', 300))
+        self.char_budget = int(os.getenv('SPECULATIVE_CHAR_BUDGET_PER_HOUR', 50000))
+        self.max_entries = int(os.getenv('SPECULATIVE_MAX_ENTRIES', 500))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('SPECULATIVE_WORKERS', 2)),
+            thread_name_prefix='speculative-tts'
+        )
+        # key -> (future, expires_at)
+        self._entries: Dict[Tuple[str, str, str], Tuple[Future, float]] = {}
+        self._spent = deque()  # (timestamp, characters) within the last hour
+        self._lock = threading.Lock()
+
+    def should_speculate(self, requested: Optional[bool]) -> bool:
+        """Enabled by SPECULATIVE_SYNTHESIS; requests may only opt out"""
+        return self.enabled and requested is not False
+
+    def speculate(self, script: str, analysis: Dict[str, Any]) -> int:
+        """
+        Start background synthesis of the script for the top-k recommended voices
+
+        Returns:
+            Number of voices scheduled
+        """
+        text = script[:self.sample_chars]
+        if not text.strip():
+            return 0
+
+        voices = self.tts_service.get_recommended_voices(
+            tone=analysis.get('tone', 'professional'),
+            target_audience=analysis.get('target_audience', 'general'),
+            style=analysis.get('style', 'conversational')
+        )[:self.top_k]
+
+        scheduled = 0
+        with self._lock:
+            self._expire()
+            for voice in voices:
+                key = self._key(voice['id'], text, {})
+                if key in self._entries:
+                    continue
+                if len(self._entries) >= self.max_entries or not self._reserve(len(text)):
+                    metrics.SPECULATIVE_SYNTHESIS.labels(outcome='skipped_budget').inc()
+                    continue
+
+                future = self._executor.submit(self.tts_service.generate_audio, voice['id'], text, {})
+                self._entries[key] = (future, time.monotonic() + self.ttl)
+                metrics.SPECULATIVE_SYNTHESIS.labels(outcome='started').inc()
+                scheduled += 1
+
+        if scheduled:
+            logging.info(f"Speculatively synthesizing script for {scheduled} voices")
+        return scheduled
+
+    def take(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Claim speculatively rendered audio for a preview request.
+        Waits for an in-flight render rather than paying for a second one.
+
+        Returns:
+            Audio bytes, or None on a miss
+        """
+        key = self._key(voice_id, text, settings)
+        with self._lock:
+            self._expire()
+            entry = self._entries.pop(key, None)
+
+        if entry is None:
+            metrics.record_cache_lookup(CACHE_NAME, False)
+            return None
+
+        future, _ = entry
+        try:
+            audio_data = future.result(timeout=remaining_time(self.ttl))
+        except FutureTimeoutError:
+            audio_data = None
+        except Exception as e:
+            logging.error(f"Speculative synthesis for {voice_id} failed: {str(e)}")
+            audio_data = None
+
+        metrics.record_cache_lookup(CACHE_NAME, audio_data is not None)
+        if audio_data is not None:
+            metrics.SPECULATIVE_SYNTHESIS.labels(outcome='used').inc()
+        return audio_data
+
+    def _key(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Tuple[str, str, str]:
+        return voice_id, text, json.dumps(settings or {}, sort_keys=True)
+
+    def _reserve(self, characters: int) -> bool:
+        """Charge characters against the hourly budget if they fit (lock held)"""
+        now = time.monotonic()
+        while self._spent and self._spent[0][0] < now - 3600:
+            self._spent.popleft()
+        if sum(chars for _, chars in self._spent) + characters > self.char_budget:
+            return False
+        self._spent.append((now, characters))
+        return True
+
+    def _expire(self):
+        """Drop entries nobody asked for within the TTL (lock held)"""
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            future, _ = self._entries.pop(key)
+            future.cancel()
+            metrics.SPECULATIVE_SYNTHESIS.labels(outcome='wasted').inc()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            spent = sum(chars for timestamp, chars in self._spent if timestamp >= time.monotonic() - 3600)
+            return {
+                "enabled": self.enabled,
+                "pending": len(self._entries),
+                "chars_last_hour": spent,
+                "char_budget_per_hour": self.char_budget
+            }
@@ -0,0 +1,182 @@
+"""
+Local tone classifier used before asking the LLM for a project analysis
+
+A multinomial naive Bayes model per analysis field (tone, target_audience, style)
+over description words plus the domain keywords from utils/meta_prompt.py.
+Trained from logged LLM labels (see training/train_tone_classifier.py) and stored
+as a NumPy .npz file. Predictions below the confidence threshold return None so
+the caller falls back to the LLM. No model ships with the repository; until one
+is trained from TONE_LABEL_LOG, every analysis goes to the LLM.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.meta_prompt import detect_domain
+
+# Import numpy if available; the classifier is disabled without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FIELDS = ('tone', 'target_audience', 'style')
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'models', 'tone_classifier.npz')
+
+_TOKEN = re.compile(r"[a-z][a-z'-]+")
+
+def extract_features(description: str) -> List[str]:
+    """Lowercased words plus a domain:<name> keyword feature"""
+    text = description.lower()
+    return _TOKEN.findall(text) + [f"domain:{detect_domain(text)}"]
+
+class ToneClassifier:
+    def __init__(self, vocabulary: List[str], classes: Dict[str, List[str]],
+                 log_priors: Dict[str, Any], log_likelihoods: Dict[str, Any]):
+        """
+        Args:
+            vocabulary: Feature names, one per likelihood column
+            classes: Label names per field
+            log_priors: Per field, array of shape (classes,)
+            log_likelihoods: Per field, array of shape (classes, features)
+        """
+        self.vocabulary = {feature: index for index, feature in enumerate(vocabulary)}
+        self.classes = classes
+        self.log_priors = log_priors
+        self.log_likelihoods = log_likelihoods
+
+    @classmethod
+    def train(cls, records: List[Dict[str, Any]], alpha: float = 1.0) -> 'ToneClassifier':
+        """
+        Fit the model on labelled records
+
+        Args:
+            records: Dicts with a description and a label for every field
+            alpha: Laplace smoothing
+        """
+        documents = [extract_features(record['description']) for record in records]
+        vocabulary = sorted({feature for features in documents for feature in features})
+        index = {feature: i for i, feature in enumerate(vocabulary)}
+
+        counts = np.zeros((len(documents), len(vocabulary)))
+        for row, features in enumerate(documents):
+            for feature in features:
+                counts[row, index[feature]] += 1
+
+        classes, log_priors, log_likelihoods = {}, {}, {}
+        for field in FIELDS:
+            labels = [str(record[field]) for record in records]
+            classes[field] = sorted(set(labels))
+            label_index = np.array([classes[field].index(label) for label in labels])
+
+            class_counts = np.bincount(label_index, minlength=len(classes[field]))
+            log_priors[field] = np.log(class_counts / class_counts.sum())
+
+            feature_counts = np.zeros((len(classes[field]), len(vocabulary)))
+            np.add.at(feature_counts, label_index, counts)
+            smoothed = feature_counts + alpha
+            log_likelihoods[field] = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+
+        return cls(vocabulary, classes, log_priors, log_likelihoods)
+
+    @classmethod
+    def load(cls, path: str) -> 'ToneClassifier':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                [str(feature) for feature in data['vocabulary']],
+                {field: [str(label) for label in data[f'{field}_classes']] for field in FIELDS},
+                {field: data[f'{field}_log_prior'] for field in FIELDS},
+                {field: data[f'{field}_log_likelihood'] for field in FIELDS}
+            )
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        arrays = {'vocabulary': np.array(vocabulary)}
+        for field in FIELDS:
+            arrays[f'{field}_classes'] = np.array(self.classes[field])
+            arrays[f'{field}_log_prior'] = self.log_priors[field]
+            arrays[f'{field}_log_likelihood'] = self.log_likelihoods[field]
+        np.savez_compressed(path, **arrays)
+
+    def predict(self, description: str) -> Tuple[Optional[Dict[str, str]], float]:
+        """
+        Returns:
+            Tuple of (analysis, confidence); confidence is the lowest per-field
+            posterior. Analysis is None when no known words were found.
+        """
+        counts = np.zeros(len(self.vocabulary))
+        known = 0
+        for feature in extract_features(description):
+            index = self.vocabulary.get(feature)
+            if index is None:
+                continue
+            counts[index] += 1
+            if not feature.startswith('domain:'):
+                known += 1
+
+        if not known:
+            return None, 0.0
+
+        analysis, confidence = {}, 1.0
+        for field in FIELDS:
+            scores = self.log_priors[field] + self.log_likelihoods[field] @ counts
+            posterior = np.exp(scores - scores.max())
+            posterior /= posterior.sum()
+            best = int(posterior.argmax())
+            analysis[field] = self.classes[field][best]
+            confidence = min(confidence, float(posterior[best]))
+
+        return analysis, confidence
+
+class LocalToneAnalyzer:
+    def __init__(self):
+        """Load the classifier from TONE_CLASSIFIER_MODEL if present"""
+        self.threshold = float(os.getenv('TONE_CLASSIFIER_THRESHOLD', 0.9))
+        self.classifier = None
+        self.label_log = os.getenv('TONE_LABEL_LOG')
+        self._log_lock = threading.Lock()
+
+        if os.getenv('TONE_CLASSIFIER_ENABLED', 'true').lower() != 'true':
+            return
+        if np is None:
+            logging.warning("numpy not installed, local tone classifier disabled")
+            return
+
+        model_path = os.getenv('TONE_CLASSIFIER_MODEL', DEFAULT_MODEL_PATH)
+        if not os.path.exists(model_path):
+            logging.info(f"No tone classifier model at {model_path}, all analyses use the LLM")
+            return
+
+        try:
+            self.classifier = ToneClassifier.load(model_path)
+            logging.info(f"✅ Local tone classifier loaded from {model_path}")
+        except Exception as e:
+            logging.error(f"❌ Failed to load tone classifier: {str(e)}")
+
+    def classify(self, description: str) -> Optional[Dict[str, str]]:
+        """Analysis if the classifier is confident enough, otherwise None"""
+        if self.classifier is None:
+            return None
+        analysis, confidence = self.classifier.predict(description)
+        if analysis is None or confidence < self.threshold:
+            return None
+        return analysis
+
+    def log_label(self, description: str, analysis: Dict[str, Any]):
+        """Append an LLM-produced analysis to TONE_LABEL_LOG (JSONL) for training"""
+        if not self.label_log or not all(field in analysis for field in FIELDS):
+            return
+        record = {"description": description, "timestamp": time.time()}
+        record.update({field: analysis[field] for field in FIELDS})
+        try:
+            with self._log_lock, open(self.label_log, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            logging.warning(f"Could not write tone label log: {str(e)}")
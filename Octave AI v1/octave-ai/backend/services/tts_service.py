@@ -4,11 +4,52 @@ TTS Service for ElevenLabs, OpenAI TTS, Azure Speech, etc.
 import os
 import requests
 import logging
-import tempfile
 import io
-from typing import Dict, List, Any, Optional
+import queue
+import threading
+import contextvars
+import heapq
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
 import json
 
+from utils.text_chunker import chunk_text, split_sentences
+from utils.audio_concat import concat_audio, strip_mp3_tags
+from utils.audio_duration import audio_duration
+from services.retry_policy import call_provider, read_streamed
+from services.rate_limiter import get_limiter
+from services.offline_tts_pool import OfflineTTSPool
+from services.voice_catalog import VoiceCatalog
+from services.mongodb_service import get_mongodb_service
+from services.voice_stats import VoiceStats
+from services.fragment_cache import AudioFragmentCache
+from utils.deadline import remaining_time, deadline_passed, check_deadline
+from utils import metrics
+
+# Default number of simultaneous chunk renders per provider (override with
+# TTS_MAX_CONCURRENCY_<PROVIDER>, e.g. TTS_MAX_CONCURRENCY_ELEVENLABS=2)
+DEFAULT_PROVIDER_CONCURRENCY = {
+    'elevenlabs': 4,
+    'openai': 4,
+    'groq': 2,
+    'azure': 4,
+    'free': 2
+}
+
+# Rate limiter of each provider's synthesis calls, where it differs from the provider name
+LIMITER_NAMES = {'groq': 'groq_tts'}
+
+# ElevenLabs voice used when a voice id is missing from the catalog
+DEFAULT_ELEVENLABS_VOICE = 'pNInz6obpgDQGcFmaJgB'
+
+# Bytes read per piece from a streaming synthesis response
+STREAM_CHUNK_BYTES = 4096
+
+class SynthesisIncomplete(Exception):
+    """Raised by a streamed render that cannot deliver the rest of its audio"""
+
 class TTSService:
     def __init__(self):
         # API Keys
@@ -18,6 +59,11 @@ class TTSService:
         self.azure_key = os.getenv('AZURE_SPEECH_KEY')
         self.azure_region = os.getenv('AZURE_SPEECH_REGION')
         
+        # Provider endpoints (override to point at staging or local stand-ins)
+        self.elevenlabs_base_url = os.getenv('ELEVENLABS_BASE_URL', 'https://api.elevenlabs.io').rstrip('/')
+        self.openai_base_url = os.getenv('OPENAI_BASE_URL') or None
+        self.groq_base_url = os.getenv('GROQ_BASE_URL') or None
+        
         # Available providers
         self.providers = []
         if self.groq_key:
@@ -28,6 +74,67 @@ class TTSService:
             self.providers.append('openai')
         if self.azure_key:
             self.providers.append('azure')
+        
+        db = get_mongodb_service()
+        # Voice lists and provider voice ids, synced from provider APIs in the background
+        self.catalog = VoiceCatalog(db)
+        # Measured speaking rate, bitrate and latency per voice
+        self.voice_stats = VoiceStats()
+        # Rendered sentences reused across clips (TTS_FRAGMENT_CACHE)
+        self.fragment_cache = AudioFragmentCache(db)
+        # Below this request quota, consecutive missing sentences share one provider call
+        self.fragment_split_min_rpm = float(os.getenv('TTS_FRAGMENT_SPLIT_MIN_RPM', 60))
+        
+        # Long-form synthesis settings
+        self.long_form_chunk_chars = int(os.getenv('TTS_LONG_FORM_CHUNK_CHARS', 250))
+        
+        # Free fallback: 'gtts' tries gTTS before the offline engine pool, 'offline' skips gTTS
+        self.free_tts_engine = os.getenv('FREE_TTS_ENGINE', 'gtts').lower()
+        self._offline_pool = OfflineTTSPool()
+        # Warm the engine workers now rather than during the first outage
+        if os.getenv('OFFLINE_TTS_PRESTART', 'true').lower() != 'false':
+            self._offline_pool.start()
+        self._chunk_workers = int(os.getenv('TTS_LONG_FORM_WORKERS', 8))
+        self._chunk_executor = ThreadPoolExecutor(
+            max_workers=self._chunk_workers,
+            thread_name_prefix='tts-chunk'
+        )
+        # Renders of missing fragments; separate from chunk workers, which wait on them
+        self._fragment_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TTS_FRAGMENT_WORKERS', 8)),
+            thread_name_prefix='tts-fragment'
+        )
+        self._provider_concurrency = {
+            name: int(os.getenv(f'TTS_MAX_CONCURRENCY_{name.upper()}', limit))
+            for name, limit in DEFAULT_PROVIDER_CONCURRENCY.items()
+        }
+        self._provider_slots = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in self._provider_concurrency.items()
+        }
+    
+    def get_provider(self, voice_id: str) -> str:
+        """Resolve the provider name that will serve a voice id"""
+        if voice_id == 'Fritz-PlayAI' or voice_id.startswith('groq_'):
+            return 'groq'
+        provider = voice_id.split('_')[0]
+        return provider if provider in DEFAULT_PROVIDER_CONCURRENCY else 'free'
+    
+    def metric_voice_label(self, voice_id: str) -> str:
+        """voice_id label for metrics: catalog voices only, so clients cannot create unbounded series"""
+        return voice_id if self.catalog.find(voice_id) is not None else 'other'
+    
+    def is_provider_configured(self, provider: str) -> bool:
+        """True if requests for this provider will reach its API rather than the free fallback"""
+        return provider in self.providers
+    
+    def get_audio_format(self, voice_id: str) -> Tuple[str, str]:
+        """
+        Get the (mimetype, file extension) of audio returned for a voice
+        """
+        if self.get_provider(voice_id) == 'groq':
+            return 'audio/wav', 'wav'   # Groq returns WAV
+        return 'audio/mpeg', 'mp3'      # OpenAI, ElevenLabs and fallbacks return MP3
     
     def get_recommended_voices(self, tone: str, target_audience: str, style: str) -> List[Dict[str, Any]]:
         """
@@ -70,259 +177,463 @@ class TTSService:
     
     def _get_groq_voices(self, tone: str, target_audience: str, style: str) -> List[Dict[str, Any]]:
         """Get Groq TTS voice recommendations using playai-tts model"""
-        voices = [
-            {
-                "id": "Fritz-PlayAI",
-                "provider": "Groq",
-                "name": "Fritz-PlayAI",
-                "cost": "Free",
-                "description": "Clear and professional AI voice",
-                "gender": "male",
-                "accent": "American",
-                "duration": "3.8s",
-                "speed": "Fast",
-                "quality": "High",
-                "model": "playai-tts"
-            }
-        ]
-        return voices
+        return self._catalog_voices('groq', featured_only=True)
 
     def _get_elevenlabs_voices(self, tone: str, target_audience: str, style: str) -> List[Dict[str, Any]]:
         """Get ElevenLabs voice recommendations"""
-        voices = [
-            {
-                "id": "elevenlabs_rachel",
-                "provider": "ElevenLabs",
-                "name": "Rachel",
-                "cost": "$0.030",
-                "description": "Calm and professional",
-                "gender": "female",
-                "accent": "American",
-                "duration": "4.2s",
-                "speed": "Medium",
-                "quality": "Premium"
-            },
-            {
-                "id": "elevenlabs_josh",
-                "provider": "ElevenLabs", 
-                "name": "Josh",
-                "cost": "$0.030",
-                "description": "Deep and authoritative",
-                "gender": "male",
-                "accent": "American",
-                "duration": "4.1s",
-                "speed": "Medium",
-                "quality": "Premium"
-            },
-            {
-                "id": "elevenlabs_bella",
-                "provider": "ElevenLabs",
-                "name": "Bella",
-                "cost": "$0.030",
-                "description": "Soft and gentle",
-                "gender": "female",
-                "accent": "American",
-                "duration": "4.3s",
-                "speed": "Medium",
-                "quality": "Premium"
-            },
-            {
-                "id": "elevenlabs_antoni",
-                "provider": "ElevenLabs",
-                "name": "Antoni",
-                "cost": "$0.030",
-                "description": "Well-rounded and versatile",
-                "gender": "male",
-                "accent": "American",
-                "duration": "4.2s",
-                "speed": "Medium",
-                "quality": "Premium"
-            }
-        ]
-        return voices
+        return self._catalog_voices('elevenlabs', featured_only=True)
     
     def _get_openai_voices(self, tone: str, target_audience: str, style: str) -> List[Dict[str, Any]]:
         """Get OpenAI voice recommendations"""
-        voices = [
-            {
-                "id": "openai_nova",
-                "provider": "OpenAI",
-                "name": "Nova",
-                "cost": "0.015",
-                "description": "Warm and engaging",
-                "gender": "female",
-                "accent": "American",
-                "duration": "4.0s"
-            },
-            {
-                "id": "openai_alloy",
-                "provider": "OpenAI",
-                "name": "Alloy", 
-                "cost": "0.015",
-                "description": "Neutral and professional",
-                "gender": "neutral",
-                "accent": "American",
-                "duration": "4.1s"
-            }
-        ]
-        return voices
+        return self._catalog_voices('openai', featured_only=True)
     
     def _get_azure_voices(self, tone: str, target_audience: str, style: str) -> List[Dict[str, Any]]:
         """Get Azure Speech voice recommendations"""
-        voices = [
-            {
-                "id": "azure_jenny",
-                "provider": "Azure",
-                "name": "Jenny",
-                "cost": "0.020",
-                "description": "Clear and articulate",
-                "gender": "female",
-                "accent": "American",
-                "duration": "4.3s"
-            },
-            {
-                "id": "azure_guy",
-                "provider": "Azure",
-                "name": "Guy",
-                "cost": "0.020", 
-                "description": "Professional and confident",
-                "gender": "male",
-                "accent": "American",
-                "duration": "4.2s"
-            }
-        ]
-        return voices
+        return self._catalog_voices('azure', featured_only=True)
     
-    def _get_mock_voices(self) -> List[Dict[str, Any]]:
-        """Mock voices - only show ElevenLabs for first version"""
-        return [
-            # Only ElevenLabs voices for first version
-            # Other providers hidden until API keys are added
-            
-            # ElevenLabs Voices
-            {
-                "id": "elevenlabs_rachel",
-                "provider": "ElevenLabs",
-                "name": "Rachel",
-                "cost": "$0.030",
-                "description": "Calm and professional",
-                "gender": "female",
-                "accent": "American",
-                "duration": "5.1s",
-                "speed": "Medium",
-                "quality": "Premium"
-            },
-            {
-                "id": "elevenlabs_josh",
-                "provider": "ElevenLabs",
-                "name": "Josh",
-                "cost": "$0.030",
-                "description": "Rich and smooth",
-                "gender": "male", 
-                "accent": "American",
-                "duration": "5.2s",
-                "speed": "Medium",
-                "quality": "Premium"
-            },
-            {
-                "id": "elevenlabs_bella",
-                "provider": "ElevenLabs",
-                "name": "Bella",
-                "cost": "$0.030",
-                "description": "Soft and gentle",
-                "gender": "female",
-                "accent": "American", 
-                "duration": "5.0s",
-                "speed": "Medium",
-                "quality": "Premium"
-            },
-            {
-                "id": "elevenlabs_antoni",
-                "provider": "ElevenLabs",
-                "name": "Antoni",
-                "cost": "$0.030",
-                "description": "Well-rounded and versatile",
-                "gender": "male",
-                "accent": "American",
-                "duration": "4.2s",
-                "speed": "Medium",
-                "quality": "Premium"
-            }
-            
-            # Other providers hidden for first version:
-            # OpenAI, Azure, Play.ht, Groq
-            # Will be shown when API keys are added
-        ]
+    def _catalog_voices(self, provider: str, featured_only: bool = False) -> List[Dict[str, Any]]:
+        """Catalog voices with measured duration and speed where available"""
+        return self.voice_stats.describe(self.catalog.voices(provider, featured_only))
     
     def generate_audio(self, voice_id: str, text: str, settings: Dict[str, Any] = None) -> Optional[bytes]:
         """
         Generate audio using the specified voice
         """
+        return self._generate_audio(voice_id, text, settings or {}, bounded=False)[0]
+    
+    def _generate_audio(self, voice_id: str, text: str, settings: Dict[str, Any], bounded: bool) -> Tuple[Optional[bytes], bool]:
+        """
+        Args:
+            bounded: Hold a provider concurrency slot for the provider call (chunked
+                work); fragment renders always hold one each
+        
+        Returns:
+            Tuple of (audio bytes or None, True if the audio came from the free fallback)
+        """
+        # Chunks queued for a request that was cancelled or ran out of time are skipped
+        if deadline_passed():
+            return None, False
+        if self.fragment_cache.enabled:
+            return self._generate_from_fragments(voice_id, text, settings)
+        if bounded:
+            return self._render_bounded(voice_id, text, settings)
+        return self._generate_clip(voice_id, text, settings)
+    
+    def _render_bounded(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Tuple[Optional[bytes], bool]:
+        """_generate_clip while holding a provider concurrency slot"""
+        with self._provider_slots[self.get_provider(voice_id)]:
+            return self._generate_clip(voice_id, text, settings)
+    
+    def _fragment_renders(self, voice_id: str, missing: List[int]) -> List[List[int]]:
+        """
+        Group missing sentences into provider calls: one per sentence, or one per
+        run of consecutive sentences for providers whose request quota is below
+        TTS_FRAGMENT_SPLIT_MIN_RPM (only single-sentence renders become fragments)
+        """
+        provider = self.get_provider(voice_id)
+        limiter = LIMITER_NAMES.get(provider, provider)
+        if provider == 'free' or get_limiter(limiter).rpm >= self.fragment_split_min_rpm:
+            return [[index] for index in missing]
+        
+        runs = []
+        for index in missing:
+            if runs and runs[-1][-1] == index - 1:
+                runs[-1].append(index)
+            else:
+                runs.append([index])
+        return runs
+    
+    def _generate_from_fragments(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Tuple[Optional[bytes], bool]:
+        """
+        Assemble a clip from per-sentence fragments, rendering only the sentences
+        that are not cached yet (concurrently, each within the provider's
+        concurrency limit) and caching them for later clips
+        
+        Returns:
+            Tuple of (audio bytes or None, True if the audio came from the free fallback)
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return self._render_bounded(voice_id, text, settings)
+        
+        keys = [self.fragment_cache.key(voice_id, settings, sentence) for sentence in sentences]
+        clips = [self.fragment_cache.get(key) for key in keys]
+        missing = [index for index, clip in enumerate(clips) if clip is None]
+        
+        reused = sum(len(sentences[index]) for index, clip in enumerate(clips) if clip is not None)
+        metrics.FRAGMENT_CHARACTERS.labels(result='reused').inc(reused)
+        metrics.FRAGMENT_CHARACTERS.labels(result='synthesized').inc(sum(len(sentences[index]) for index in missing))
+        
+        # Each render runs in its own copy of the caller's context so the request deadline applies
+        futures = [
+            (run, self._fragment_executor.submit(
+                contextvars.copy_context().run, self._render_bounded,
+                voice_id, ' '.join(sentences[index] for index in run), settings
+            ))
+            for run in self._fragment_renders(voice_id, missing)
+        ]
+        fallback_used = False
+        for run, future in futures:
+            audio_data, fallback = future.result()
+            if audio_data is None:
+                logging.error(f"Fragment synthesis failed for {voice_id}: sentences {run} returned no audio")
+                return None, False
+            # Fallback audio is not the requested voice and must not be reused as it
+            if len(run) == 1 and not fallback:
+                self.fragment_cache.set(keys[run[0]], audio_data)
+            fallback_used = fallback_used or fallback
+            clips[run[0]] = audio_data
+            for index in run[1:]:
+                clips[index] = b''
+        
+        if fallback_used:
+            # Fallback audio may not match the voice's format; speak the whole text with it instead of splicing
+            return self._generate_free_tts_audio(voice_id, text, settings), True
+        clips = [clip for clip in clips if clip]
+        if len(clips) == 1:
+            return clips[0], False
+        _, file_ext = self.get_audio_format(voice_id)
+        try:
+            return concat_audio(clips, file_ext), False
+        except ValueError as e:
+            logging.error(f"Failed to join audio fragments for {voice_id}: {str(e)}")
+            return None, False
+    
+    def _generate_clip(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Tuple[Optional[bytes], bool]:
+        """
+        Render text in one provider call, falling back to free TTS
+        
+        Returns:
+            Tuple of (audio bytes or None, True if the audio came from the free fallback)
+        """
+        started = time.monotonic()
+        fallback = False
         try:
             provider = voice_id.split('_')[0]
             
             if provider == 'groq' and os.getenv('GROQ_API_KEY'):
-                return self._generate_groq_audio(voice_id, text, settings)
+                audio_data = self._generate_groq_audio(voice_id, text, settings)
             elif voice_id == 'Fritz-PlayAI' and os.getenv('GROQ_API_KEY'):
-                return self._generate_groq_audio(voice_id, text, settings)
+                audio_data = self._generate_groq_audio(voice_id, text, settings)
             elif provider == 'openai' and self.openai_key:
-                return self._generate_openai_audio(voice_id, text, settings)
+                audio_data = self._generate_openai_audio(voice_id, text, settings)
             elif provider == 'elevenlabs' and self.elevenlabs_key:
-                return self._generate_elevenlabs_audio(voice_id, text, settings)
+                audio_data = self._generate_elevenlabs_audio(voice_id, text, settings)
             elif provider == 'azure' and self.azure_key:
-                return self._generate_azure_audio(voice_id, text, settings)
+                audio_data = self._generate_azure_audio(voice_id, text, settings)
             else:
                 # Try free TTS as fallback
-                return self._generate_free_tts_audio(voice_id, text, settings)
+                fallback = True
+                audio_data = self._generate_free_tts_audio(voice_id, text, settings)
                 
         except Exception as e:
             logging.error(f"Error generating audio: {str(e)}")
+            metrics.ERRORS.labels(component='tts', type=type(e).__name__).inc()
+            fallback = True
+            audio_data = None if deadline_passed() else self._generate_free_tts_audio(voice_id, text, settings)
+        
+        self._record_audio(voice_id, text, audio_data, time.monotonic() - started, fallback)
+        return audio_data, fallback
+    
+    def _record_audio(self, voice_id: str, text: str, audio_data: Optional[bytes], latency: float, fallback: bool):
+        """Count a render in the metrics and, for provider audio, the voice's measured rates"""
+        if audio_data:
+            duration = audio_duration(audio_data)
+            label = self.metric_voice_label(voice_id)
+            metrics.AUDIO_BYTES.labels(voice_id=label).inc(len(audio_data))
+            metrics.CHARACTERS_SYNTHESIZED.labels(voice_id=label).inc(len(text))
+            if duration:
+                metrics.AUDIO_SECONDS.labels(voice_id=label).inc(duration)
+            # Fallback audio says nothing about the requested voice
+            if not fallback:
+                self.voice_stats.record(voice_id, len(text), len(audio_data), latency, duration)
+        else:
+            metrics.ERRORS.labels(component='tts', type='no_audio').inc()
+    
+    def stream_audio(self, voice_id: str, text: str, settings: Dict[str, Any] = None) -> Iterator[bytes]:
+        """
+        Synthesize one text and yield its audio as the provider delivers it.
+        ElevenLabs is read from its streaming endpoint; other providers, and an
+        ElevenLabs stream that fails before its first byte, yield one complete
+        clip from generate_audio (with its fallbacks and fragment cache).
+        """
+        return self._stream_audio(voice_id, text, settings or {}, bounded=False)
+    
+    def _stream_audio(self, voice_id: str, text: str, settings: Dict[str, Any], bounded: bool) -> Iterator[bytes]:
+        """stream_audio; bounded holds a provider concurrency slot for each provider call"""
+        # With the fragment cache, text of several sentences is assembled from fragments
+        # and only a single sentence missing from the cache is streamed
+        if (self.get_provider(voice_id) != 'elevenlabs' or not self.elevenlabs_key or deadline_passed()
+                or (self.fragment_cache.enabled and len(split_sentences(text)) != 1)):
+            audio_data = self._generate_audio(voice_id, text, settings, bounded)[0]
+            if audio_data:
+                yield audio_data
+            return
+        
+        fragment_key = None
+        if self.fragment_cache.enabled:
+            fragment_key = self.fragment_cache.key(voice_id, settings, text)
+            cached = self.fragment_cache.get(fragment_key)
+            if cached is not None:
+                metrics.FRAGMENT_CHARACTERS.labels(result='reused').inc(len(text))
+                yield cached
+                return
+        
+        started = time.monotonic()
+        pieces = []
+        slot = self._provider_slots['elevenlabs'] if bounded or fragment_key is not None else contextlib.nullcontext()
+        try:
+            with slot:
+                response = self._elevenlabs_request(voice_id, text, settings, stream=True)
+                if response.status_code != 200:
+                    logging.error(f"ElevenLabs streaming API error: {response.status_code} - {response.text}")
+                    response.close()
+                else:
+                    try:
+                        for piece in response.iter_content(STREAM_CHUNK_BYTES):
+                            check_deadline()
+                            pieces.append(piece)
+                            yield piece
+                    finally:
+                        response.close()
+        except Exception as e:
+            logging.error(f"Error streaming ElevenLabs audio: {str(e)}")
+            metrics.ERRORS.labels(component='tts', type=type(e).__name__).inc()
+            if pieces:
+                # Part of the clip was already delivered; a fallback clip cannot continue it
+                return
+        
+        if pieces:
+            audio_data = b''.join(pieces)
+            self._record_audio(voice_id, text, audio_data, time.monotonic() - started, False)
+            if fragment_key is not None:
+                metrics.FRAGMENT_CHARACTERS.labels(result='synthesized').inc(len(text))
+                self.fragment_cache.set(fragment_key, audio_data)
+            return
+        audio_data = self._generate_audio(voice_id, text, settings, bounded)[0]
+        if audio_data:
+            yield audio_data
+    
+    def generate_long_audio(self, voice_id: str, text: str, settings: Dict[str, Any] = None) -> Optional[bytes]:
+        """
+        Generate audio for a long script by synthesizing sentence chunks in
+        parallel and joining them into a single file. If any chunk came from the
+        free fallback, the whole script is spoken by the fallback instead, so
+        voices (and formats) are never mixed in one file.
+        """
+        chunks = chunk_text(text, self.long_form_chunk_chars)
+        if not chunks:
+            return None
+        
+        results = list(self.render_chunks(voice_id, chunks, settings))
+        clips = [clip for clip, _ in results]
+        if any(clip is None for clip in clips):
+            logging.error(f"Long-form synthesis failed for {voice_id}: {clips.count(None)} of {len(clips)} chunks missing")
+            return None
+        if any(fallback for _, fallback in results):
+            logging.warning(f"Long-form synthesis for {voice_id} fell back to free TTS, rendering the whole script with it")
             return self._generate_free_tts_audio(voice_id, text, settings)
+        
+        _, file_ext = self.get_audio_format(voice_id)
+        try:
+            return concat_audio(clips, file_ext)
+        except ValueError as e:
+            logging.error(f"Failed to join long-form audio for {voice_id}: {str(e)}")
+            return None
+    
+    def estimate_long_audio(self, voice_id: str, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Predict playback length and render time of a long-form script from the
+        voice's measured rates, accounting for parallel chunk rendering
+        
+        Returns:
+            {"duration_seconds", "render_seconds", "chunks"} or None until the voice has measurements
+        """
+        chunks = chunk_text(text, self.long_form_chunk_chars)
+        estimates = [self.voice_stats.estimate(voice_id, len(chunk)) for chunk in chunks]
+        if not estimates or estimates[0] is None:
+            return None
+        
+        # Chunks start in order on the first free slot; the render ends with the last one
+        slots = min(self._provider_concurrency[self.get_provider(voice_id)], self._chunk_workers)
+        finish_times = [0.0] * max(1, slots)
+        for estimate in estimates:
+            heapq.heappush(finish_times, heapq.heappop(finish_times) + estimate['render_seconds'])
+        
+        return {
+            "duration_seconds": round(sum(estimate['duration_seconds'] for estimate in estimates), 2),
+            "render_seconds": round(max(finish_times), 2),
+            "chunks": len(chunks)
+        }
+    
+    def iter_long_audio(self, voice_id: str, text: str, settings: Dict[str, Any] = None) -> Iterator[bytes]:
+        """
+        Stream audio for a long script chunk by chunk, in script order.
+        Only valid for MP3 voices; each chunk after the first is trimmed to
+        whole frames so the concatenated stream stays playable.
+        
+        If the first chunk came from the free fallback, the whole script is
+        spoken by the fallback instead; a later chunk from the fallback cannot
+        continue the voice's stream and fails it.
+        
+        Raises:
+            SynthesisIncomplete: If a chunk returned no audio or fell back after
+                audio was sent, so the response is aborted instead of ending as if
+                the script were complete
+        """
+        chunks = chunk_text(text, self.long_form_chunk_chars)
+        
+        with contextlib.closing(self.render_chunks(voice_id, chunks, settings)) as clips:
+            for index, (clip, fallback) in enumerate(clips):
+                if clip is None:
+                    raise SynthesisIncomplete(f"long-form stream for {voice_id}: chunk {index} returned no audio")
+                if fallback:
+                    if index > 0:
+                        raise SynthesisIncomplete(f"long-form stream for {voice_id}: chunk {index} fell back to free TTS")
+                    break
+                yield clip if index == 0 else strip_mp3_tags(clip)
+            else:
+                return
+        
+        logging.warning(f"Long-form stream for {voice_id} fell back to free TTS, rendering the whole script with it")
+        audio_data = self._generate_free_tts_audio(voice_id, text, settings)
+        if not audio_data:
+            raise SynthesisIncomplete(f"long-form stream for {voice_id}: free TTS fallback returned no audio")
+        yield audio_data
+    
+    def render_chunks(self, voice_id: str, texts: Iterable[str], settings: Dict[str, Any] = None) -> Iterator[Tuple[Optional[bytes], bool]]:
+        """
+        Synthesize text chunks concurrently and yield the results in input order,
+        as (audio bytes or None, True if the audio came from the free fallback).
+        Fallback audio is another voice, possibly in another format: callers must
+        not splice it into the voice's chunks.
+        
+        texts may be a slow lazy iterator (e.g. sentences cut from a streaming
+        LLM response): a feeder thread submits each chunk as soon as it is read,
+        so finished audio is yielded without waiting for the next chunk of text.
+        Concurrency is bounded per provider. Pending work is cancelled if the
+        consumer stops iterating early.
+        """
+        def job(text):
+            return lambda: self._render_chunk(voice_id, text, settings), None
+        
+        jobs = self._submit_chunks(voice_id, texts, job)
+        with contextlib.closing(jobs):
+            for future, _ in jobs:
+                yield future.result()
+    
+    def stream_chunks(self, voice_id: str, texts: Iterable[str], settings: Dict[str, Any] = None) -> Iterator[Iterator[bytes]]:
+        """
+        Like render_chunks, but each chunk's audio is yielded as an iterator of
+        pieces (see stream_audio). The chunk at the head is forwarded while the
+        provider is still delivering it; later chunks render concurrently and
+        buffer until their turn. A chunk that failed yields no pieces.
+        """
+        def job(text):
+            pieces = queue.Queue()
+            
+            def run():
+                try:
+                    for piece in self._stream_audio(voice_id, text, settings or {}, bounded=True):
+                        pieces.put(piece)
+                finally:
+                    pieces.put(None)
+            return run, pieces
+        
+        jobs = self._submit_chunks(voice_id, texts, job)
+        with contextlib.closing(jobs):
+            for _, pieces in jobs:
+                yield iter(pieces.get, None)
+    
+    def _submit_chunks(self, voice_id: str, texts: Iterable[str], job) -> Iterator[Tuple[Any, Any]]:
+        """
+        Submit job(text) -> (callable, handle) to the chunk executor for each text
+        as soon as a feeder thread reads it, yielding (future, handle) in input order
+        """
+        pending = queue.Queue()
+        stop = threading.Event()
+        
+        def feed():
+            try:
+                for text in texts:
+                    if stop.is_set() or deadline_passed():
+                        break
+                    # Run each chunk in a copy of the caller's context so the request deadline applies
+                    context = contextvars.copy_context()
+                    run, handle = job(text)
+                    pending.put((self._chunk_executor.submit(context.run, run), handle))
+            except Exception as e:
+                logging.error(f"Error reading text chunks for {voice_id}: {str(e)}")
+            finally:
+                pending.put(None)
+        
+        threading.Thread(target=contextvars.copy_context().run, args=(feed,), name='tts-chunk-feeder', daemon=True).start()
+        
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            stop.set()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    item[0].cancel()
+    
+    def _render_chunk(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Tuple[Optional[bytes], bool]:
+        """Synthesize one chunk, each provider call holding a provider concurrency slot; see _generate_audio"""
+        return self._generate_audio(voice_id, text, settings or {}, bounded=True)
+    
+    def _elevenlabs_request(self, voice_id: str, text: str, settings: Dict[str, Any], stream: bool = False):
+        """
+        Start an ElevenLabs synthesis request (rate limited, with timeouts and retries).
+        The body is always read lazily so an expired or cancelled request stops
+        downloading it; stream=True uses the streaming endpoint, which starts
+        sending audio before the whole clip is rendered.
+        """
+        # Get the actual ElevenLabs voice ID from the catalog
+        elevenlabs_voice_id = self.catalog.provider_voice_id(voice_id) or DEFAULT_ELEVENLABS_VOICE
+        
+        # ElevenLabs API endpoint
+        url = f"{self.elevenlabs_base_url}/v1/text-to-speech/{elevenlabs_voice_id}"
+        if stream:
+            url += "/stream"
+        
+        # Request headers
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.elevenlabs_key
+        }
+        
+        # Request data
+        data = {
+            "text": text,
+            "model_id": "eleven_monolingual_v1",
+            "voice_settings": {
+                "stability": settings.get('stability', 0.5),
+                "similarity_boost": settings.get('similarity_boost', 0.75),
+                "style": settings.get('style', 0.0),
+                "use_speaker_boost": settings.get('use_speaker_boost', True)
+            }
+        }
+        
+        return call_provider(
+            'elevenlabs',
+            lambda timeouts: requests.post(url, json=data, headers=headers, timeout=timeouts, stream=True)
+        )
     
     def _generate_elevenlabs_audio(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Optional[bytes]:
         """Generate audio using ElevenLabs API"""
         try:
-            # Map our voice IDs to ElevenLabs voice IDs
-            voice_mapping = {
-                'elevenlabs_rachel': 'pNInz6obpgDQGcFmaJgB',  # Rachel
-                'elevenlabs_josh': 'TxGEqnHWrfWFTfGW9XjX',   # Josh
-                'elevenlabs_bella': 'EXAVITQu4vr4xnSDxMaL',  # Bella
-                'elevenlabs_antoni': 'ErXwobaYiN019PkySvjV', # Antoni
-                'elevenlabs_elli': 'MF3mGyEYCl7XYWbV9V6O',   # Elli
-                'elevenlabs_domi': 'AZnzlk1XvdvUeBnXmlld'    # Domi
-            }
-            
-            # Get the actual ElevenLabs voice ID
-            elevenlabs_voice_id = voice_mapping.get(voice_id, 'pNInz6obpgDQGcFmaJgB')  # Default to Rachel
-            
-            # ElevenLabs API endpoint
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{elevenlabs_voice_id}"
-            
-            # Request headers
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.elevenlabs_key
-            }
-            
-            # Request data
-            data = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": settings.get('stability', 0.5),
-                    "similarity_boost": settings.get('similarity_boost', 0.75),
-                    "style": settings.get('style', 0.0),
-                    "use_speaker_boost": settings.get('use_speaker_boost', True)
-                }
-            }
-            
-            # Make the request
-            response = requests.post(url, json=data, headers=headers)
+            response = self._elevenlabs_request(voice_id, text, settings)
             
             if response.status_code == 200:
+                audio_data = read_streamed(response)
                 logging.info(f"Successfully generated ElevenLabs audio for {voice_id}")
-                return response.content
+                return audio_data
             else:
                 logging.error(f"ElevenLabs API error: {response.status_code} - {response.text}")
                 return None
@@ -335,27 +646,19 @@ class TTSService:
         """Generate audio using OpenAI TTS API"""
         try:
             from openai import OpenAI
-            client = OpenAI(api_key=self.openai_key)
+            client = OpenAI(api_key=self.openai_key, base_url=self.openai_base_url, max_retries=0)  # Retries handled by call_provider
             
             # Map our voice IDs to OpenAI voice names
-            voice_mapping = {
-                'openai_nova': 'nova',
-                'openai_alloy': 'alloy',
-                'openai_echo': 'echo',
-                'openai_fable': 'fable',
-                'openai_onyx': 'onyx',
-                'openai_shimmer': 'shimmer'
-            }
-            
-            openai_voice = voice_mapping.get(voice_id, 'nova')
+            openai_voice = self.catalog.provider_voice_id(voice_id) or 'nova'
             
             # Generate speech
-            response = client.audio.speech.create(
+            response = call_provider('openai', lambda timeouts: client.audio.speech.create(
                 model="tts-1",  # or "tts-1-hd" for higher quality
                 voice=openai_voice,
                 input=text,
-                response_format="mp3"
-            )
+                response_format="mp3",
+                timeout=timeouts.read
+            ))
             
             logging.info(f"Successfully generated OpenAI audio for {voice_id}")
             return response.content
@@ -373,68 +676,37 @@ class TTSService:
     def _generate_free_tts_audio(self, voice_id: str, text: str, settings: Dict[str, Any]) -> Optional[bytes]:
         """Generate audio using free TTS as fallback"""
         try:
-            # Try using gTTS (Google Text-to-Speech) as free fallback
-            try:
-                from gtts import gTTS
-                import io
-                
-                # Create gTTS object
-                tts = gTTS(text=text, lang='en', slow=False)
-                
-                # Save to bytes buffer
-                audio_buffer = io.BytesIO()
-                tts.write_to_fp(audio_buffer)
-                audio_buffer.seek(0)
-                
-                logging.info(f"Successfully generated free TTS audio for {voice_id}")
-                return audio_buffer.read()
-                
-            except ImportError:
-                logging.warning("gTTS not available, trying pyttsx3")
-                # Try pyttsx3 as another fallback
+            # gTTS (Google Text-to-Speech) needs network; skip it with FREE_TTS_ENGINE=offline
+            if self.free_tts_engine != 'offline':
                 try:
-                    import pyttsx3
-                    import tempfile
+                    from gtts import gTTS
                     
-                    engine = pyttsx3.init()
+                    # Create gTTS object
+                    tts = gTTS(text=text, lang='en', slow=False)
                     
-                    # Adjust voice properties based on voice_id
-                    voices = engine.getProperty('voices')
-                    if voices:
-                        if 'female' in voice_id or 'nova' in voice_id or 'rachel' in voice_id:
-                            # Try to find female voice
-                            for voice in voices:
-                                if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                                    engine.setProperty('voice', voice.id)
-                                    break
-                        else:
-                            # Use male voice
-                            for voice in voices:
-                                if 'male' in voice.name.lower() or 'david' in voice.name.lower():
-                                    engine.setProperty('voice', voice.id)
-                                    break
+                    # Save to bytes buffer
+                    audio_buffer = io.BytesIO()
+                    tts.write_to_fp(audio_buffer)
+                    audio_buffer.seek(0)
                     
-                    # Set speech rate
-                    engine.setProperty('rate', 150)
+                    logging.info(f"Successfully generated free TTS audio for {voice_id}")
+                    return audio_buffer.read()
                     
-                    # Save to temporary file
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                        engine.save_to_file(text, temp_file.name)
-                        engine.runAndWait()
-                        
-                        # Read the file
-                        with open(temp_file.name, 'rb') as f:
-                            audio_data = f.read()
-                        
-                        # Clean up
-                        os.unlink(temp_file.name)
-                        
-                        logging.info(f"Successfully generated pyttsx3 audio for {voice_id}")
-                        return audio_data
-                        
                 except ImportError:
-                    logging.warning("No TTS libraries available")
-                    return None
+                    logging.warning("gTTS not available, trying offline engine")
+                except Exception as e:
+                    logging.warning(f"gTTS failed, trying offline engine: {str(e)}")
+            
+            # Offline engine (pyttsx3/espeak) in pre-started worker processes
+            audio_data = self._offline_pool.synthesize(
+                text, voice_id, timeout=remaining_time(self._offline_pool.timeout)
+            )
+            if audio_data:
+                logging.info(f"Successfully generated offline TTS audio for {voice_id}")
+                return audio_data
+            
+            logging.warning("Free TTS fallback produced no audio (no offline engine, timeout or pool saturated)")
+            return None
                     
         except Exception as e:
             logging.error(f"Error generating free TTS audio: {str(e)}")
@@ -444,7 +716,7 @@ class TTSService:
         """Generate audio using Groq TTS API"""
         try:
             from groq import Groq
-            client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+            client = Groq(api_key=os.getenv('GROQ_API_KEY'), base_url=self.groq_base_url, max_retries=0)  # Retries handled by call_provider
             
             # Use Fritz-PlayAI as default voice for playai-tts model
             groq_voice = 'Fritz-PlayAI'
@@ -452,12 +724,13 @@ class TTSService:
             logging.info(f"Generating Groq TTS audio with model: playai-tts, voice: {groq_voice}")
             
             # Generate speech using Groq TTS with playai-tts model
-            response = client.audio.speech.create(
+            response = call_provider('groq_tts', lambda timeouts: client.audio.speech.create(
                 model="playai-tts",
                 voice=groq_voice,
                 input=text,
-                response_format="wav"
-            )
+                response_format="wav",
+                timeout=timeouts.read
+            ))
             
             # Handle the response properly - similar to ElevenLabs
             if hasattr(response, 'content'):
@@ -505,54 +778,28 @@ class TTSService:
     def get_voices_by_provider(self, provider: str) -> List[Dict[str, Any]]:
         """Get all voices for a specific provider"""
         if provider == 'groq':
-            return self._get_groq_voices("", "", "")
+            return self._catalog_voices('groq')
         elif provider == 'elevenlabs':
-            return self._get_elevenlabs_voices("", "", "")
+            return self._catalog_voices('elevenlabs')
         elif provider == 'openai':
-            return self._get_openai_voices("", "", "")
+            return self._catalog_voices('openai')
         elif provider == 'azure':
-            return self._get_azure_voices("", "", "")
+            return self._catalog_voices('azure')
         elif provider == 'playht':
-            return self._get_playht_voices("", "", "")
+            return self._catalog_voices('playht')
         else:
             return []
     
     def get_voice_details(self, voice_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific voice"""
-        all_voices = self._get_mock_voices()
-        
-        for voice in all_voices:
-            if voice['id'] == voice_id:
-                return voice
-        
-        return None
+        voice = self.catalog.find(voice_id)
+        measured = self.voice_stats.summary(voice_id) if voice is not None else None
+        if measured is not None:
+            self.voice_stats.describe([voice])
+            voice['measured'] = {key: round(value, 4) if isinstance(value, float) else value
+                                 for key, value in measured.items()}
+        return voice
     
     def _get_playht_voices(self, tone: str, target_audience: str, style: str) -> List[Dict[str, Any]]:
         """Get Play.ht voice recommendations"""
-        voices = [
-            {
-                "id": "playht_sarah",
-                "provider": "Play.ht",
-                "name": "Sarah",
-                "cost": "$0.025",
-                "description": "Natural and conversational",
-                "gender": "female",
-                "accent": "American",
-                "duration": "4.6s",
-                "speed": "Medium",
-                "quality": "High"
-            },
-            {
-                "id": "playht_michael",
-                "provider": "Play.ht",
-                "name": "Michael", 
-                "cost": "$0.025",
-                "description": "Engaging and dynamic",
-                "gender": "male",
-                "accent": "American",
-                "duration": "4.5s",
-                "speed": "Medium",
-                "quality": "High"
-            }
-        ]
-        return voices
\ No newline at end of file
+        return self._catalog_voices('playht', featured_only=True)
@@ -0,0 +1,306 @@
+"""
+Provider voice catalog with a versioned snapshot and background refresh
+
+Voices are served from memory and never wait on a provider. A provider whose
+list is older than VOICE_CATALOG_TTL_SECONDS is refreshed in a background thread
+with a conditional request (If-None-Match) while the stale list keeps being
+served. Each change bumps the catalog version and is written to the snapshot
+file and MongoDB. On startup the newest of the shipped seed
+(data/voice_catalog.json), the local snapshot and the MongoDB copy is used, so
+the catalog works offline from the last snapshot.
+
+Providers without a listing API (OpenAI, Groq, Play.ht) keep their seed entries.
+"""
+import os
+import re
+import copy
+import json
+import time
+import logging
+import tempfile
+import threading
+import requests
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.retry_policy import call_provider
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'voice_catalog.json')
+
+# Catalog bookkeeping that is not part of the voice objects returned by the API
+INTERNAL_FIELDS = ('featured', 'available', 'provider_voice_id')
+
+# Seconds before retrying a provider whose refresh failed
+REFRESH_RETRY_SECONDS = 60
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+def _public(voice: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in voice.items() if key not in INTERNAL_FIELDS}
+
+class VoiceCatalog:
+    def __init__(self, db=None):
+        """
+        Args:
+            db: Connected MongoDBService to share the catalog across instances, or None
+        """
+        self.db = db if db is not None and db.connected else None
+        self.ttl = float(os.getenv('VOICE_CATALOG_TTL_SECONDS', 3600))
+        self.sync_enabled = os.getenv('VOICE_CATALOG_SYNC', 'true').lower() == 'true'
+        self.snapshot_path = os.getenv('VOICE_CATALOG_SNAPSHOT',
+                                       os.path.join(tempfile.gettempdir(), 'octave_voice_catalog.json'))
+
+        self.elevenlabs_key = os.getenv('ELEVENLABS_API_KEY')
+        self.elevenlabs_base_url = os.getenv('ELEVENLABS_BASE_URL', 'https://api.elevenlabs.io').rstrip('/')
+        self.azure_key = os.getenv('AZURE_SPEECH_KEY')
+        self.azure_region = os.getenv('AZURE_SPEECH_REGION')
+
+        self._fetchers = {}
+        if self.elevenlabs_key:
+            self._fetchers['elevenlabs'] = self._fetch_elevenlabs
+        if self.azure_key and self.azure_region:
+            self._fetchers['azure'] = self._fetch_azure
+
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._retry_at: Dict[str, float] = {}
+        self._set_catalog(self._load_newest())
+
+    def voices(self, provider: str, featured_only: bool = False) -> List[Dict[str, Any]]:
+        """Voices currently offered by a provider (never blocks on the provider)"""
+        self._refresh_if_stale(provider)
+        listing = self._listings.get((provider, featured_only), [])
+        return [dict(voice) for voice in listing]
+
+    def find(self, voice_id: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry for one of our voice ids"""
+        voice = self._by_id.get(voice_id)
+        return _public(voice) if voice else None
+
+    def family(self, name: str) -> List[str]:
+        """Ids of available voices marked equivalent (same "family" field)"""
+        return list(self._families.get(name, ()))
+
+    def provider_voice_id(self, voice_id: str) -> Optional[str]:
+        """The provider's own id for one of our voice ids"""
+        voice = self._by_id.get(voice_id)
+        return voice.get('provider_voice_id') if voice else None
+
+    def _set_catalog(self, catalog: Dict[str, Any]):
+        """Swap in a catalog with its id index and public listings (callers hold the lock after startup)"""
+        self._by_id = {
+            voice['id']: voice
+            for provider in catalog['providers'].values()
+            for voice in provider.get('voices', [])
+        }
+        listings = {}
+        for name, provider in catalog['providers'].items():
+            available = [voice for voice in provider.get('voices', []) if voice.get('available', True)]
+            listings[(name, False)] = [_public(voice) for voice in available]
+            listings[(name, True)] = [_public(voice) for voice in available if voice.get('featured')]
+        self._listings = listings
+        families = {}
+        for voice in self._by_id.values():
+            if voice.get('family') and voice.get('available', True):
+                families.setdefault(voice['family'], []).append(voice['id'])
+        self._families = families
+        self._catalog = catalog
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            return {
+                "version": self._catalog['version'],
+                "providers": {
+                    name: {
+                        "voices": len(provider.get('voices', [])),
+                        "age_seconds": round(now - provider['fetched_at']) if provider.get('fetched_at') else None,
+                        "synced": name in self._fetchers
+                    }
+                    for name, provider in self._catalog['providers'].items()
+                }
+            }
+
+    # Loading and persistence
+
+    def _load_newest(self) -> Dict[str, Any]:
+        candidates = [self._read_snapshot(SEED_PATH), self._read_snapshot(self.snapshot_path)]
+        if self.db is not None:
+            candidates.append(self.db.get_voice_catalog())
+        candidates = [catalog for catalog in candidates if catalog and 'providers' in catalog]
+        if not candidates:
+            logging.error("No voice catalog snapshot found, catalog is empty")
+            return {"version": 0, "providers": {}}
+        return max(candidates, key=lambda catalog: catalog.get('version', 0))
+
+    def _read_snapshot(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable voice catalog snapshot {path}: {str(e)}")
+            return None
+
+    def _persist(self, catalog: Dict[str, Any]):
+        """Write the snapshot atomically and share it through MongoDB"""
+        try:
+            temp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(catalog, f, indent=2)
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            logging.warning(f"Could not write voice catalog snapshot: {str(e)}")
+        if self.db is not None:
+            self.db.store_voice_catalog(catalog)
+
+    # Background refresh
+
+    def _refresh_if_stale(self, provider: str):
+        if not self.sync_enabled or provider not in self._fetchers:
+            return
+        # Fresh lists (the common case) are checked without taking the lock
+        fetched_at = self._catalog['providers'].get(provider, {}).get('fetched_at')
+        now = time.time()
+        if fetched_at and now - fetched_at < self.ttl:
+            return
+        with self._lock:
+            if provider in self._refreshing or now < self._retry_at.get(provider, 0):
+                return
+            self._refreshing.add(provider)
+        threading.Thread(target=self._refresh, args=(provider,), name=f'voice-catalog-{provider}', daemon=True).start()
+
+    def _refresh(self, provider: str):
+        try:
+            # Another instance may already have synced a newer catalog
+            if self.db is not None:
+                shared = self.db.get_voice_catalog()
+                with self._lock:
+                    if shared and shared.get('version', 0) > self._catalog['version']:
+                        self._set_catalog(shared)
+                    fetched_at = self._catalog['providers'].get(provider, {}).get('fetched_at')
+                if fetched_at and time.time() - fetched_at < self.ttl:
+                    return
+
+            with self._lock:
+                etag = self._catalog['providers'].get(provider, {}).get('etag')
+
+            modified, new_etag, fetched = self._fetchers[provider](etag)
+
+            with self._lock:
+                catalog = copy.deepcopy(self._catalog)
+                entry = catalog['providers'].setdefault(provider, {"etag": None, "fetched_at": None, "voices": []})
+                entry['fetched_at'] = time.time()
+                if modified:
+                    entry['etag'] = new_etag
+                    entry['voices'] = self._merge(entry['voices'], fetched)
+                    catalog['version'] = catalog.get('version', 0) + 1
+                self._set_catalog(catalog)
+
+            if modified:
+                logging.info(f"Voice catalog for {provider} updated to version {catalog['version']} ({len(fetched)} voices)")
+                self._persist(catalog)
+
+        except Exception as e:
+            logging.error(f"Voice catalog refresh for {provider} failed, serving last snapshot: {str(e)}")
+            with self._lock:
+                self._retry_at[provider] = time.time() + REFRESH_RETRY_SECONDS
+        finally:
+            with self._lock:
+                self._refreshing.discard(provider)
+
+    def _merge(self, current: List[Dict[str, Any]], fetched: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Combine curated entries with a fresh provider list: curated voices keep
+        their ids and copy, new voices are added unfeatured, and voices the
+        provider no longer lists are marked unavailable
+        """
+        by_provider_id = {voice.get('provider_voice_id'): voice for voice in current}
+        used_ids = {voice['id'] for voice in current}
+        merged, seen = [], set()
+
+        for fresh in fetched:
+            known = by_provider_id.get(fresh['provider_voice_id'])
+            if known is not None:
+                voice = dict(known, available=True)
+                if fresh.get('preview_url'):
+                    voice['preview_url'] = fresh['preview_url']
+            else:
+                voice = fresh
+                # Keep ids unique when a new voice shares a name with an existing one
+                if voice['id'] in used_ids:
+                    voice['id'] = f"{voice['id']}_{_slug(voice['provider_voice_id'])[:8]}"
+                used_ids.add(voice['id'])
+            seen.add(voice['provider_voice_id'])
+            merged.append(voice)
+
+        for voice in current:
+            if voice.get('provider_voice_id') not in seen:
+                merged.append(dict(voice, available=False))
+
+        return merged
+
+    # Provider listings: return (modified, etag, voices)
+
+    def _fetch_elevenlabs(self, etag: Optional[str]) -> Tuple[bool, Optional[str], List[Dict[str, Any]]]:
+        headers = {"xi-api-key": self.elevenlabs_key, "Accept": "application/json"}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        response = call_provider('elevenlabs', lambda timeouts: requests.get(
+            f"{self.elevenlabs_base_url}/v1/voices", headers=headers, timeout=timeouts
+        ), idempotent=True)
+        if response.status_code == 304:
+            return False, etag, []
+        response.raise_for_status()
+
+        voices = []
+        for voice in response.json().get('voices', []):
+            labels = voice.get('labels') or {}
+            voices.append({
+                "id": f"elevenlabs_{_slug(voice['name'])}",
+                "provider": "ElevenLabs",
+                "name": voice['name'],
+                "cost": "$0.030",
+                "description": (labels.get('description') or voice.get('category') or '').capitalize(),
+                "gender": labels.get('gender', ''),
+                "accent": (labels.get('accent') or '').title(),
+                "duration": "4.2s",
+                "speed": "Medium",
+                "quality": "Premium",
+                "preview_url": voice.get('preview_url'),
+                "featured": False,
+                "provider_voice_id": voice['voice_id']
+            })
+        return True, response.headers.get('ETag'), voices
+
+    def _fetch_azure(self, etag: Optional[str]) -> Tuple[bool, Optional[str], List[Dict[str, Any]]]:
+        headers = {"Ocp-Apim-Subscription-Key": self.azure_key}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        url = f"https://{self.azure_region}.tts.speech.microsoft.com/cognitiveservices/voices/list"
+        response = call_provider('azure', lambda timeouts: requests.get(url, headers=headers, timeout=timeouts),
+                                 idempotent=True)
+        if response.status_code == 304:
+            return False, etag, []
+        response.raise_for_status()
+
+        voices = []
+        for voice in response.json():
+            if not voice.get('Locale', '').startswith('en-'):
+                continue
+            voices.append({
+                "id": f"azure_{_slug(voice['DisplayName'])}",
+                "provider": "Azure",
+                "name": voice['DisplayName'],
+                "cost": "0.020",
+                "description": voice.get('LocaleName', ''),
+                "gender": voice.get('Gender', '').lower(),
+                "accent": voice.get('LocaleName', ''),
+                "duration": "4.2s",
+                "featured": False,
+                "provider_voice_id": voice['ShortName']
+            })
+        return True, response.headers.get('ETag'), voices
@@ -0,0 +1,116 @@
+"""
+Rolling per-voice synthesis statistics measured from real clips
+
+Every successful provider render adds (characters, bytes, latency, duration),
+with the duration read from the clip's container headers. Per voice this gives
+speaking rate (characters per second of audio), bitrate (bytes per second) and
+a latency model (fixed overhead plus time per character) used for the catalog's
+duration/speed fields and for render time estimates.
+"""
+import os
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+# Speaking rates (characters of text per second of audio) bounding the "Medium" label
+SLOW_BELOW_CPS = 12.5
+FAST_ABOVE_CPS = 15.5
+
+def speed_label(chars_per_second: float) -> str:
+    if chars_per_second < SLOW_BELOW_CPS:
+        return "Slow"
+    if chars_per_second > FAST_ABOVE_CPS:
+        return "Fast"
+    return "Medium"
+
+class VoiceStats:
+    def __init__(self):
+        self.max_samples = int(os.getenv('VOICE_STATS_MAX_SAMPLES', 200))
+        self.min_samples = int(os.getenv('VOICE_STATS_MIN_SAMPLES', 3))
+        # Text length the catalog "duration" describes (the seed values are ~4s samples)
+        self.reference_chars = int(os.getenv('VOICE_STATS_REFERENCE_CHARS', 64))
+
+        self._samples: Dict[str, deque] = {}
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, voice_id: str, chars: int, audio_bytes: int, latency: float, duration: Optional[float]):
+        """Add one rendered clip; clips without a readable duration are ignored"""
+        if not duration or chars <= 0:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(voice_id, deque(maxlen=self.max_samples))
+            samples.append((chars, audio_bytes, latency, duration))
+            # Summaries are rebuilt on write so catalog reads stay a dict lookup
+            self._summaries[voice_id] = self._summarize(samples)
+
+    def _summarize(self, samples: deque) -> Dict[str, Any]:
+        total_chars = sum(sample[0] for sample in samples)
+        total_bytes = sum(sample[1] for sample in samples)
+        total_seconds = sum(sample[3] for sample in samples)
+
+        # Least-squares fit latency = base + per_char * chars; a ratio when lengths do not vary
+        count = len(samples)
+        mean_chars = total_chars / count
+        mean_latency = sum(sample[2] for sample in samples) / count
+        variance = sum((sample[0] - mean_chars) ** 2 for sample in samples)
+        if variance > 0:
+            per_char = sum((sample[0] - mean_chars) * (sample[2] - mean_latency) for sample in samples) / variance
+            per_char = max(0.0, per_char)
+            base = max(0.0, mean_latency - per_char * mean_chars)
+        else:
+            per_char, base = mean_latency / mean_chars, 0.0
+
+        return {
+            "samples": count,
+            "chars_per_second": total_chars / total_seconds,
+            "bytes_per_second": total_bytes / total_seconds,
+            "latency_base_seconds": base,
+            "latency_per_char_seconds": per_char
+        }
+
+    def summary(self, voice_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            Measured rates for a voice, or None until min_samples clips were seen
+        """
+        summary = self._summaries.get(voice_id)
+        if summary is None or summary['samples'] < self.min_samples:
+            return None
+        return summary
+
+    def describe(self, voices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Catalog voices (updated in place) with measured duration/speed instead of the seed values"""
+        if not self._summaries:
+            return voices
+        for voice in voices:
+            summary = self.summary(voice.get('id'))
+            if summary is not None:
+                voice['duration'] = f"{self.reference_chars / summary['chars_per_second']:.1f}s"
+                voice['speed'] = speed_label(summary['chars_per_second'])
+        return voices
+
+    def estimate(self, voice_id: str, chars: int) -> Optional[Dict[str, float]]:
+        """
+        Predict playback length and render latency for a text of chars characters
+
+        Returns:
+            {"duration_seconds", "render_seconds", "bytes"} or None without measurements
+        """
+        summary = self.summary(voice_id)
+        if summary is None:
+            return None
+        duration = chars / summary['chars_per_second']
+        return {
+            "duration_seconds": round(duration, 2),
+            "render_seconds": round(summary['latency_base_seconds'] + summary['latency_per_char_seconds'] * chars, 2),
+            "bytes": int(duration * summary['bytes_per_second'])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                voice_id: {key: round(value, 4) if isinstance(value, float) else value
+                           for key, value in summary.items()}
+                for voice_id, summary in self._summaries.items()
+            }
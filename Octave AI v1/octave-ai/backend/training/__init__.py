@@ -0,0 +1 @@
+# Model training package
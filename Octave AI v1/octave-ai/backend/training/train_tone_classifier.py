@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Train and evaluate the local tone classifier from logged LLM labels
+
+Labels are collected by running the backend with TONE_LABEL_LOG=<file>.jsonl;
+every successful LLM analysis is appended as one JSON line.
+
+Usage (from backend/):
+    python training/train_tone_classifier.py --labels tone_labels.jsonl
+    python training/train_tone_classifier.py --labels tone_labels.jsonl --out models/tone_classifier.npz
+
+The report shows, per confidence threshold, the share of traffic the classifier
+would answer locally (coverage) and how often it agrees with the LLM there.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.tone_classifier import ToneClassifier, FIELDS, DEFAULT_MODEL_PATH  # noqa: E402
+
+def load_labels(path: str):
+    """Read labelled records, keeping the latest label per description"""
+    records = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('description') and all(record.get(field) for field in FIELDS):
+                records[record['description']] = record
+    return list(records.values())
+
+def evaluate(classifier: ToneClassifier, records, thresholds):
+    """
+    Returns:
+        List of dicts with threshold, coverage and accuracy on covered records
+    """
+    predictions = [(classifier.predict(record['description']), record) for record in records]
+    rows = []
+    for threshold in thresholds:
+        covered = [(analysis, record) for (analysis, confidence), record in predictions
+                   if analysis is not None and confidence >= threshold]
+        correct = sum(all(analysis[field] == str(record[field]) for field in FIELDS)
+                      for analysis, record in covered)
+        rows.append({
+            "threshold": threshold,
+            "coverage": len(covered) / len(records) if records else 0.0,
+            "accuracy": correct / len(covered) if covered else 0.0
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local tone classifier")
+    parser.add_argument('--labels', required=True, help="JSONL file written via TONE_LABEL_LOG")
+    parser.add_argument('--out', help=f"Save the model trained on all labels (default path: {DEFAULT_MODEL_PATH})")
+    parser.add_argument('--eval-fraction', type=float, default=0.2, help="Held-out share for evaluation")
+    parser.add_argument('--alpha', type=float, default=1.0, help="Laplace smoothing")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    records = load_labels(args.labels)
+    if len(records) < 10:
+        parser.error(f"Need at least 10 labelled descriptions, found {len(records)}")
+
+    random.Random(args.seed).shuffle(records)
+    held_out = max(1, int(len(records) * args.eval_fraction))
+    train_records, eval_records = records[held_out:], records[:held_out]
+
+    classifier = ToneClassifier.train(train_records, alpha=args.alpha)
+    print(f"Trained on {len(train_records)} descriptions, evaluating on {len(eval_records)}")
+    print(f"\n{'threshold':>10}{'coverage':>10}{'accuracy':>10}")
+    for row in evaluate(classifier, eval_records, [0.5, 0.7, 0.8, 0.9, 0.95, 0.99]):
+        print(f"{row['threshold']:>10}{row['coverage'] * 100:>9.1f}%{row['accuracy'] * 100:>9.1f}%")
+
+    if args.out:
+        ToneClassifier.train(records, alpha=args.alpha).save(args.out)
+        print(f"\nSaved model trained on all {len(records)} descriptions to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Joins independently synthesized audio clips into a single playable file
+MP3 clips are trimmed to whole frames, WAV clips are merged under one header
+"""
+import struct
+from typing import List
+
+def strip_mp3_tags(data: bytes) -> bytes:
+    """
+    Remove ID3v2 (leading) and ID3v1 (trailing) tags and any bytes before
+    the first MPEG frame sync, so clips can be appended frame-aligned
+
+    Args:
+        data: MP3 bytes as returned by a provider
+
+    Returns:
+        MP3 bytes starting at the first audio frame
+    """
+    start = 0
+
+    # ID3v2 header: "ID3" + version(2) + flags(1) + syncsafe size(4)
+    while data[start:start + 3] == b'ID3' and len(data) >= start + 10:
+        size = 0
+        for byte in data[start + 6:start + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[start + 5] & 0x10 else 0
+        start += 10 + size + footer
+
+    # Skip padding/garbage up to the first frame sync (11 set bits)
+    end = len(data)
+    while start < end - 1:
+        if data[start] == 0xFF and (data[start + 1] & 0xE0) == 0xE0:
+            break
+        start += 1
+
+    # ID3v1 trailer is a fixed 128 bytes starting with "TAG"
+    if end - start >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+
+    return data[start:end]
+
+def concat_mp3(clips: List[bytes]) -> bytes:
+    """
+    Concatenate MP3 clips; the first clip keeps its leading tags
+
+    Args:
+        clips: Ordered MP3 clips
+
+    Returns:
+        Single MP3 stream
+    """
+    if not clips:
+        return b''
+    return clips[0] + b''.join(strip_mp3_tags(clip) for clip in clips[1:])
+
+def parse_wav(data: bytes):
+    """
+    Locate the fmt and data chunks of a RIFF/WAVE file
+
+    Args:
+        data: WAV bytes
+
+    Returns:
+        Tuple of (fmt chunk payload, PCM data bytes)
+
+    Raises:
+        ValueError: If the bytes are not a WAV file
+    """
+    if len(data) < 12 or data[0:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack('<I', data[offset + 4:offset + 8])[0]
+        body_start = offset + 8
+
+        if chunk_id == b'fmt ':
+            fmt = data[body_start:body_start + chunk_size]
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streaming encoders write a placeholder size; take the rest of the file
+            if chunk_size in (0, 0xFFFFFFFF) or body_start + chunk_size > len(data):
+                return fmt, data[body_start:]
+            return fmt, data[body_start:body_start + chunk_size]
+
+        # Chunks are word aligned
+        offset = body_start + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV file has no data chunk")
+
+def build_wav(fmt: bytes, pcm: bytes) -> bytes:
+    """Build a WAV file with correct RIFF and data sizes"""
+    fmt_chunk = b'fmt ' + struct.pack('<I', len(fmt)) + fmt
+    data_chunk = b'data' + struct.pack('<I', len(pcm)) + pcm
+    riff_size = 4 + len(fmt_chunk) + len(data_chunk)
+    return b'RIFF' + struct.pack('<I', riff_size) + b'WAVE' + fmt_chunk + data_chunk
+
+def concat_wav(clips: List[bytes]) -> bytes:
+    """
+    Concatenate WAV clips under a single header
+
+    Args:
+        clips: Ordered WAV clips sharing the same sample format
+
+    Returns:
+        Single WAV file
+
+    Raises:
+        ValueError: If clips are not WAV or their formats differ
+    """
+    if not clips:
+        return b''
+
+    fmt = None
+    pcm_parts = []
+    for clip in clips:
+        clip_fmt, pcm = parse_wav(clip)
+        # Compare the core PCM description (format, channels, rate, block align, bits)
+        if fmt is not None and clip_fmt[:16] != fmt[:16]:
+            raise ValueError("WAV clips have different sample formats")
+        fmt = fmt or clip_fmt
+        pcm_parts.append(pcm)
+
+    return build_wav(fmt, b''.join(pcm_parts))
+
+def concat_audio(clips: List[bytes], file_ext: str) -> bytes:
+    """Concatenate clips of the given container type ('mp3' or 'wav')"""
+    if file_ext == 'wav':
+        return concat_wav(clips)
+    return concat_mp3(clips)
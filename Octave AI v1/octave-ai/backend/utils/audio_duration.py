@@ -0,0 +1,139 @@
+"""
+Playback duration of synthesized clips read from container headers
+WAV uses the fmt byte rate, MP3 walks frame headers without decoding audio
+"""
+import struct
+from typing import Optional
+
+from utils.audio_concat import parse_wav, strip_mp3_tags
+
+# Bitrates in kbit/s by [MPEG-1?][layer][index]; index 0 (free) and 15 (bad) are unusable
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Bytes searched for the next frame after losing sync, and how often sync may be
+# lost (about once per joined clip) before the bytes are judged not to be MP3
+MAX_RESYNC_BYTES = 4096
+MAX_RESYNCS = 64
+
+# Sample rates by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+def _frame_info(header: bytes):
+    """
+    Decode a 4-byte MPEG audio frame header
+
+    Returns:
+        Tuple of (frame length in bytes, samples per frame, sample rate, MPEG-1, mono),
+        or None if the bytes are not a valid header
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    mono = (header[3] >> 6) == 3
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate, mpeg1, mono
+    samples = 1152 if (layer == 2 or mpeg1) else 576
+    return samples // 8 * bitrate // sample_rate + padding, samples, sample_rate, mpeg1, mono
+
+def _xing_frames(data: bytes, offset: int, mpeg1: bool, mono: bool) -> Optional[int]:
+    """Frame count from a Xing/Info header in the first frame (VBR files), if present"""
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    tag = offset + 4 + side_info
+    if data[tag:tag + 4] not in (b'Xing', b'Info') or len(data) < tag + 12:
+        return None
+    flags = struct.unpack('>I', data[tag + 4:tag + 8])[0]
+    if not flags & 0x01:
+        return None
+    return struct.unpack('>I', data[tag + 8:tag + 12])[0]
+
+def mp3_duration(data: bytes) -> Optional[float]:
+    """
+    Duration of an MP3 stream by walking its frame headers
+
+    Args:
+        data: MP3 bytes, optionally with ID3 tags
+
+    Returns:
+        Seconds of audio, or None if no frames were found
+    """
+    data = strip_mp3_tags(data)
+    first = _frame_info(data[:4])
+    if first is None:
+        return None
+    # A real stream has a second frame right after the first; random bytes rarely do
+    if len(data) > first[0] + 4 and _frame_info(data[first[0]:first[0] + 4]) is None:
+        return None
+
+    frames = _xing_frames(data, 0, first[3], first[4])
+    if frames is not None:
+        return frames * first[1] / first[2]
+
+    seconds = 0.0
+    resyncs = 0
+    offset, end = 0, len(data)
+    while offset + 4 <= end:
+        info = _frame_info(data[offset:offset + 4])
+        if info is None:
+            # Lost sync (corrupt or concatenated clip): resume at the next frame sync nearby
+            resyncs += 1
+            if resyncs > MAX_RESYNCS:
+                return None
+            offset = data.find(b'\xff', offset + 1, offset + MAX_RESYNC_BYTES)
+            if offset < 0:
+                break
+            continue
+        length, samples, sample_rate = info[0], info[1], info[2]
+        if offset + length > end:
+            # Truncated last frame contributes its share of samples
+            seconds += samples / sample_rate * (end - offset) / length
+            break
+        seconds += samples / sample_rate
+        offset += length
+    return seconds or None
+
+def wav_duration(data: bytes) -> Optional[float]:
+    """Duration of a PCM WAV file from its byte rate and data size"""
+    try:
+        fmt, pcm = parse_wav(data)
+    except ValueError:
+        return None
+    if len(fmt) < 12:
+        return None
+    byte_rate = struct.unpack('<I', fmt[8:12])[0]
+    return len(pcm) / byte_rate if byte_rate else None
+
+def audio_duration(data: bytes) -> Optional[float]:
+    """
+    Playback duration of a WAV or MP3 clip, detected from its content
+
+    Returns:
+        Seconds of audio, or None if the format is not recognized
+    """
+    if not data:
+        return None
+    if data[:4] == b'RIFF':
+        return wav_duration(data)
+    return mp3_duration(data)
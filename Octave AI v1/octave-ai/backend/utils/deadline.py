@@ -0,0 +1,117 @@
+"""
+Per-request deadlines shared by routes and provider calls
+Examples: with deadline_scope(30): ... remaining_time() -> 29.8
+
+A deadline can also be cancelled (e.g. when the client disconnects); it then
+reports no time left, so provider calls and retries stop at their next check.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+class DeadlineExceeded(Exception):
+    """Raised when there is no time left to start or retry an operation"""
+
+class RequestCancelled(DeadlineExceeded):
+    """Raised when the request was cancelled, e.g. because the client went away"""
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+        self.cancel_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative, 0 once cancelled)"""
+        if self.cancel_reason is not None:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.cancel_reason is not None or time.monotonic() >= self.expires_at
+
+    def cancel(self, reason: str):
+        """End the deadline early; safe to call from any thread"""
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+        self._cancelled.set()
+
+    def check(self):
+        """
+        Raises:
+            RequestCancelled: If the deadline was cancelled
+            DeadlineExceeded: If it passed
+        """
+        if self.cancel_reason is not None:
+            raise RequestCancelled(self.cancel_reason)
+        if self.expired():
+            raise DeadlineExceeded("request deadline passed")
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep unless cancelled first; returns True if the full time passed"""
+        return not self._cancelled.wait(min(seconds, self.remaining()))
+
+_current_deadline = contextvars.ContextVar('deadline', default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """Deadline of the request being handled in this context, if any"""
+    return _current_deadline.get()
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """
+    Time left for the current request, capped at default
+
+    Returns:
+        Seconds left, default when no deadline is set
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    if default is None:
+        return deadline.remaining()
+    return min(default, deadline.remaining())
+
+def deadline_passed() -> bool:
+    """True if the current request's deadline passed or it was cancelled"""
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.expired()
+
+def check_deadline():
+    """Raise DeadlineExceeded (or RequestCancelled) if the current request has no time left"""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+def sleep(seconds: float):
+    """time.sleep that returns early when the current request is cancelled"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        time.sleep(seconds)
+    else:
+        deadline.sleep(seconds)
+
+def parse_timeout(value: Optional[str]) -> Optional[float]:
+    """Seconds from a client timeout header value, or None if missing or invalid"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds > 0 else None
+
+def set_deadline(seconds: float):
+    """Start a deadline for the current context; returns a token for reset_deadline"""
+    return _current_deadline.set(Deadline(seconds))
+
+def reset_deadline(token):
+    _current_deadline.reset(token)
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Run a block under a deadline, restoring the previous one afterwards"""
+    token = set_deadline(seconds)
+    try:
+        yield _current_deadline.get()
+    finally:
+        reset_deadline(token)
@@ -0,0 +1,105 @@
+"""
+Detects clients that close their connection while their request is running
+
+One background thread watches the sockets of in-progress requests. A socket
+that becomes readable with nothing to read (EOF) or reports an error means the
+client went away, and the request's callback runs (usually Deadline.cancel).
+The request body must already be read when a socket is watched; a socket with
+unexpected data (e.g. a pipelined request) is simply no longer watched.
+"""
+import time
+import socket
+import logging
+import selectors
+import threading
+from typing import Callable, Optional
+
+# Seconds between checks for newly watched sockets
+POLL_INTERVAL_SECONDS = 0.1
+
+def request_socket(environ) -> Optional[socket.socket]:
+    """The client socket of a WSGI request, for servers that expose it"""
+    sock = environ.get('werkzeug.socket') or environ.get('gunicorn.socket')
+    # TLS sockets cannot be peeked without consuming data
+    if sock is None or not hasattr(sock, 'recv') or hasattr(sock, 'getpeercert'):
+        return None
+    return sock
+
+class DisconnectWatcher:
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._pending = []   # (token, sock, callback) waiting to be registered
+        self._removed = set()
+        self._lock = threading.Lock()
+        self._tokens = 0
+        self._thread = None
+
+    def watch(self, sock: socket.socket, on_disconnect: Callable[[], None]) -> int:
+        """
+        Start watching a request's socket
+
+        Returns:
+            Token for unwatch
+        """
+        with self._lock:
+            self._tokens += 1
+            token = self._tokens
+            self._pending.append((token, sock, on_disconnect))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='disconnect-watcher', daemon=True)
+                self._thread.start()
+        return token
+
+    def unwatch(self, token: int):
+        """Stop watching (the request finished)"""
+        with self._lock:
+            self._removed.add(token)
+
+    def _sync(self):
+        """Apply watch/unwatch calls made since the last poll (watcher thread only)"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            removed, self._removed = self._removed, set()
+
+        # Unregister first: a kept-alive connection is watched again by its next request
+        if removed:
+            for key in list(self._selector.get_map().values()):
+                if key.data[0] in removed:
+                    self._selector.unregister(key.fileobj)
+
+        for token, sock, callback in pending:
+            if token in removed:
+                continue
+            try:
+                self._selector.register(sock, selectors.EVENT_READ, (token, callback))
+            except (ValueError, KeyError, OSError):
+                # Already closed
+                pass
+
+    def _run(self):
+        while True:
+            try:
+                self._sync()
+                if not self._selector.get_map():
+                    time.sleep(POLL_INTERVAL_SECONDS)
+                    continue
+                for key, _ in self._selector.select(timeout=POLL_INTERVAL_SECONDS):
+                    self._check(key)
+            except Exception as e:
+                logging.error(f"Disconnect watcher error: {str(e)}")
+
+    def _check(self, key):
+        sock = key.fileobj
+        try:
+            peeked = sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return
+        except OSError:
+            peeked = b''
+
+        self._selector.unregister(sock)
+        if peeked == b'':
+            key.data[1]()
+
+# Shared by all requests
+disconnect_watcher = DisconnectWatcher()
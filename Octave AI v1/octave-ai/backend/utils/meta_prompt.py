@@ -23,7 +23,7 @@ def generate_meta_prompt(description: str, variation: bool = False, user_tone: s
     desc_lower = description.lower()
     
     # Determine industry/domain
-    domain = _detect_domain(desc_lower)
+    domain = detect_domain(desc_lower)
     
     # Use user preferences if provided, otherwise detect from content
     if user_tone:
@@ -65,8 +65,14 @@ def generate_meta_prompt(description: str, variation: bool = False, user_tone: s
     
     return meta_prompt
 
-def _detect_domain(description: str) -> str:
-    """Detect the domain/industry from description"""
+def detect_domain(description: str) -> str:
+    """
+    Detect the domain/industry from a lowercased description
+    (also a feature of the local tone classifier)
+
+    Returns:
+        One of healthcare, education, business, technology, customer_service, general
+    """
     
     healthcare_keywords = ['medical', 'health', 'doctor', 'patient', 'clinic', 'hospital', 'appointment', 'lab', 'prescription']
     education_keywords = ['education', 'learning', 'student', 'teacher', 'course', 'school', 'university', 'training']
@@ -0,0 +1,185 @@
+"""
+Prometheus metrics for routes, provider calls, synthesis volume and caches
+Exposed by the /metrics endpoint in app.py
+"""
+import logging
+
+# Import prometheus_client if available; metrics become no-ops without it
+try:
+    from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+except ImportError:
+    Counter = Histogram = generate_latest = None
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Buckets sized for provider round-trips (tens of ms up to a long render)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+class _NoopMetric:
+    """Stand-in used when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+def _counter(name, documentation, labelnames):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+def _histogram(name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+if Counter is None:
+    logging.warning("prometheus_client not installed, /metrics will be empty")
+
+# Routes
+REQUEST_LATENCY = _histogram(
+    'octave_http_request_duration_seconds',
+    'Time spent handling a request, by blueprint endpoint',
+    ['endpoint', 'method', 'status']
+)
+
+# Provider calls (one observation per attempt)
+PROVIDER_LATENCY = _histogram(
+    'octave_provider_call_duration_seconds',
+    'Provider API call duration per attempt',
+    ['provider', 'outcome']
+)
+PROVIDER_TTFB = _histogram(
+    'octave_provider_time_to_first_byte_seconds',
+    'Time until provider response headers arrived',
+    ['provider']
+)
+
+# Requests that ran out of time or whose client disconnected
+REQUESTS_CANCELLED = _counter(
+    'octave_requests_cancelled_total',
+    'Requests ended by their deadline or a client disconnect',
+    ['endpoint', 'reason']
+)
+
+# Admission control: decisions per gate and time spent queued for a slot
+ADMISSIONS = _counter(
+    'octave_admission_total',
+    'Admission decisions by gate, priority and outcome (admitted or rejected)',
+    ['gate', 'priority', 'outcome']
+)
+ADMISSION_WAIT = _histogram(
+    'octave_admission_wait_seconds',
+    'Time admitted requests waited for their slots',
+    ['priority']
+)
+
+# Errors by where they happened and what they were
+ERRORS = _counter(
+    'octave_errors_total',
+    'Errors by component and type',
+    ['component', 'type']
+)
+
+# Synthesis volume; voice_id is "other" for voices missing from the catalog
+AUDIO_BYTES = _counter(
+    'octave_audio_bytes_total',
+    'Audio bytes synthesized per voice',
+    ['voice_id']
+)
+CHARACTERS_SYNTHESIZED = _counter(
+    'octave_characters_synthesized_total',
+    'Characters sent to synthesis per voice',
+    ['voice_id']
+)
+AUDIO_SECONDS = _counter(
+    'octave_audio_seconds_total',
+    'Seconds of audio synthesized per voice (from container headers)',
+    ['voice_id']
+)
+# Characters of sentence fragments served from the fragment cache vs sent to a provider
+FRAGMENT_CHARACTERS = _counter(
+    'octave_fragment_characters_total',
+    'Characters of clip sentences by fragment cache result (reused or synthesized)',
+    ['result']
+)
+
+# LLM usage
+LLM_TOKENS = _counter(
+    'octave_llm_tokens_total',
+    'LLM tokens used per LLMService method',
+    ['method', 'kind']
+)
+
+# Caches (hit/miss per cache name)
+CACHE_REQUESTS = _counter(
+    'octave_cache_requests_total',
+    'Cache lookups by cache and result',
+    ['cache', 'result']
+)
+
+# Speculative preview synthesis (started/used/wasted/skipped_budget)
+SPECULATIVE_SYNTHESIS = _counter(
+    'octave_speculative_synthesis_total',
+    'Speculative preview renders by outcome',
+    ['outcome']
+)
+
+# Where tone analyses were answered (local classifier or LLM)
+TONE_ANALYSES = _counter(
+    'octave_tone_analyses_total',
+    'Project tone analyses by source',
+    ['source']
+)
+
+# TTS routing decisions (requested vs serving provider)
+TTS_ROUTING = _counter(
+    'octave_tts_routing_total',
+    'TTS requests by requested and serving provider',
+    ['requested', 'served']
+)
+
+# Requests carrying an Idempotency-Key (run, replay, mismatch, in_progress)
+IDEMPOTENT_REQUESTS = _counter(
+    'octave_idempotent_requests_total',
+    'Requests with an Idempotency-Key by outcome',
+    ['scope', 'outcome']
+)
+
+# Real-time TTS sessions (WebSocket): first-audio latency and synthesis speed
+REALTIME_TTS_TTFA = _histogram(
+    'octave_realtime_tts_time_to_first_audio_seconds',
+    'Time from the first text of a real-time TTS session to its first audio',
+    ['voice_id']
+)
+REALTIME_TTS_RTF = _histogram(
+    'octave_realtime_tts_real_time_factor',
+    'Seconds spent synthesizing per second of audio in real-time TTS sessions',
+    ['voice_id'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0)
+)
+
+def record_llm_usage(method: str, response):
+    """Count prompt/completion tokens reported on an LLM response"""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    LLM_TOKENS.labels(method=method, kind='prompt').inc(getattr(usage, 'prompt_tokens', 0) or 0)
+    LLM_TOKENS.labels(method=method, kind='completion').inc(getattr(usage, 'completion_tokens', 0) or 0)
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+def render_metrics():
+    """
+    Render all metrics in Prometheus text format
+
+    Returns:
+        Tuple of (body bytes, content type)
+    """
+    if generate_latest is None:
+        return b'', CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
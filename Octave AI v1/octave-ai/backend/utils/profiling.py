@@ -0,0 +1,169 @@
+"""
+Opt-in request profiling for production traffic
+
+A request is profiled when either:
+- it is picked by sampling (PROFILE_SAMPLE_RATE, e.g. 0.01 for 1%), or
+- it carries a valid signed header:
+  X-Octave-Profile: <unix timestamp>:<hex HMAC-SHA256 of "<timestamp>:<path>" with PROFILE_SECRET>
+
+Profiled requests write a cProfile .pstats file (load with pstats, snakeviz or
+flameprof for a flamegraph) and, with PROFILE_MEMORY=true, a tracemalloc
+allocation diff, into PROFILE_DIR. Only the newest PROFILE_KEEP files are kept.
+"""
+import os
+import time
+import hmac
+import uuid
+import random
+import hashlib
+import logging
+import cProfile
+import threading
+import tracemalloc
+from typing import Optional
+
+from flask import request, g
+
+PROFILE_HEADER = 'X-Octave-Profile'
+
+# Signed profile requests are accepted for this long after their timestamp
+SIGNATURE_MAX_AGE_SECONDS = 300
+
+# Number of allocation sites listed in memory reports
+MEMORY_TOP_N = 25
+
+class RequestProfiler:
+    def __init__(self):
+        self.sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+        self.secret = os.getenv('PROFILE_SECRET', '')
+        self.output_dir = os.getenv('PROFILE_DIR', os.path.join('/tmp', 'octave-profiles'))
+        self.keep = int(os.getenv('PROFILE_KEEP', 50))
+        self.memory = os.getenv('PROFILE_MEMORY', 'false').lower() == 'true'
+
+        # cProfile and tracemalloc are process wide; profile one request at a time
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or bool(self.secret)
+
+    def install(self, *blueprints):
+        """Attach the profiler to the given blueprints"""
+        if not self.enabled:
+            return
+        for blueprint in blueprints:
+            blueprint.before_request(self._start)
+            blueprint.after_request(self._finish)
+            blueprint.teardown_request(self._abandon)
+        logging.info(f"Request profiling enabled (sample rate {self.sample_rate}, output {self.output_dir})")
+
+    def _should_profile(self) -> bool:
+        header = request.headers.get(PROFILE_HEADER)
+        if header:
+            return self._verify_signature(header)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _verify_signature(self, header: str) -> bool:
+        """Check a '<timestamp>:<signature>' header against PROFILE_SECRET"""
+        if not self.secret:
+            return False
+        try:
+            timestamp, signature = header.split(':', 1)
+            if abs(time.time() - int(timestamp)) > SIGNATURE_MAX_AGE_SECONDS:
+                return False
+        except ValueError:
+            return False
+
+        expected = hmac.new(
+            self.secret.encode(),
+            f"{timestamp}:{request.path}".encode(),
+            hashlib.sha256
+        ).hexdigest()
+        return hmac.compare_digest(expected, signature)
+
+    def _start(self):
+        if not self._should_profile() or not self._busy.acquire(blocking=False):
+            return
+
+        g.profile_id = f"{int(time.time())}_{(request.endpoint or 'unknown').replace('.', '-')}_{uuid.uuid4().hex[:8]}"
+        g.memory_snapshot = None
+        g.started_tracemalloc = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                g.started_tracemalloc = True
+            g.memory_snapshot = tracemalloc.take_snapshot()
+
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    def _finish(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+
+        profiler.disable()
+        try:
+            # Snapshot memory before writing anything so the report excludes our own output
+            before = g.pop('memory_snapshot', None)
+            after = tracemalloc.take_snapshot() if before is not None else None
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            base_path = os.path.join(self.output_dir, g.profile_id)
+            profiler.dump_stats(f"{base_path}.pstats")
+
+            if before is not None:
+                self._write_memory_report(before, after, f"{base_path}.mem.txt")
+
+            self._rotate()
+            response.headers['X-Octave-Profile-Id'] = g.profile_id
+            logging.info(f"Wrote request profile {base_path}.pstats")
+        except Exception as e:
+            logging.error(f"Failed to write request profile: {str(e)}")
+        finally:
+            self._release()
+
+        return response
+
+    def _abandon(self, error=None):
+        """Stop profiling if the request ended without reaching after_request"""
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._release()
+
+    def _release(self):
+        if g.pop('started_tracemalloc', False):
+            tracemalloc.stop()
+        self._busy.release()
+
+    def _write_memory_report(self, before, after, path: str):
+        current, peak = tracemalloc.get_traced_memory()
+        stats = after.compare_to(before, 'lineno')
+
+        with open(path, 'w') as f:
+            f.write(f"Traced memory: current={current} bytes, peak={peak} bytes\n")
+            f.write(f"Top {MEMORY_TOP_N} allocation changes during request:\n")
+            for stat in stats[:MEMORY_TOP_N]:
+                f.write(f"{stat}\n")
+
+    def _rotate(self):
+        """Delete the oldest profile files beyond the retention limit"""
+        profile_ids = {}
+        for name in os.listdir(self.output_dir):
+            path = os.path.join(self.output_dir, name)
+            profile_ids.setdefault(name.split('.', 1)[0], []).append(path)
+
+        ordered = sorted(profile_ids.values(), key=lambda paths: max(os.path.getmtime(p) for p in paths))
+        for paths in ordered[:-self.keep] if self.keep > 0 else ordered:
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+def sign_profile_request(secret: str, path: str, timestamp: Optional[int] = None) -> str:
+    """Build an X-Octave-Profile header value for a request path"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(secret.encode(), f"{timestamp}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{timestamp}:{signature}"
@@ -0,0 +1,149 @@
+"""
+Splits long scripts into sentence-aligned chunks for TTS synthesis
+Examples: "Hello there. How can I help?" -> ["Hello there.", "How can I help?"]
+"""
+import re
+from typing import Iterable, Iterator, List, Optional
+
+# Sentence end: terminal punctuation, optional closing quote/bracket, then whitespace
+_SENTENCE_END = re.compile(r'(?<=[.!?…]["\'”’)\]])\s+|(?<=[.!?…])\s+')
+
+# Softer break points used when a single sentence is longer than a chunk
+_CLAUSE_END = re.compile(r'(?<=[,;:—])\s+')
+
+DEFAULT_MAX_CHUNK_CHARS = 250
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, keeping the terminal punctuation
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of non-empty sentences
+    """
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    if not text:
+        return []
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+def chunk_text(text: str, max_chars: int = DEFAULT_MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Group sentences into chunks of at most max_chars characters
+
+    Sentences are never split unless a single sentence is longer than
+    max_chars, in which case it is broken at clause boundaries and then
+    at word boundaries.
+
+    Args:
+        text: Input text
+        max_chars: Soft upper bound for each chunk
+
+    Returns:
+        Ordered list of chunks
+    """
+    chunks = []
+    current = ''
+
+    for sentence in split_sentences(text):
+        for piece in _split_long_sentence(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+def iter_sentences(fragments: Iterable[str], min_chars: int = 40, max_chars: Optional[int] = None) -> Iterator[str]:
+    """
+    Cut complete sentences out of incrementally arriving text (e.g. LLM tokens)
+
+    A sentence is emitted once the whitespace after its terminal punctuation has
+    arrived. Sentences shorter than min_chars are merged with the next one to
+    avoid tiny synthesis requests. The remainder is flushed at the end.
+
+    With max_chars, no chunk is longer than max_chars: longer sentences are
+    broken at clause, then word boundaries, and text that has no sentence end
+    yet is cut as soon as it grows past max_chars, so the text held here stays
+    bounded however long the input runs without punctuation.
+
+    Args:
+        fragments: Text pieces in arrival order
+        min_chars: Minimum length of an emitted chunk (except the last)
+        max_chars: Maximum length of an emitted chunk, or None for whole sentences
+
+    Yields:
+        Sentence-aligned chunks
+    """
+    buffer = ''
+    pending = ''
+
+    for fragment in fragments:
+        buffer += fragment
+        parts = _SENTENCE_END.split(buffer)
+
+        # Everything but the last part is a finished sentence
+        buffer = parts.pop()
+        if max_chars and len(buffer) > max_chars:
+            parts.extend(_cut_unfinished(buffer, max_chars))
+            buffer = parts.pop()
+
+        for sentence in parts:
+            sentence = re.sub(r'\s+', ' ', sentence).strip()
+            if not sentence:
+                continue
+            for piece in _split_long_sentence(sentence, max_chars) if max_chars else [sentence]:
+                if max_chars and pending and len(pending) + 1 + len(piece) > max_chars:
+                    yield pending
+                    pending = ''
+                pending = f"{pending} {piece}" if pending else piece
+                if len(pending) >= min_chars:
+                    yield pending
+                    pending = ''
+
+    remainder = re.sub(r'\s+', ' ', f"{pending} {buffer}").strip()
+    if remainder:
+        for piece in _split_long_sentence(remainder, max_chars) if max_chars else [remainder]:
+            yield piece
+
+def _cut_unfinished(text: str, max_chars: int) -> List[str]:
+    """
+    Break text without a sentence end into pieces of at most max_chars; the
+    last piece (which may be a word still arriving) is returned raw, with its
+    trailing whitespace, to be continued by the next fragment
+    """
+    pieces = _split_long_sentence(re.sub(r'\s+', ' ', text).strip(), max_chars)
+    # A single word longer than max_chars is cut anyway
+    pieces = [word[start:start + max_chars] for word in pieces for start in range(0, len(word), max_chars)]
+    if text[-1:].isspace():
+        pieces[-1] += ' '
+    return pieces
+
+def _split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    """Break an overlong sentence at clause, then word boundaries"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    pieces = []
+    for clause in _CLAUSE_END.split(sentence):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+            continue
+
+        # Fall back to word boundaries
+        current = ''
+        for word in clause.split(' '):
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            pieces.append(current)
+
+    return pieces
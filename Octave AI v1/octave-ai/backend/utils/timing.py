@@ -0,0 +1,55 @@
+"""
+Lightweight per-request phase timing, emitted as a Server-Timing header
+Example: Server-Timing: meta_prompt;dur=0.4, llm_script;dur=812.0, total;dur=1650.2
+"""
+import re
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+# Spans recorded for the current request: list of (name, duration_ms, description)
+_spans = contextvars.ContextVar('timing_spans', default=None)
+
+def start_timing():
+    """Begin collecting spans for the current context; returns a token for stop_timing"""
+    return _spans.set([])
+
+def stop_timing(token):
+    _spans.reset(token)
+
+def get_spans() -> List[Tuple[str, float, Optional[str]]]:
+    """Spans recorded so far in the current context"""
+    return list(_spans.get() or [])
+
+def record_span(name: str, duration_ms: float, description: Optional[str] = None):
+    """Add a finished span; a no-op outside a timed request"""
+    spans = _spans.get()
+    if spans is not None:
+        # list.append is atomic, so worker threads sharing a copied context are safe
+        spans.append((name, duration_ms, description))
+
+@contextmanager
+def span(name: str, description: Optional[str] = None):
+    """
+    Time a block as a named phase of the current request
+
+    Usage:
+        with span('llm_script'):
+            ...
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - started) * 1000, description)
+
+def format_server_timing(spans: List[Tuple[str, float, Optional[str]]]) -> str:
+    """Render spans as a Server-Timing header value"""
+    entries = []
+    for name, duration_ms, description in spans:
+        entry = f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)};dur={duration_ms:.1f}"
+        if description:
+            entry += ';desc="{}"'.format(description.replace('"', "'"))
+        entries.append(entry)
+    return ', '.join(entries)